@@ -0,0 +1,122 @@
+"""
+Tamaño en disco y tiempo de carga de la tabla de vecinos y la matriz TF-IDF
+según el formato de guardado.
+
+Se guardan los artefactos ya construidos en un directorio temporal con cada
+combinación de precisión de scores y compresión, y se mide el tamaño, el
+tiempo de carga (mediana de varias repeticiones) y el tiempo de leer las
+filas de vecinos de 1000 películas, que es lo que hace cada recomendación.
+
+Uso (desde app/):
+    python -m benchmarks.bench_artefactos --repeticiones 5
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from utils import DataLoader
+from utils.artifacts import (
+    COMPRESORES, guardar_arrays, cargar_arrays, guardar_csr, cargar_csr
+)
+from utils.ranking import codificar_vecinos, decodificar_scores, PRECISIONES_SCORES
+
+
+def tamano_directorio(directorio, prefijo):
+    return sum(
+        os.path.getsize(os.path.join(directorio, f))
+        for f in os.listdir(directorio) if f.startswith(prefijo)
+    )
+
+
+def mediana_ms(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return float(np.median(tiempos)), resultado
+
+
+def medir_vecinos(directorio, ids, scores, precision, compresion, repeticiones, filas):
+    guardar_arrays(directorio, "vecinos", codificar_vecinos(ids, scores, precision), compresion)
+    tamano = tamano_directorio(directorio, "vecinos.")
+    mmap = compresion is None
+
+    def cargar():
+        arrays = cargar_arrays(directorio, "vecinos", ('ids', 'scores'), mmap)
+        return arrays['ids'], decodificar_scores(arrays['scores'])
+
+    carga_ms, (ids_c, scores_c) = mediana_ms(cargar, repeticiones)
+
+    def leer_filas():
+        for i in filas:
+            ids_c[i, 1:11].tolist()
+            scores_c[i, 1:11].tolist()
+
+    acceso_ms, _ = mediana_ms(leer_filas, repeticiones)
+    error = float(np.abs(scores_c[:, :] - scores).max())
+    return tamano, carga_ms, acceso_ms, error
+
+
+def medir_tfidf(directorio, matriz, compresion, repeticiones):
+    guardar_csr(directorio, "tfidf_matrix", matriz, compresion)
+    tamano = tamano_directorio(directorio, "tfidf_matrix.")
+    carga_ms, _ = mediana_ms(
+        lambda: cargar_csr(directorio, "tfidf_matrix", mmap=compresion is None), repeticiones
+    )
+    return tamano, carga_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de formatos de artefactos")
+    parser.add_argument('--dataset', default='dataset_movies_api.csv')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    os.chdir(APP_DIR)
+    data_loader = DataLoader(args.dataset)
+    if not data_loader.initialize_system():
+        return 1
+
+    # Tabla de referencia en float32 con los ids originales
+    ids = np.asarray(data_loader.vecinos_ids, dtype=np.int32)
+    scores = np.asarray(data_loader.vecinos_scores[:, :], dtype=np.float32)
+    filas = np.random.default_rng(42).integers(len(ids), size=1000)
+    compresiones = [None] + list(COMPRESORES)
+
+    directorio = tempfile.mkdtemp(prefix="bench_artefactos_")
+    try:
+        crudo = ids.nbytes + scores.nbytes
+        print(f"\nTabla de vecinos {ids.shape} | int32 + float32 sin comprimir: {crudo / 1e6:.2f} MB")
+        print(f"{'scores':<8} {'compresión':<11} {'MB':>8} {'ratio':>7} {'carga ms':>9} "
+              f"{'1000 filas ms':>14} {'error máx':>10}")
+        for precision in PRECISIONES_SCORES:
+            for compresion in compresiones:
+                tamano, carga_ms, acceso_ms, error = medir_vecinos(
+                    directorio, ids, scores, precision, compresion, args.repeticiones, filas
+                )
+                print(f"{precision:<8} {compresion or '-':<11} {tamano / 1e6:>8.2f} "
+                      f"{crudo / tamano:>6.1f}x {carga_ms:>9.2f} {acceso_ms:>14.2f} {error:>10.2g}")
+
+        matriz = data_loader.tfidf_matrix
+        print(f"\nMatriz TF-IDF {matriz.shape}, {matriz.nnz} valores no nulos")
+        print(f"{'compresión':<11} {'MB':>8} {'carga ms':>9}")
+        for compresion in compresiones:
+            tamano, carga_ms = medir_tfidf(directorio, matriz, compresion, args.repeticiones)
+            print(f"{compresion or '-':<11} {tamano / 1e6:>8.2f} {carga_ms:>9.2f}")
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
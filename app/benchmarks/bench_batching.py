@@ -0,0 +1,103 @@
+"""
+Throughput frente a latencia p99 de la búsqueda semántica con micro-lotes.
+
+Varios hilos cliente hacen búsquedas en bucle cerrado durante un tiempo fijo,
+primero llamando directamente a buscar_peliculas_similares y luego a través
+de SearchBatcher con distintas combinaciones de tamaño de lote y espera. La
+caché de consultas se desactiva para medir solo el cálculo.
+
+Uso (desde app/):
+    python -m benchmarks.bench_batching --clientes 16 --segundos 5
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from utils import DataLoader, TextCorrector
+from models import MovieRecommender, QueryCache, SearchBatcher
+
+
+def consultas_de_prueba(df, n=500, semilla=42):
+    """Mezcla de títulos con errores y texto libre"""
+    rng = np.random.default_rng(semilla)
+    titulos = df['title'].astype(str).tolist()
+    consultas = []
+    for _ in range(n):
+        titulo = titulos[rng.integers(len(titulos))]
+        if rng.random() < 0.5 and len(titulo) > 3:
+            pos = rng.integers(len(titulo))
+            titulo = titulo[:pos] + titulo[pos + 1:]
+        consultas.append(titulo)
+    return consultas
+
+
+def carga(buscar, consultas, clientes, segundos):
+    """Ejecuta la carga y devuelve (consultas/s, p50 ms, p99 ms)"""
+    latencias = [[] for _ in range(clientes)]
+    fin = time.perf_counter() + segundos
+
+    def cliente(i):
+        j = i
+        while time.perf_counter() < fin:
+            inicio = time.perf_counter()
+            buscar(consultas[j % len(consultas)])
+            latencias[i].append(time.perf_counter() - inicio)
+            j += clientes
+
+    hilos = [threading.Thread(target=cliente, args=(i,)) for i in range(clientes)]
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    total = time.perf_counter() - inicio
+
+    todas = np.concatenate([np.asarray(l) for l in latencias]) * 1000
+    return len(todas) / total, np.percentile(todas, 50), np.percentile(todas, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de micro-lotes de búsqueda")
+    parser.add_argument('--dataset', default='dataset_movies_api.csv')
+    parser.add_argument('--clientes', type=int, default=16)
+    parser.add_argument('--segundos', type=float, default=5)
+    parser.add_argument('--lotes', type=int, nargs='+', default=[8, 32])
+    parser.add_argument('--esperas-ms', type=float, nargs='+', default=[1, 3, 10])
+    args = parser.parse_args()
+
+    os.chdir(APP_DIR)
+    data_loader = DataLoader(args.dataset)
+    if not data_loader.initialize_system():
+        return 1
+    recommender = MovieRecommender(
+        data_loader, TextCorrector(data_loader.catalogo), cache=QueryCache(max_entradas=0)
+    )
+    consultas = consultas_de_prueba(data_loader.df)
+
+    print(f"\n{len(data_loader.df)} películas | {args.clientes} clientes | {args.segundos}s por caso")
+    print(f"{'modo':<24} {'consultas/s':>12} {'p50 ms':>9} {'p99 ms':>9}")
+
+    rps, p50, p99 = carga(recommender.buscar_peliculas_similares, consultas, args.clientes, args.segundos)
+    print(f"{'sin lotes':<24} {rps:>12.1f} {p50:>9.2f} {p99:>9.2f}")
+
+    for max_lote in args.lotes:
+        for espera in args.esperas_ms:
+            batcher = SearchBatcher(recommender, max_lote=max_lote, espera_ms=espera)
+            rps, p50, p99 = carga(batcher.buscar, consultas, args.clientes, args.segundos)
+            media = batcher.estadisticas()['tamano_medio_lote']
+            batcher.detener()
+            modo = f"lote={max_lote} espera={espera:g}ms"
+            print(f"{modo:<24} {rps:>12.1f} {p50:>9.2f} {p99:>9.2f}   (lote medio {media:.1f})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
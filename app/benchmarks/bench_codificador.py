@@ -0,0 +1,108 @@
+"""
+Vectorización de consultas: TfidfVectorizer.transform frente a CodificadorConsultas.
+
+Entrena el TF-IDF sobre el dataset indicado y, para una mezcla de consultas
+(títulos con errores, fragmentos de sinopsis, textos sin términos conocidos y
+vacíos), verifica que ambos caminos den exactamente la misma matriz (índices
+y datos bit a bit) y mide la latencia por consulta sola y por lotes.
+Termina con código 1 si algún vector difiere.
+
+Uso (desde app/):
+    python -m benchmarks.bench_codificador --dataset benchmarks/datos/sintetico_10000_s42.csv
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from utils import DataLoader
+from utils.tfidf import CodificadorConsultas
+
+
+def consultas_de_prueba(df, n, semilla=7):
+    rng = np.random.default_rng(semilla)
+    titulos = df['title'].astype(str).tolist()
+    sinopsis = df['overview'].astype(str).tolist()
+    consultas = ["", "   ", "the of and", "zzqx qwxz", "Amélie Poulain", "ÉCOLE naïve café",
+                 "İstanbul", "star-wars: episode_iv (1977)"]
+    while len(consultas) < n:
+        i = rng.integers(len(titulos))
+        if rng.random() < 0.5:
+            consultas.append(titulos[i])
+        else:
+            palabras = sinopsis[i].split()
+            inicio = rng.integers(max(1, len(palabras)))
+            consultas.append(' '.join(palabras[inicio:inicio + rng.integers(2, 12)]).upper())
+    return consultas
+
+
+def identicas(a, b):
+    a, b = a.tocsr(), b.tocsr()
+    return (a.shape == b.shape and np.array_equal(a.indptr, b.indptr)
+            and np.array_equal(a.indices, b.indices)
+            and np.array_equal(a.data.view(np.uint64), b.data.view(np.uint64)))
+
+
+def por_consulta(vectorizar, consultas, repeticiones):
+    """Microsegundos por consulta (mediana de las repeticiones)"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for consulta in consultas:
+            vectorizar([consulta.lower()])
+        tiempos.append((time.perf_counter() - inicio) / len(consultas) * 1e6)
+    return float(np.median(tiempos))
+
+
+def por_lote(vectorizar, consultas, tamano, repeticiones):
+    lotes = [[c.lower() for c in consultas[i:i + tamano]] for i in range(0, len(consultas), tamano)]
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for lote in lotes:
+            vectorizar(lote)
+        tiempos.append((time.perf_counter() - inicio) / len(consultas) * 1e6)
+    return float(np.median(tiempos))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de la vectorización de consultas")
+    parser.add_argument('--dataset', default='dataset_movies_api.csv')
+    parser.add_argument('--consultas', type=int, default=2000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--lote', type=int, default=32)
+    args = parser.parse_args()
+
+    data_loader = DataLoader(args.dataset)
+    if not data_loader.load_data() or not data_loader.create_similarity_matrix():
+        return 1
+    tfidf = data_loader.tfidf
+    codificador = CodificadorConsultas.desde_vectorizador(tfidf)
+    consultas = consultas_de_prueba(data_loader.df, args.consultas)
+
+    distintas = sum(
+        not identicas(tfidf.transform([c.lower()]), codificador.codificar([c.lower()]))
+        for c in consultas
+    )
+    lote = [c.lower() for c in consultas[:args.lote]]
+    distintas += not identicas(tfidf.transform(lote), codificador.codificar(lote))
+    print(f"{len(consultas)} consultas, vocabulario de {len(tfidf.vocabulary_)} términos: "
+          + ("vectores idénticos" if not distintas else f"{distintas} vectores DIFIEREN"))
+
+    print(f"{'modo':<16} {'transform µs':>13} {'codificador µs':>15} {'aceleración':>12}")
+    for modo, medir in (('una consulta', lambda f: por_consulta(f, consultas, args.repeticiones)),
+                        (f'lotes de {args.lote}', lambda f: por_lote(f, consultas, args.lote,
+                                                                     args.repeticiones))):
+        t_sklearn, t_propio = medir(tfidf.transform), medir(codificador.codificar)
+        print(f"{modo:<16} {t_sklearn:>13.1f} {t_propio:>15.1f} {t_sklearn / t_propio:>11.1f}x")
+    return 1 if distintas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
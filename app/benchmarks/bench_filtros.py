@@ -0,0 +1,124 @@
+"""
+Filtros dentro de la selección top-K (utils.filtros) frente a filtrar después.
+
+Para una mezcla de filtros (género, década, rating mínimo, combinaciones y
+negaciones) verifica que la búsqueda semántica filtrada devuelva exactamente
+lo mismo que ordenar todo el catálogo y quedarse con las primeras k
+películas permitidas, y que devuelva k resultados siempre que haya k
+permitidas. Mide además la latencia con y sin filtro, el costo de combinar
+los filtros ya en caché y cuántos resultados quedarían si se filtrara
+después de pedir k (sobre-pedir). Termina con código 1 si algo difiere.
+
+Uso (desde app/):
+    python -m benchmarks.bench_filtros --dataset benchmarks/datos/sintetico_10000_s42.csv \\
+        --modelos /tmp/modelos
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from utils import DataLoader, TextCorrector
+from models import MovieRecommender
+from models.query_cache import QueryCache
+
+
+def filtros_de_prueba(catalogo):
+    generos = [str(g) for g in catalogo.generos[:3]]
+    return [
+        [f'genero:{generos[0]}'],
+        ['decada:1990'],
+        ['rating_min:7'],
+        [f'genero:{generos[1]}', 'decada:2000'],
+        [f'genero:{generos[2]}', f'!genero:{generos[0]}', 'rating_min:6'],
+        [f'genero:{generos[0]}', 'decada:1980', 'rating_min:8'],
+    ]
+
+
+def esperado(recommender, query, permitidos, k):
+    """Referencia: ranking completo estable y luego filtro"""
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    query = recommender._corregir_titulo(query)
+    scores = cosine_similarity(recommender._vectorizar([query.lower()]), recommender.tfidf_matrix).ravel()
+    orden = np.argsort(-scores, kind='stable')
+    orden = orden[permitidos[orden]][:k]
+    exacta = recommender.catalogo.indice_titulo(query)
+    if exacta is not None and permitidos[exacta]:
+        orden = np.concatenate([[exacta], orden[orden != exacta]])[:k]
+    return orden.tolist()
+
+
+def medir(funcion, repeticiones):
+    """Milisegundos por llamada (mediana)"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return float(np.median(tiempos))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Filtros dentro del top-K")
+    parser.add_argument('--dataset', default='dataset_movies_api.csv')
+    parser.add_argument('--modelos', default='models/saved')
+    parser.add_argument('--consultas', type=int, default=30)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args()
+
+    data_loader = DataLoader(args.dataset)
+    if not data_loader.initialize_system(mmap=True, models_dir=args.modelos):
+        return 1
+    # Sin caché de resultados: cada llamada recorre el camino completo
+    recommender = MovieRecommender(data_loader, TextCorrector(data_loader.catalogo),
+                                   cache=QueryCache(max_entradas=0))
+    rng = np.random.default_rng(3)
+    titulos = data_loader.df['title'].astype(str).to_numpy()[rng.integers(0, len(data_loader.df),
+                                                                           args.consultas)]
+    filtros = filtros_de_prueba(data_loader.catalogo)
+
+    fallas = 0
+    print(f"{'filtro':<48} {'permitidas':>10} {'ms sin':>7} {'ms con':>7} {'post-filtro':>11}")
+    for filtro in filtros:
+        permitidos, _ = recommender.filtros.mascara(filtro)
+        for titulo in titulos:
+            resultado, error = recommender.buscar_peliculas_similares(titulo, args.k, filtro)
+            if error:
+                print(f"  {titulo!r}: {error}")
+                fallas += 1
+                continue
+            obtenido = resultado.index.tolist()
+            if obtenido != esperado(recommender, titulo, permitidos, args.k):
+                fallas += 1
+            if len(obtenido) != min(args.k, int(permitidos.sum())):
+                fallas += 1
+
+        # Filtrar después de pedir k: cuántos de los k quedarían en promedio
+        quedan = np.mean([
+            permitidos[recommender.buscar_peliculas_similares(t, args.k)[0].index.to_numpy()].sum()
+            for t in titulos
+        ])
+        t_sin = medir(lambda: [recommender.buscar_peliculas_similares(t, args.k) for t in titulos[:5]],
+                      args.repeticiones) / 5
+        t_con = medir(lambda: [recommender.buscar_peliculas_similares(t, args.k, filtro)
+                               for t in titulos[:5]], args.repeticiones) / 5
+        print(f"{', '.join(filtro):<48} {int(permitidos.sum()):>10} {t_sin:>7.2f} {t_con:>7.2f} "
+              f"{quedan:>8.1f}/{args.k}")
+
+    combinar = medir(lambda: recommender.filtros.mascara(filtros[4]), args.repeticiones * 50)
+    print(f"Combinar {len(filtros[4])} filtros en caché y desempaquetar: {combinar * 1000:.1f} µs; "
+          f"{(len(data_loader.df) + 7) // 8} bytes por filtro")
+    print("Resultados idénticos a ordenar y filtrar" if not fallas else f"{fallas} resultados DIFIEREN")
+    return 1 if fallas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
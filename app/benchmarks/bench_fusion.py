@@ -0,0 +1,167 @@
+"""
+Fusión de similitud con popularidad y rating dentro del top-K (utils.fusion).
+
+Para varias configuraciones (lineal y log) verifica que películas similares,
+búsqueda y perfil devuelvan exactamente lo mismo que puntuar todo el catálogo,
+combinar con las columnas popularity y vote_average del DataFrame y ordenar.
+Mide la latencia de cada método con y sin fusión, el costo del paso top-K
+solo, cuántos candidatos puntúan las consultas de similares, y
+qué fracción del top-K exacto recupera la práctica anterior (pedir más
+resultados por similitud y reordenarlos con las columnas del DataFrame).
+Termina con código 1 si algún resultado difiere.
+
+Uso (desde app/):
+    python -m benchmarks.bench_fusion --dataset benchmarks/datos/sintetico_10000_s42.csv \\
+        --modelos /tmp/modelos
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from utils import DataLoader, TextCorrector
+from utils.fusion import EPSILON_LOG
+from utils.metrics import METRICAS
+from utils.ranking import top_k_indices
+from models import MovieRecommender
+from models.query_cache import QueryCache
+
+CONFIGURACIONES = (
+    {'popularidad': 0.2},
+    {'popularidad': 0.1, 'rating': 0.1},
+    {'similitud': 1.0, 'popularidad': 0.3, 'rating': 0.3, 'modo': 'log'},
+)
+
+
+def referencia(df, sim_scores, fusion):
+    """Puntaje híbrido calculado a partir de las columnas del DataFrame"""
+    pesos = np.array([fusion.get('similitud', 1.0), fusion.get('popularidad', 0.0), fusion.get('rating', 0.0)])
+    pesos = pesos / pesos.sum()
+    popularidad = np.log1p(df['popularity'].clip(lower=0).fillna(0).to_numpy(dtype=np.float64))
+    popularidad = popularidad / popularidad.max()
+    rating = (df['vote_average'].fillna(0).to_numpy(dtype=np.float64) / 10).clip(0, 1)
+    if fusion.get('modo') == 'log':
+        senales = [np.log(x + EPSILON_LOG) for x in (sim_scores, popularidad, rating)]
+    else:
+        senales = [sim_scores, popularidad, rating]
+    return pesos[0] * senales[0] + (pesos[1] * senales[1] + pesos[2] * senales[2])
+
+
+def mejores(puntajes, k, excluir=()):
+    orden = np.argsort(-puntajes, kind='stable')
+    return [int(i) for i in orden if i not in excluir][:k]
+
+
+def medir(funcion, argumentos, repeticiones=3):
+    """Milisegundos por llamada (mediana de las repeticiones)"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for args in argumentos:
+            funcion(*args)
+        tiempos.append((time.perf_counter() - inicio) * 1000 / len(argumentos))
+    return float(np.median(tiempos))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fusión de puntajes dentro del top-K")
+    parser.add_argument('--dataset', default='dataset_movies_api.csv')
+    parser.add_argument('--modelos', default='models/saved')
+    parser.add_argument('--consultas', type=int, default=40)
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    data_loader = DataLoader(args.dataset)
+    if not data_loader.initialize_system(mmap=True, models_dir=args.modelos):
+        return 1
+    recommender = MovieRecommender(data_loader, TextCorrector(data_loader.catalogo),
+                                   cache=QueryCache(max_entradas=0))
+    df, matriz, k = data_loader.df, data_loader.tfidf_matrix, args.k
+    rng = np.random.default_rng(5)
+    filas = rng.integers(0, len(df), args.consultas)
+    titulos = [str(df['title'].iat[i]) for i in filas]
+    perfiles = [[str(df['title'].iat[j]) for j in rng.integers(0, len(df), 10)] for _ in filas]
+
+    fallas = 0
+    for fusion in CONFIGURACIONES:
+        for titulo, perfil in zip(titulos, perfiles):
+            idx = recommender.catalogo.indice_titulo(titulo)
+            sims = matriz @ matriz[idx].toarray().ravel()
+            obtenido = recommender.get_movie_recommendations(titulo, k, fusion=fusion)[0]
+            fallas += obtenido.index.tolist() != mejores(referencia(df, sims, fusion), k, {idx})
+
+            corregido = recommender._corregir_titulo(titulo)
+            sims = (matriz @ recommender._vectorizar([corregido.lower()]).T).toarray().ravel()
+            esperado = mejores(referencia(df, sims, fusion), k)
+            exacta = recommender.catalogo.indice_titulo(corregido)
+            if exacta is not None:
+                esperado = ([exacta] + [i for i in esperado if i != exacta])[:k]
+            obtenido = recommender.buscar_peliculas_similares(titulo, k, fusion=fusion)[0]
+            fallas += obtenido.index.tolist() != esperado
+
+            semillas = sorted({recommender.catalogo.indice_titulo(t) for t in perfil})
+            centroide = np.asarray(matriz[semillas].sum(axis=0)).ravel()
+            sims = matriz @ (centroide / np.linalg.norm(centroide))
+            obtenido = recommender.recommend_for_profile(perfil, True, k, fusion=fusion)[0]
+            fallas += obtenido.index.tolist() != mejores(referencia(df, sims, fusion), k, set(semillas))
+    print(f"{3 * len(titulos) * len(CONFIGURACIONES)} consultas: "
+          + ("idénticas a combinar y ordenar con el DataFrame" if not fallas else f"{fallas} DIFIEREN"))
+
+    # Paso top-K solo, sobre un vector del tamaño del catálogo
+    sims = matriz @ matriz[int(filas[0])].toarray().ravel()
+    print(f"\nTop-{k} sobre {len(df)} scores (µs): similitud "
+          f"{medir(lambda: top_k_indices(sims, k), [()], 200) * 1000:.1f}", end='')
+    for fusion in CONFIGURACIONES:
+        hibrido = recommender.senales.hibrido(fusion)
+        t = medir(lambda: top_k_indices(hibrido.puntuar(sims), k), [()], 200) * 1000
+        print(f", {hibrido.modo} {t:.1f}", end='')
+    print()
+
+    print(f"\n{'método':<12} {'ms sin':>8} {'ms con':>8}")
+    metodos = (
+        ('similares', recommender.get_movie_recommendations, [(t, k) for t in titulos]),
+        ('busqueda', recommender.buscar_peliculas_similares, [(t, k) for t in titulos]),
+        ('perfil', recommender.recommend_for_profile, [(p, True, k) for p in perfiles]),
+        ('ponderada', recommender.recomendar_ponderado, [(t, None, k) for t in titulos]),
+    )
+    for nombre, funcion, argumentos in metodos:
+        if nombre == 'ponderada' and recommender.indice_campos is None:
+            continue
+        t_sin = medir(funcion, argumentos)
+        t_con = medir(lambda *a: funcion(*a, fusion=CONFIGURACIONES[1]), argumentos)
+        print(f"{nombre:<12} {t_sin:>8.2f} {t_con:>8.2f}")
+
+    METRICAS.habilitar()
+    METRICAS.reiniciar()
+    for fusion in CONFIGURACIONES:
+        for titulo in titulos:
+            recommender.get_movie_recommendations(titulo, k, fusion=fusion)
+    puntuados = METRICAS.instantanea()['contadores'].get('recomendador.similares.candidatos_puntuados', 0)
+    METRICAS.habilitar(False)
+    print(f"\nSimilares: {puntuados / (len(titulos) * len(CONFIGURACIONES)):.0f} candidatos puntuados "
+          f"por consulta de {len(df)}")
+
+    # Práctica anterior: pedir n por similitud y reordenar con el DataFrame
+    for sobrepedir in (2, 5):
+        recuperados = []
+        for fusion in CONFIGURACIONES:
+            for titulo in titulos:
+                exacto = set(recommender.get_movie_recommendations(titulo, k, fusion=fusion)[0].index)
+                candidatos = recommender.get_movie_recommendations(titulo, k * sobrepedir)[0]
+                sims = np.zeros(len(df))
+                sims[candidatos.index] = candidatos['similarity_score']
+                puntajes = referencia(df, sims, fusion)[candidatos.index]
+                reordenados = candidatos.index[np.argsort(-puntajes, kind='stable')][:k]
+                recuperados.append(len(exacto & set(reordenados)) / k)
+        print(f"Reordenar {sobrepedir * k} por similitud recupera {np.mean(recuperados):.0%} del top-{k} exacto")
+    return 1 if fallas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
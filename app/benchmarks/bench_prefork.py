@@ -0,0 +1,102 @@
+"""
+Mide el throughput del servidor HTTP con 1..N procesos hijos (pre-fork).
+
+Levanta `server.py --procesos N` para cada valor pedido, lanza clientes en
+procesos separados que hacen peticiones con conexión persistente durante un
+tiempo fijo y reporta peticiones por segundo y escalado relativo a 1 proceso.
+
+Uso (desde app/):
+    python -m benchmarks.bench_prefork --procesos 1 2 4 --clientes 8 --segundos 10
+"""
+
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import time
+from multiprocessing import Pool
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _esperar_servidor(port, timeout=600):
+    limite = time.time() + timeout
+    while time.time() < limite:
+        try:
+            conexion = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conexion.request('GET', '/health')
+            if conexion.getresponse().status == 200:
+                return True
+        except OSError:
+            time.sleep(0.5)
+    return False
+
+
+def _cliente(parametros):
+    """Hace peticiones durante `segundos`; devuelve cuántas completó"""
+    port, segundos, ruta, cuerpos = parametros
+    conexion = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    completadas = 0
+    fin = time.time() + segundos
+    while time.time() < fin:
+        cuerpo = cuerpos[completadas % len(cuerpos)]
+        conexion.request('POST', ruta, body=cuerpo, headers={'Content-Type': 'application/json'})
+        respuesta = conexion.getresponse()
+        respuesta.read()
+        completadas += 1
+    conexion.close()
+    return completadas
+
+
+def medir(procesos, args, cuerpos):
+    """Throughput (peticiones/s) con `procesos` hijos"""
+    servidor = subprocess.Popen(
+        [sys.executable, 'server.py', '--port', str(args.port), '--procesos', str(procesos),
+         '--workers', str(args.workers), '--dataset', args.dataset],
+        cwd=APP_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        if not _esperar_servidor(args.port):
+            raise RuntimeError("El servidor no respondió a tiempo")
+        with Pool(args.clientes) as pool:
+            totales = pool.map(_cliente, [
+                (args.port, args.segundos, args.ruta, cuerpos)
+                for _ in range(args.clientes)
+            ])
+        return sum(totales) / args.segundos
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput del servidor pre-fork")
+    parser.add_argument('--procesos', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--clientes', type=int, default=8)
+    parser.add_argument('--segundos', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--ruta', default='/search')
+    parser.add_argument('--dataset', default='dataset_movies_api.csv')
+    args = parser.parse_args()
+
+    # Consultas distintas para que la caché no oculte el coste del cálculo
+    palabras = ['space', 'war', 'love', 'hero', 'city', 'night', 'family', 'dark', 'king', 'ship']
+    cuerpos = [
+        json.dumps({'query': f"{a} {b} {i}", 'k': 10}).encode('utf-8')
+        for i in range(50) for a in palabras for b in palabras if a != b
+    ]
+
+    print(f"CPUs disponibles: {os.cpu_count()} | clientes: {args.clientes} | ruta: {args.ruta}")
+    print(f"{'procesos':>9} {'req/s':>10} {'escalado':>9}")
+    base = None
+    for procesos in args.procesos:
+        rps = medir(procesos, args, cuerpos)
+        base = base or rps
+        print(f"{procesos:>9} {rps:>10.1f} {rps / base:>8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,399 @@
+"""
+Suite de rendimiento sobre catálogos sintéticos de 1k a 1M películas.
+
+Para cada tamaño se genera (una sola vez, con semilla fija) un catálogo con
+benchmarks.sintetico y se mide en un proceso aparte, para que el pico de
+memoria (RSS) de un tamaño no contamine al siguiente:
+
+- etapas: carga del CSV, índice TF-IDF con la tabla de vecinos, índice por
+  campos, entrenamiento del Random Forest, guardado de artefactos, arranque
+  con artefactos mapeados en memoria y construcción del corrector de texto;
+- consultas (sin caché): películas similares, similares con pesos por campo,
+  recomendaciones para un perfil de 20 películas, similares con filtros de
+  género y década, similares ordenadas por similitud, popularidad y rating, búsqueda por texto libre, búsqueda inteligente por actor y director,
+  corrección de títulos con errores de tipeo y predicción de calificación,
+  con percentiles p50/p90/p99.
+
+Con --guardar-baseline los resultados quedan en benchmarks/baseline.json; en
+las siguientes ejecuciones se comparan contra él y se marcan las métricas que
+empeoraron más que --tolerancia (con --fallar-si-regresion el código de salida
+es 1, para usarlo en integración continua).
+
+La tabla de vecinos compara cada película con todas las demás, así que su
+costo crece con N²: con 1M películas tarda horas. Por encima de
+--limite-indice se omiten el índice y las consultas que dependen de él.
+
+Uso (desde app/):
+    python -m benchmarks.bench_suite --tamanos 1000 10000
+    python -m benchmarks.bench_suite --tamanos 1000 10000 100000 --guardar-baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DIRECTORIO_DATOS = os.path.join(APP_DIR, "benchmarks", "datos")
+RUTA_BASELINE = os.path.join(APP_DIR, "benchmarks", "baseline.json")
+ETAPAS = ('carga', 'indice', 'campos', 'prediccion', 'guardado', 'arranque', 'corrector')
+CONSULTAS = ('similares', 'ponderada', 'perfil', 'filtrada', 'hibrida', 'busqueda', 'inteligente',
+             'correccion', 'prediccion')
+# Consultas que necesitan la matriz TF-IDF y la tabla de vecinos
+CONSULTAS_CON_INDICE = ('similares', 'ponderada', 'perfil', 'filtrada', 'hibrida', 'busqueda', 'inteligente')
+# Filtros que se alternan en las consultas filtradas (utils.filtros)
+FILTROS_FILTRADA = (
+    ['genero:Drama'],
+    ['decada:1990', 'rating_min:6'],
+    ['genero:Comedy', '!genero:Romance', 'decada:2000'],
+)
+# Configuraciones de fusión que se alternan en las consultas híbridas (utils.fusion)
+FUSION_HIBRIDA = (
+    {'popularidad': 0.2},
+    {'popularidad': 0.1, 'rating': 0.1},
+    {'popularidad': 0.3, 'rating': 0.3, 'modo': 'log'},
+)
+# Pesos por campo que se alternan en las consultas ponderadas
+PESOS_PONDERADA = (
+    {'reparto': 3.0, 'director': 2.0},
+    {'sinopsis': 2.0, 'generos': 0.5},
+    {'generos': 0.0, 'companias': 0.0},
+)
+
+
+def pico_rss_mb():
+    """Pico de memoria residente del proceso en MB (None si no se puede medir)"""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo da en KB y macOS en bytes
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def ruta_catalogo(n, semilla):
+    return os.path.join(DIRECTORIO_DATOS, f"sintetico_{n}_s{semilla}.csv")
+
+
+def con_errores(texto, rng):
+    """Introduce uno o dos errores de tipeo (cambio, omisión o transposición)"""
+    letras = list(texto.strip().lower())
+    for _ in range(rng.integers(1, 3)):
+        if len(letras) < 4:
+            break
+        i = int(rng.integers(1, len(letras) - 1))
+        operacion = rng.integers(3)
+        if operacion == 0:
+            letras[i] = chr(ord('a') + int(rng.integers(26)))
+        elif operacion == 1:
+            del letras[i]
+        else:
+            letras[i], letras[i - 1] = letras[i - 1], letras[i]
+    return ''.join(letras)
+
+
+def preparar_consultas(catalogo, cantidad, semilla):
+    """Argumentos de cada tipo de consulta, sacados del propio catálogo"""
+    rng = np.random.default_rng(semilla)
+    df = catalogo.df
+    filas = rng.integers(0, len(df), cantidad)
+    titulos = [str(df['title'].iat[i]) for i in filas]
+
+    sinopsis = [str(df['overview'].iat[i]).split() for i in rng.integers(0, len(df), cantidad)]
+    textos = [' '.join(p[:int(rng.integers(2, 6))]) or 'love story' for p in sinopsis]
+
+    inteligentes = []
+    for i in filas:
+        reparto = catalogo.reparto_de(i)
+        actor = reparto[0] if len(reparto) else ''
+        inteligentes.append((titulos[len(inteligentes)], actor, catalogo.director_de(i)))
+
+    predicciones = [
+        (float(rng.lognormal(16, 1.3)), float(rng.lognormal(1.5, 1.2)), int(rng.integers(70, 180)),
+         int(rng.integers(1950, 2026)), int(rng.integers(1, 5)), int(rng.integers(1, 6)))
+        for _ in range(cantidad)
+    ]
+    perfiles = [[str(df['title'].iat[j]) for j in rng.integers(0, len(df), 20)] for _ in range(cantidad)]
+    return {
+        'similares': titulos,
+        'perfil': perfiles,
+        'hibrida': [(t, 10, None, FUSION_HIBRIDA[i % len(FUSION_HIBRIDA)]) for i, t in enumerate(titulos)],
+        'filtrada': [(t, 10, FILTROS_FILTRADA[i % len(FILTROS_FILTRADA)]) for i, t in enumerate(titulos)],
+        'ponderada': [(t, PESOS_PONDERADA[i % len(PESOS_PONDERADA)]) for i, t in enumerate(titulos)],
+        'busqueda': textos,
+        'inteligente': inteligentes,
+        'correccion': [con_errores(t, rng) for t in titulos],
+        'prediccion': predicciones
+    }
+
+
+def percentiles(tiempos_ms):
+    tiempos = np.asarray(tiempos_ms)
+    return {
+        'p50': float(np.percentile(tiempos, 50)),
+        'p90': float(np.percentile(tiempos, 90)),
+        'p99': float(np.percentile(tiempos, 99)),
+        'media': float(tiempos.mean()),
+        'n': int(len(tiempos))
+    }
+
+
+def medir_consultas(funcion, argumentos):
+    tiempos = []
+    errores = 0
+    for args in argumentos:
+        inicio = time.perf_counter()
+        _, error = funcion(*args) if isinstance(args, tuple) else funcion(args)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        errores += error is not None
+    resultado = percentiles(tiempos)
+    resultado['errores'] = errores
+    return resultado
+
+
+def ejecutar_tamano(n, semilla, consultas, limite_indice):
+    """Mide un tamaño dentro del proceso actual (lo llama el proceso hijo)"""
+    from utils import DataLoader, TextCorrector
+    from models import MovieRecommender, MoviePredictor, QueryCache
+
+    resultados = {'n': n, 'etapas': {}, 'rss_mb': {}, 'consultas': {}, 'omitidas': []}
+    con_indice = n <= limite_indice
+
+    def etapa(nombre, funcion):
+        inicio = time.perf_counter()
+        ok = funcion()
+        resultados['etapas'][nombre] = (time.perf_counter() - inicio) * 1000
+        resultados['rss_mb'][nombre] = pico_rss_mb()
+        if ok is False:
+            raise RuntimeError(f"Falló la etapa '{nombre}'")
+
+    models_dir = tempfile.mkdtemp(prefix="bench_suite_")
+    try:
+        data_loader = DataLoader(ruta_catalogo(n, semilla))
+        etapa('carga', data_loader.load_data)
+        if con_indice:
+            etapa('indice', data_loader.create_similarity_matrix)
+            etapa('campos', data_loader.crear_indice_campos)
+        etapa('prediccion', data_loader.train_prediction_model)
+        if con_indice:
+            etapa('guardado', lambda: data_loader.save_models(models_dir))
+            # Arranque en frío de otro DataLoader sobre los artefactos guardados
+            data_loader = DataLoader(ruta_catalogo(n, semilla))
+            etapa('arranque', lambda: data_loader.initialize_system(mmap=True, models_dir=models_dir))
+        else:
+            resultados['omitidas'] += ['indice', 'campos', 'guardado', 'arranque']
+
+        corrector = None
+
+        def construir_corrector():
+            nonlocal corrector
+            corrector = TextCorrector(data_loader.catalogo)
+
+        etapa('corrector', construir_corrector)
+
+        recommender = MovieRecommender(data_loader, corrector, cache=QueryCache(max_entradas=0))
+        predictor = MoviePredictor(data_loader)
+        argumentos = preparar_consultas(data_loader.catalogo, consultas, semilla)
+        funciones = {
+            'similares': recommender.get_movie_recommendations,
+            'ponderada': recommender.recomendar_ponderado,
+            'perfil': recommender.recommend_for_profile,
+            'filtrada': recommender.get_movie_recommendations,
+            'hibrida': recommender.get_movie_recommendations,
+            'busqueda': recommender.buscar_peliculas_similares,
+            'inteligente': lambda titulo, actor, director: recommender.buscar_inteligente(
+                titulo, actor, director
+            ),
+            'correccion': lambda titulo: (corrector.corregir_titulo(titulo), None),
+            'prediccion': predictor.predict_rating
+        }
+        for tipo in CONSULTAS:
+            if tipo in CONSULTAS_CON_INDICE and not con_indice:
+                resultados['omitidas'].append(f"consulta:{tipo}")
+                continue
+            resultados['consultas'][tipo] = medir_consultas(funciones[tipo], argumentos[tipo])
+    finally:
+        shutil.rmtree(models_dir, ignore_errors=True)
+
+    resultados['rss_mb']['pico'] = pico_rss_mb()
+    return resultados
+
+
+def medir_en_subproceso(n, args):
+    """Genera el catálogo si falta y mide el tamaño en un proceso nuevo"""
+    ruta = ruta_catalogo(n, args.semilla)
+    if not os.path.exists(ruta):
+        from benchmarks.sintetico import escribir_catalogo
+
+        inicio = time.perf_counter()
+        escribir_catalogo(n, ruta, args.semilla)
+        print(f"Catálogo de {n} películas generado en {time.perf_counter() - inicio:.1f} s")
+
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as f:
+        salida = f.name
+    try:
+        comando = [
+            sys.executable, "-m", "benchmarks.bench_suite", "--interno", str(n),
+            "--salida", salida, "--semilla", str(args.semilla),
+            "--consultas", str(args.consultas), "--limite-indice", str(args.limite_indice)
+        ]
+        proceso = subprocess.run(comando, cwd=APP_DIR, stdout=subprocess.PIPE,
+                                 stderr=subprocess.STDOUT, text=True)
+        if proceso.returncode != 0:
+            print(proceso.stdout[-4000:])
+            return None
+        with open(salida, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        os.remove(salida)
+
+
+def imprimir_resultados(r):
+    print(f"\n=== {r['n']} películas ===")
+    print(f"{'etapa':<12} {'ms':>10} {'RSS pico MB':>12}")
+    for nombre in ETAPAS:
+        if nombre in r['etapas']:
+            rss = r['rss_mb'].get(nombre)
+            print(f"{nombre:<12} {r['etapas'][nombre]:>10.1f} "
+                  f"{rss if rss is None else format(rss, '.0f'):>12}")
+    print(f"{'consulta':<12} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'media ms':>9} {'errores':>8}")
+    for tipo, m in r['consultas'].items():
+        print(f"{tipo:<12} {m['p50']:>9.3f} {m['p90']:>9.3f} {m['p99']:>9.3f} "
+              f"{m['media']:>9.3f} {m['errores']:>8}")
+    if r['omitidas']:
+        print(f"Omitidas (N > --limite-indice): {', '.join(r['omitidas'])}")
+
+
+def metricas(r):
+    """Métricas comparables de un tamaño: nombre -> valor (menor es mejor)"""
+    valores = {f"etapa.{k}": v for k, v in r['etapas'].items()}
+    for tipo, m in r['consultas'].items():
+        valores[f"{tipo}.p50"] = m['p50']
+        valores[f"{tipo}.p99"] = m['p99']
+    if r['rss_mb'].get('pico') is not None:
+        valores['rss_pico_mb'] = r['rss_mb']['pico']
+    return valores
+
+
+def comparar(resultados, baseline, tolerancia, minimo_ms):
+    """Lista de (tamaño, métrica, antes, ahora, cambio) que empeoraron más que la tolerancia"""
+    regresiones = []
+    for r in resultados:
+        anterior = baseline.get('tamanos', {}).get(str(r['n']))
+        if anterior is None:
+            continue
+        antes = metricas(anterior)
+        print(f"\n--- {r['n']} películas frente al baseline ---")
+        print(f"{'métrica':<22} {'baseline':>10} {'actual':>10} {'cambio':>8}")
+        for nombre, ahora in metricas(r).items():
+            if nombre not in antes or not antes[nombre]:
+                continue
+            cambio = ahora / antes[nombre] - 1
+            # Diferencias absolutas por debajo de minimo_ms son ruido del reloj
+            ruido = not nombre.startswith('rss') and abs(ahora - antes[nombre]) < minimo_ms
+            marca = ''
+            if cambio > tolerancia and not ruido:
+                marca = '  REGRESIÓN'
+                regresiones.append((r['n'], nombre, antes[nombre], ahora, cambio))
+            print(f"{nombre:<22} {antes[nombre]:>10.2f} {ahora:>10.2f} {cambio:>+7.0%}{marca}")
+    return regresiones
+
+
+def entorno():
+    import pandas
+    import sklearn
+
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pandas.__version__,
+        'sklearn': sklearn.__version__,
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de rendimiento sobre catálogos sintéticos")
+    parser.add_argument('--tamanos', type=int, nargs='+', default=[1000, 10000],
+                        help="Tamaños del catálogo (p. ej. 1000 10000 100000 1000000)")
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--consultas', type=int, default=200, help="Consultas por tipo")
+    parser.add_argument('--limite-indice', type=int, default=200_000,
+                        help="Tamaño máximo con índice TF-IDF y tabla de vecinos (costo N²)")
+    parser.add_argument('--baseline', default=RUTA_BASELINE)
+    parser.add_argument('--guardar-baseline', action='store_true')
+    parser.add_argument('--tolerancia', type=float, default=0.10,
+                        help="Empeoramiento relativo permitido frente al baseline")
+    parser.add_argument('--minimo-ms', type=float, default=0.05,
+                        help="Diferencia absoluta mínima para contar como regresión")
+    parser.add_argument('--fallar-si-regresion', action='store_true')
+    parser.add_argument('--json', help="Escribir también los resultados en este archivo")
+    parser.add_argument('--interno', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--salida', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    os.chdir(APP_DIR)
+    if args.interno is not None:
+        resultado = ejecutar_tamano(args.interno, args.semilla, args.consultas, args.limite_indice)
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f)
+        return 0
+
+    resultados = []
+    for n in args.tamanos:
+        print(f"\nMidiendo {n} películas...")
+        r = medir_en_subproceso(n, args)
+        if r is None:
+            print(f"Falló la medición con {n} películas")
+            return 1
+        imprimir_resultados(r)
+        resultados.append(r)
+
+    informe = {
+        'entorno': entorno(),
+        'semilla': args.semilla,
+        'consultas': args.consultas,
+        'tamanos': {str(r['n']): r for r in resultados}
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=2)
+
+    regresiones = []
+    if os.path.exists(args.baseline) and not args.guardar_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get('entorno') != informe['entorno']:
+            print("\nAviso: el baseline se midió en otro entorno; la comparación es orientativa")
+        regresiones = comparar(resultados, baseline, args.tolerancia, args.minimo_ms)
+        print(f"\n{len(regresiones)} métricas empeoraron más de {args.tolerancia:.0%}")
+
+    if args.guardar_baseline:
+        if os.path.exists(args.baseline):
+            # Conservar los tamaños que no se midieron en esta ejecución
+            with open(args.baseline, encoding="utf-8") as f:
+                anteriores = json.load(f).get('tamanos', {})
+            informe['tamanos'] = {**anteriores, **informe['tamanos']}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=2)
+        print(f"\nBaseline guardado en {args.baseline}")
+
+    return 1 if regresiones and args.fallar_si_regresion else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Ajuste del TF-IDF en serie frente al conteo repartido entre procesos.
+
+Para cada cantidad de procesos verifica que utils.tfidf.ajustar_tfidf dé
+exactamente el mismo resultado que TfidfVectorizer.fit_transform en serie
+(vocabulario, idf y la matriz CSR: indptr, índices y datos, bit a bit) y
+mide el tiempo. Termina con código 1 si algún resultado difiere, así que
+sirve también como prueba de equivalencia.
+
+Uso (desde app/):
+    python -m benchmarks.bench_tfidf --dataset benchmarks/datos/sintetico_100000_s42.csv
+    python -m benchmarks.bench_tfidf --procesos 1 2 4 8 --max-features 0
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from utils import DataLoader
+from utils import tfidf
+
+
+def diferencias(serie, paralelo):
+    """Lista de las partes del ajuste que no coinciden (vacía si son idénticos)"""
+    (v1, m1), (v2, m2) = serie, paralelo
+    distintas = []
+    if v1.vocabulary_ != v2.vocabulary_:
+        distintas.append('vocabulary_')
+    if not np.array_equal(v1.idf_, v2.idf_):
+        distintas.append('idf_')
+    if m1.shape != m2.shape:
+        return distintas + ['forma']
+    for parte in ('indptr', 'indices', 'data'):
+        a, b = getattr(m1, parte), getattr(m2, parte)
+        if a.shape != b.shape or not np.array_equal(a.view(np.uint8), b.view(np.uint8)):
+            distintas.append(parte)
+    return distintas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TF-IDF en serie frente a paralelo")
+    parser.add_argument('--dataset', default='dataset_movies_api.csv')
+    parser.add_argument('--procesos', type=int, nargs='+', default=[2, 4, os.cpu_count() or 1])
+    parser.add_argument('--max-features', type=int, default=None,
+                        help="Reemplaza el max_features del DataLoader (0: sin límite)")
+    args = parser.parse_args()
+
+    data_loader = DataLoader(args.dataset)
+    if not data_loader.load_data():
+        return 1
+    parametros = dict(data_loader.parametros_tfidf)
+    if args.max_features is not None:
+        parametros['max_features'] = args.max_features or None
+    documentos = list(data_loader.catalogo.perfiles_contenido())
+    # Medir siempre el camino paralelo, aunque el corpus sea chico; importar
+    # scikit-learn antes para no cargarle la importación a la referencia
+    tfidf.MIN_DOCUMENTOS_PARALELO = 0
+    from sklearn.feature_extraction.text import TfidfVectorizer  # noqa: F401
+
+    inicio = time.perf_counter()
+    serie = tfidf.ajustar_tfidf(documentos, parametros, procesos=1)
+    t_serie = time.perf_counter() - inicio
+    print(f"{len(documentos)} documentos, {os.cpu_count()} CPU, matriz {serie[1].shape} "
+          f"con {serie[1].nnz} valores")
+    print(f"{'procesos':>8} {'segundos':>9} {'aceleración':>12}  resultado")
+    print(f"{1:>8} {t_serie:>9.2f} {1.0:>11.2f}x  referencia")
+
+    fallas = 0
+    for procesos in sorted(set(args.procesos) - {1}):
+        inicio = time.perf_counter()
+        paralelo = tfidf.ajustar_tfidf(documentos, parametros, procesos=procesos)
+        segundos = time.perf_counter() - inicio
+        distintas = diferencias(serie, paralelo)
+        fallas += bool(distintas)
+        estado = "idéntico" if not distintas else "DIFIERE: " + ", ".join(distintas)
+        print(f"{procesos:>8} {segundos:>9.2f} {t_serie / segundos:>11.2f}x  {estado}")
+    return 1 if fallas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""
+Repite un registro de consultas contra esta versión del motor.
+
+El registro es el JSONL que escriben el servidor (--registro-consultas) o la
+aplicación (variable MOVIE_REGISTRO_CONSULTAS); ver models.query_log. Las
+consultas se reparten entre N hilos o N procesos y se informa:
+
+- throughput total y percentiles de latencia por tipo de consulta, junto con
+  la latencia que quedó registrada originalmente;
+- tasa de diferencias: consultas cuyos ids de resultado (en orden) o
+  predicción no coinciden con los registrados, o que antes fallaban y ahora
+  no (o al revés).
+
+Por defecto las consultas se envían todas de una (carga cerrada). Con
+--ritmo X se envían respetando los intervalos originales acelerados X veces,
+y se mide también la latencia de respuesta desde el instante programado.
+
+Con --modo procesos en Linux/macOS el motor se carga una vez en el padre
+(con --mmap, mapeado en memoria) y los procesos hijos lo heredan por fork.
+
+Uso (desde app/):
+    python -m benchmarks.replay consultas.jsonl --concurrencia 8
+    python -m benchmarks.replay consultas.jsonl --modo procesos --concurrencia 4 --mmap
+    python -m benchmarks.replay consultas.jsonl --ritmo 2 --max-diferencias 0.01
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from models.query_log import TIPOS, leer_consultas, ejecutar_consulta, ids_resultado
+
+# Motor del proceso: (recommender, predictor); en los procesos hijos se hereda
+# por fork o lo crea el inicializador del pool
+_motor = None
+
+
+def cargar_motor(dataset, models_dir, mmap, con_cache):
+    global _motor
+    from utils import DataLoader, TextCorrector
+    from models import MovieRecommender, MoviePredictor, QueryCache
+
+    data_loader = DataLoader(dataset)
+    if not data_loader.initialize_system(mmap=mmap, models_dir=models_dir):
+        raise RuntimeError("Error al inicializar el sistema de datos")
+    cache = None if con_cache else QueryCache(max_entradas=0)
+    recommender = MovieRecommender(data_loader, TextCorrector(data_loader.catalogo), cache)
+    _motor = (recommender, MoviePredictor(data_loader))
+
+
+def atender(consulta):
+    """Ejecuta una consulta con el motor del proceso: (ms, salida, error)"""
+    recommender, predictor = _motor
+    inicio = time.perf_counter()
+    resultado, error = ejecutar_consulta(consulta, recommender, predictor)
+    ms = (time.perf_counter() - inicio) * 1000
+    if consulta['tipo'] == 'predict':
+        salida = None if resultado is None else round(float(resultado), 6)
+    else:
+        salida = ids_resultado(recommender.df, resultado)
+    return ms, salida, error
+
+
+def difiere(consulta, salida, error, tolerancia):
+    """True si el resultado no coincide con el registrado"""
+    if (consulta.get('error') is None) != (error is None):
+        return True
+    if consulta['tipo'] == 'predict':
+        anterior = consulta.get('prediccion')
+        if anterior is None or salida is None:
+            return anterior != salida
+        return abs(anterior - salida) > tolerancia
+    return 'ids' in consulta and consulta['ids'] != salida
+
+
+def crear_pool(args):
+    """Pool de hilos o de procesos con el motor ya cargado en cada trabajador"""
+    motor = (args.dataset, args.models_dir, args.mmap, args.con_cache)
+    if args.modo == 'hilos':
+        cargar_motor(*motor)
+        return ThreadPoolExecutor(max_workers=args.concurrencia)
+
+    if 'fork' in multiprocessing.get_all_start_methods():
+        # Cargar una vez y compartir los artefactos con los hijos
+        cargar_motor(*motor)
+        return ProcessPoolExecutor(args.concurrencia, mp_context=multiprocessing.get_context('fork'))
+    return ProcessPoolExecutor(args.concurrencia, initializer=cargar_motor, initargs=motor)
+
+
+def repetir(pool, consultas, ritmo):
+    """Envía las consultas y devuelve (respuestas, segundos).
+
+    Cada respuesta es (ms de servicio, salida, error, ms desde el envío
+    programado hasta la respuesta).
+    """
+    respuestas = [None] * len(consultas)
+    programados = [0.0] * len(consultas)
+    terminadas = threading.Semaphore(0)
+    t_base = consultas[0].get('t', 0.0) if consultas else 0.0
+
+    def al_terminar(i, futuro):
+        try:
+            ms, salida, error = futuro.result()
+        except Exception as e:
+            # Una consulta que lanza (o un pool roto) cuenta como error, sin
+            # dejar esperando al bucle de abajo
+            ms, salida, error = 0.0, None, str(e)
+        try:
+            respuestas[i] = (ms, salida, error, (time.perf_counter() - programados[i]) * 1000)
+        finally:
+            terminadas.release()
+
+    inicio = time.perf_counter()
+    for i, consulta in enumerate(consultas):
+        programado = inicio
+        if ritmo:
+            programado += max(0.0, consulta.get('t', t_base) - t_base) / ritmo
+            espera = programado - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+        programados[i] = programado if ritmo else time.perf_counter()
+        futuro = pool.submit(atender, consulta)
+        futuro.add_done_callback(lambda f, i=i: al_terminar(i, f))
+
+    for _ in consultas:
+        terminadas.acquire()
+    return respuestas, time.perf_counter() - inicio
+
+
+def resumen(consultas, respuestas, tolerancia):
+    por_tipo = defaultdict(lambda: {'ms': [], 'respuesta_ms': [], 'registrado_ms': [],
+                                    'diferencias': 0, 'errores': 0})
+    for consulta, (ms, salida, error, respuesta_ms) in zip(consultas, respuestas):
+        for clave in (consulta['tipo'], 'total'):
+            datos = por_tipo[clave]
+            datos['ms'].append(ms)
+            datos['respuesta_ms'].append(respuesta_ms)
+            if consulta.get('ms') is not None:
+                datos['registrado_ms'].append(consulta['ms'])
+            datos['diferencias'] += difiere(consulta, salida, error, tolerancia)
+            datos['errores'] += error is not None
+
+    def pct(valores, q):
+        return float(np.percentile(valores, q)) if valores else None
+
+    informe = {}
+    for tipo in list(TIPOS) + ['total']:
+        if tipo not in por_tipo:
+            continue
+        datos = por_tipo[tipo]
+        n = len(datos['ms'])
+        informe[tipo] = {
+            'n': n,
+            'p50_ms': pct(datos['ms'], 50),
+            'p90_ms': pct(datos['ms'], 90),
+            'p99_ms': pct(datos['ms'], 99),
+            'respuesta_p50_ms': pct(datos['respuesta_ms'], 50),
+            'respuesta_p99_ms': pct(datos['respuesta_ms'], 99),
+            'registrado_p50_ms': pct(datos['registrado_ms'], 50),
+            'tasa_diferencias': datos['diferencias'] / n,
+            'errores': datos['errores']
+        }
+    return informe
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Repite un registro de consultas contra el motor")
+    parser.add_argument('registro', help="Archivo JSONL de consultas registradas")
+    parser.add_argument('--dataset', help="Dataset (por defecto dataset_movies_api.csv de app/)")
+    parser.add_argument('--models-dir', help="Artefactos (por defecto models/saved de app/)")
+    parser.add_argument('--mmap', action='store_true', help="Mapear los artefactos en memoria")
+    parser.add_argument('--con-cache', action='store_true',
+                        help="Usar la caché de consultas (por defecto deshabilitada)")
+    parser.add_argument('--modo', choices=('hilos', 'procesos'), default='hilos')
+    parser.add_argument('--concurrencia', type=int, default=4)
+    parser.add_argument('--ritmo', type=float, default=0,
+                        help="Respetar los intervalos registrados acelerados este factor (0: sin pausas)")
+    parser.add_argument('--repeticiones', type=int, default=1)
+    parser.add_argument('--tolerancia-prediccion', type=float, default=1e-6)
+    parser.add_argument('--max-diferencias', type=float, default=None,
+                        help="Terminar con código 1 si la tasa de diferencias la supera")
+    parser.add_argument('--json', help="Escribir también el informe en este archivo")
+    args = parser.parse_args()
+
+    # Las rutas indicadas son relativas al directorio actual, así que se
+    # resuelven antes del chdir; los valores por defecto, relativos a app/
+    if args.json:
+        args.json = os.path.abspath(args.json)
+    args.dataset = os.path.abspath(args.dataset) if args.dataset else 'dataset_movies_api.csv'
+    args.models_dir = os.path.abspath(args.models_dir) if args.models_dir else 'models/saved'
+    consultas, error = leer_consultas(os.path.abspath(args.registro))
+    if error:
+        print(error)
+        return 1
+    if not consultas:
+        print("El registro no tiene consultas")
+        return 1
+    os.chdir(APP_DIR)
+
+    try:
+        pool = crear_pool(args)
+    except RuntimeError as e:
+        print(str(e))
+        return 1
+    try:
+        respuestas, segundos = [], 0.0
+        for _ in range(args.repeticiones):
+            parciales, duracion = repetir(pool, consultas, args.ritmo)
+            respuestas += parciales
+            segundos += duracion
+    finally:
+        pool.shutdown()
+
+    informe = resumen(consultas * args.repeticiones, respuestas, args.tolerancia_prediccion)
+    total = informe['total']
+    print(f"\n{total['n']} consultas en {segundos:.2f} s con {args.concurrencia} {args.modo}: "
+          f"{total['n'] / segundos:.1f} consultas/s")
+    print(f"{'tipo':<12} {'n':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} "
+          f"{'resp p99':>9} {'reg p50':>9} {'difs':>7} {'errores':>8}")
+    for tipo, m in informe.items():
+        registrado = f"{m['registrado_p50_ms']:.2f}" if m['registrado_p50_ms'] is not None else '-'
+        print(f"{tipo:<12} {m['n']:>6} {m['p50_ms']:>9.2f} {m['p90_ms']:>9.2f} {m['p99_ms']:>9.2f} "
+              f"{m['respuesta_p99_ms']:>9.2f} {registrado:>9} {m['tasa_diferencias']:>7.1%} "
+              f"{m['errores']:>8}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({'segundos': segundos, 'consultas_por_segundo': total['n'] / segundos,
+                       'modo': args.modo, 'concurrencia': args.concurrencia, 'tipos': informe},
+                      f, indent=2)
+
+    if args.max_diferencias is not None and total['tasa_diferencias'] > args.max_diferencias:
+        print(f"La tasa de diferencias ({total['tasa_diferencias']:.1%}) supera "
+              f"{args.max_diferencias:.1%}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
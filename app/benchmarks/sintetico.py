@@ -0,0 +1,244 @@
+"""
+Generador de catálogos sintéticos con la forma del dataset de TMDb.
+
+Produce un CSV con las mismas columnas y formato que utils.tmdb_ingest (listas
+como texto) para medir el motor con 1k a 1M películas. Con la misma semilla y
+tamaño el resultado es idéntico. Imita lo que pesa en el rendimiento:
+
+- reparto, productoras y directores con frecuencias Zipf (unos pocos
+  aparecen en muchísimas películas, la mayoría en una o dos);
+- sinopsis de longitud log-normal (mediana ~50 palabras, algunas vacías) con
+  palabras de frecuencia Zipf;
+- títulos desordenados: secuelas, subtítulos con dos puntos, remakes con el
+  mismo título, acentos, apóstrofes, mayúsculas y espacios de más;
+- presupuestos y duraciones en cero, fechas faltantes, votos correlacionados
+  con la popularidad.
+
+Uso (desde app/):
+    python -m benchmarks.sintetico 100000 benchmarks/datos/sintetico_100000.csv
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+COLUMNAS = [
+    'id', 'title', 'release_date', 'genres', 'overview', 'popularity', 'runtime',
+    'production_companies', 'cast', 'director', 'vote_average', 'vote_count', 'budget'
+]
+GENEROS = [
+    'Drama', 'Comedy', 'Thriller', 'Action', 'Horror', 'Romance', 'Adventure', 'Crime',
+    'Science Fiction', 'Family', 'Fantasy', 'Mystery', 'Animation', 'History', 'War',
+    'Music', 'Documentary', 'Western', 'TV Movie'
+]
+PALABRAS = (
+    "love war space hero city dark night family secret world journey death life king alien "
+    "ship robot police crime heist magic dragon school friend girl boy island ocean storm fire "
+    "young woman man mother father daughter son brother sister town small new york london "
+    "find must discover mysterious past future time help save escape kill murder detective "
+    "team mission fight battle power evil ancient lost home return dream wedding party band "
+    "music road trip summer winter christmas ghost house haunted curse revenge truth lies "
+    "prison soldier army planet earth survive zombie virus doctor teacher student college "
+    "game race car money bank thief gang drug agent spy government secretly falls becomes"
+).split()
+NOMBRES = (
+    "James Mary John Patricia Robert Jennifer Michael Linda William Elizabeth David Barbara "
+    "Richard Susan Joseph Jessica Thomas Sarah Charles Karen Daniel Nancy Matthew Lisa Anthony "
+    "Betty Mark Sandra Paul Ashley Steven Emily Andrew Michelle Kenneth Amanda Kevin Melissa "
+    "Brian Stephanie George Rebecca Timothy Laura Ronald Helen Jason Sharon Jeffrey Cynthia "
+    "Hiroshi Yuki Chen Wei Pedro María José Zoë Renée Søren Björn François Chloé"
+).split()
+APELLIDOS = (
+    "Smith Johnson Williams Brown Jones Garcia Miller Davis Rodriguez Martinez Hernandez Lopez "
+    "Gonzalez Wilson Anderson Thomas Taylor Moore Jackson Martin Lee Perez Thompson White Harris "
+    "Sanchez Clark Ramirez Lewis Robinson Walker Young Allen King Wright Scott Torres Nguyen Hill "
+    "Flores Green Adams Nelson Baker Hall Rivera Campbell Mitchell Carter Roberts O'Brien "
+    "O'Connor D'Angelo Müller Núñez Østergaard Tanaka Watanabe Kim Park Dubois Lefèvre"
+).split()
+PREFIJOS_COMPANIA = ['', 'New ', 'Golden ', 'Red ', 'Blue ', 'Silver ', 'Northern ', 'Global ']
+SUFIJOS_COMPANIA = ['Pictures', 'Films', 'Studios', 'Entertainment', 'Productions', 'Media']
+SUBTITULOS = ['Part II', 'The Beginning', 'Reloaded', 'Revenge', 'Origins', 'The Return', 'Rising']
+NUMERALES = ['2', '3', 'II', 'III', '4', 'Part 2']
+# Filas por bloque al escribir catálogos grandes
+BLOQUE = 100_000
+
+
+def _zipf(rng, total, cantidad, s=1.1):
+    """Índices en [0, total) con probabilidad proporcional a 1 / (rango + 1)^s"""
+    pesos = 1.0 / np.arange(1, total + 1, dtype=np.float64) ** s
+    acumulado = np.cumsum(pesos)
+    acumulado /= acumulado[-1]
+    return np.minimum(np.searchsorted(acumulado, rng.random(cantidad)), total - 1)
+
+
+def _vocabulario(n):
+    """Palabras reales más pseudo-palabras para que el vocabulario crezca con el catálogo"""
+    silabas = ['ka', 'lo', 'mi', 'ren', 'tor', 'vel', 'an', 'dus', 'ri', 'sol', 'ta', 'ne']
+    extra = max(2000, int(n ** 0.6))
+    rng = np.random.default_rng(0)
+    pseudo = {''.join(rng.choice(silabas, rng.integers(2, 4))) for _ in range(extra)}
+    return PALABRAS + sorted(pseudo - set(PALABRAS))
+
+
+def _personas(cantidad, desplazamiento=0):
+    """Nombres únicos 'Nombre Apellido' (con número si se agotan las combinaciones)"""
+    combinaciones = len(NOMBRES) * len(APELLIDOS)
+    personas = []
+    for i in range(desplazamiento, desplazamiento + cantidad):
+        nombre = f"{NOMBRES[i % len(NOMBRES)]} {APELLIDOS[(i // len(NOMBRES)) % len(APELLIDOS)]}"
+        personas.append(nombre if i < combinaciones else f"{nombre} {i // combinaciones + 1}")
+    return personas
+
+
+def _lista(valores):
+    """Lista en el formato del CSV de TMDb (repr de una lista de Python)"""
+    return str(list(valores))
+
+
+class GeneradorCatalogo:
+    """Catálogo sintético de n películas; se genera por bloques"""
+
+    def __init__(self, n, semilla=42):
+        self.n = n
+        self.semilla = semilla
+        self.vocabulario = np.array(_vocabulario(n), dtype=object)
+        self.actores = _personas(max(2000, n // 2))
+        self.directores = _personas(max(300, n // 10), desplazamiento=len(self.actores))
+        self.companias = [
+            f"{PREFIJOS_COMPANIA[i % len(PREFIJOS_COMPANIA)]}"
+            f"{APELLIDOS[(i // len(PREFIJOS_COMPANIA)) % len(APELLIDOS)]} "
+            f"{SUFIJOS_COMPANIA[i % len(SUFIJOS_COMPANIA)]}"
+            + (f" {i // (len(PREFIJOS_COMPANIA) * len(APELLIDOS)) + 1}"
+               if i >= len(PREFIJOS_COMPANIA) * len(APELLIDOS) else '')
+            for i in range(max(200, n // 25))
+        ]
+
+    def bloques(self, tamano=BLOQUE):
+        """DataFrames consecutivos de hasta 'tamano' filas"""
+        semillas = np.random.SeedSequence(self.semilla).spawn((self.n + tamano - 1) // tamano)
+        titulos_previos = []
+        for numero, inicio in enumerate(range(0, self.n, tamano)):
+            rng = np.random.default_rng(semillas[numero])
+            yield self._bloque(rng, inicio, min(tamano, self.n - inicio), titulos_previos)
+
+    def dataframe(self):
+        return pd.concat(list(self.bloques()), ignore_index=True)
+
+    def _titulo(self, rng, titulos_previos):
+        sorteo = rng.random()
+        if titulos_previos and sorteo < 0.04:
+            # Remake: mismo título que una película anterior
+            return titulos_previos[rng.integers(len(titulos_previos))]
+        if titulos_previos and sorteo < 0.10:
+            base = titulos_previos[rng.integers(len(titulos_previos))]
+            if rng.random() < 0.5:
+                return f"{base} {NUMERALES[rng.integers(len(NUMERALES))]}"
+            return f"{base}: {SUBTITULOS[rng.integers(len(SUBTITULOS))]}"
+
+        palabras = self.vocabulario[_zipf(rng, 300, rng.integers(1, 5), s=0.9)]
+        titulo = ' '.join(str(p).capitalize() for p in palabras)
+        adorno = rng.random()
+        if adorno < 0.15:
+            titulo = f"The {titulo}"
+        elif adorno < 0.20:
+            titulo = f"{APELLIDOS[rng.integers(len(APELLIDOS))]}'s {titulo}"
+        elif adorno < 0.24:
+            titulo = f"{titulo}!"
+        elif adorno < 0.27:
+            titulo = titulo.upper()
+        elif adorno < 0.30:
+            titulo = f"{titulo} & {str(self.vocabulario[rng.integers(100)]).capitalize()}"
+        elif adorno < 0.32:
+            titulo = f" {titulo}  "
+        elif adorno < 0.35:
+            titulo = titulo.replace('e', 'é', 1)
+        if len(titulos_previos) < 50_000:
+            titulos_previos.append(titulo.strip())
+        return titulo
+
+    def _bloque(self, rng, inicio, n, titulos_previos):
+        ids = inicio * 7 + np.cumsum(rng.integers(1, 8, n)) + 10
+        titulos = [self._titulo(rng, titulos_previos) for _ in range(n)]
+
+        # Fechas: más películas recientes, 1% sin fecha
+        anios = np.clip(2025 - rng.exponential(18, n).astype(int), 1900, 2025)
+        fechas = [
+            '' if sin_fecha else f"{a}-{m:02d}-{d:02d}"
+            for a, m, d, sin_fecha in zip(anios, rng.integers(1, 13, n), rng.integers(1, 29, n),
+                                          rng.random(n) < 0.01)
+        ]
+
+        # Sinopsis: longitud log-normal, 2% vacías
+        largos = np.clip(rng.lognormal(np.log(50), 0.5, n).astype(int), 3, 250)
+        largos[rng.random(n) < 0.02] = 0
+        palabras = self.vocabulario[_zipf(rng, len(self.vocabulario), int(largos.sum()))]
+        cortes = np.concatenate([[0], np.cumsum(largos)])
+        sinopsis = [' '.join(palabras[a:b]) for a, b in zip(cortes[:-1], cortes[1:])]
+
+        generos = [
+            _lista(GENEROS[g] for g in dict.fromkeys(_zipf(rng, len(GENEROS), k, s=0.8)))
+            for k in rng.integers(1, 5, n)
+        ]
+        num_cast = np.where(rng.random(n) < 0.03, 0, rng.integers(1, 6, n))
+        indices_cast = _zipf(rng, len(self.actores), int(num_cast.sum()), s=1.05)
+        cortes = np.concatenate([[0], np.cumsum(num_cast)])
+        cast = [_lista(self.actores[i] for i in indices_cast[a:b]) for a, b in zip(cortes[:-1], cortes[1:])]
+
+        num_companias = rng.integers(0, 4, n)
+        indices_companias = _zipf(rng, len(self.companias), int(num_companias.sum()), s=1.2)
+        cortes = np.concatenate([[0], np.cumsum(num_companias)])
+        companias = [
+            _lista(self.companias[i] for i in indices_companias[a:b])
+            for a, b in zip(cortes[:-1], cortes[1:])
+        ]
+        directores = [self.directores[i] for i in _zipf(rng, len(self.directores), n, s=0.9)]
+        for i in np.flatnonzero(rng.random(n) < 0.01):
+            directores[i] = 'Unknown'
+
+        popularidad = np.round(rng.lognormal(1.5, 1.2, n), 3)
+        votos = np.maximum(0, (popularidad * rng.lognormal(3, 1, n))).astype(int)
+        nota = np.round(np.clip(rng.normal(6.3, 1.1, n) + 0.1 * np.log1p(popularidad), 0, 10), 1)
+        nota[votos < 5] = 0.0
+        duracion = np.clip(rng.normal(105, 22, n), 1, 300).astype(int)
+        duracion[rng.random(n) < 0.03] = 0
+        presupuesto = np.where(rng.random(n) < 0.6, 0, rng.lognormal(16, 1.3, n)).astype(np.int64)
+
+        return pd.DataFrame({
+            'id': ids, 'title': titulos, 'release_date': fechas, 'genres': generos,
+            'overview': sinopsis, 'popularity': popularidad, 'runtime': duracion,
+            'production_companies': companias, 'cast': cast, 'director': directores,
+            'vote_average': nota, 'vote_count': votos, 'budget': presupuesto
+        }, columns=COLUMNAS)
+
+
+def generar_catalogo(n, semilla=42):
+    """DataFrame con n películas sintéticas (para tamaños que caben en memoria)"""
+    return GeneradorCatalogo(n, semilla).dataframe()
+
+
+def escribir_catalogo(n, ruta, semilla=42):
+    """Escribe el catálogo por bloques sin tenerlo entero en memoria"""
+    os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+    temporal = f"{ruta}.tmp"
+    for numero, bloque in enumerate(GeneradorCatalogo(n, semilla).bloques()):
+        bloque.to_csv(temporal, index=False, mode='w' if numero == 0 else 'a', header=numero == 0)
+    os.replace(temporal, ruta)
+    return ruta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera un catálogo sintético de películas")
+    parser.add_argument('n', type=int)
+    parser.add_argument('ruta')
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+    escribir_catalogo(args.n, args.ruta, args.semilla)
+    print(f"{args.n} películas escritas en {args.ruta}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
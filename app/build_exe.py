@@ -59,12 +59,26 @@ def verify_project_structure():
     required_model_files = [
         "models/__init__.py",
         "models/predictor.py", 
-        "models/recommender.py"
+        "models/recommender.py",
+        "models/query_cache.py",
+        "models/batching.py",
+        "models/query_log.py"
     ]
     
     required_utils_files = [
         "utils/__init__.py",
         "utils/data_loader.py",
+        "utils/catalog.py",
+        "utils/artifacts.py",
+        "utils/ranking.py",
+        "utils/forest.py",
+        "utils/manifest.py",
+        "utils/metrics.py",
+        "utils/tfidf.py",
+        "utils/campos.py",
+        "utils/filtros.py",
+        "utils/fusion.py",
+        "utils/suggest.py",
         "utils/validators.py"
     ]
     
@@ -137,6 +151,103 @@ def prepare_files():
     return True
 
 
+ARTIFACTS_DIR = "build_artifacts"
+# Carpeta del ejecutable dentro de dist/ (--onedir)
+EXE_DIR = os.path.join("dist", "MovieRecommender")
+# Límite para el arranque del ejecutable, medido desde fuera del proceso
+# (incluye el cargador de PyInstaller y la preparación del paquete)
+STARTUP_BUDGET_MS = 15000
+
+
+def build_artifacts():
+    """Construye los artefactos que se empaquetan en el ejecutable.
+    
+    Se entrenan aquí una sola vez, sin compresión para que el ejecutable los
+    mapee en memoria tal como están, y se comprueban sus sumas antes de
+    empaquetarlos. Así el ejecutable no entrena nada en el primer arranque.
+    """
+    print("🧠 Construyendo artefactos para empaquetar...")
+    
+    try:
+        from utils import DataLoader
+        
+        if os.path.exists(ARTIFACTS_DIR):
+            shutil.rmtree(ARTIFACTS_DIR)
+        
+        data_loader = DataLoader("dataset_movies_api.csv")
+        data_loader.formato_artefactos = {'scores_vecinos': 'float16', 'compresion': None}
+        if not data_loader.load_data() or not data_loader.crear_modelos(models_dir=ARTIFACTS_DIR):
+            print("❌ Error: No se pudieron construir los artefactos")
+            return False
+        
+        errores = data_loader.verificar_integridad(ARTIFACTS_DIR)
+        if errores:
+            for error in errores:
+                print(f"❌ {error}")
+            return False
+        
+        total_size = sum(
+            os.path.getsize(os.path.join(ARTIFACTS_DIR, f)) for f in os.listdir(ARTIFACTS_DIR)
+        ) / (1024 * 1024)
+        print(f"✅ Artefactos construidos en {ARTIFACTS_DIR}/ ({total_size:.1f} MB)")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error al construir artefactos: {e}")
+        return False
+
+
+def verify_executable_startup(exe_path):
+    """Arranca el ejecutable en modo de verificación y revisa su informe.
+    
+    El ejecutable abre los artefactos empaquetados sin entrenar, comprueba que
+    queden mapeados en memoria y que sus sumas coincidan, y escribe un JSON
+    con los tiempos de cada etapa.
+    """
+    print("⏱️ Verificando el arranque del ejecutable...")
+    
+    report_path = os.path.abspath(os.path.join("build", "startup_report.json"))
+    os.makedirs(os.path.dirname(report_path), exist_ok=True)
+    
+    try:
+        import json
+        import time
+        
+        start_time = time.time()
+        result = subprocess.run([exe_path, "--verificar-arranque", report_path], timeout=300)
+        wall_ms = (time.time() - start_time) * 1000
+        
+        if not os.path.exists(report_path):
+            print(f"❌ Error: El ejecutable no escribió el informe (código: {result.returncode})")
+            return False
+        
+        with open(report_path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+        
+        for stage, ms in report.get('etapas_ms', {}).items():
+            print(f"   {stage:<38} {ms:>8.0f} ms")
+        print(f"📊 Arranque verificado en {wall_ms:.0f} ms "
+              f"({report['total_ms']:.0f} ms dentro de la aplicación)")
+        
+        for error in report.get('errores', []):
+            print(f"❌ {error}")
+        if result.returncode != 0 or not report.get('ok'):
+            return False
+        
+        if wall_ms > STARTUP_BUDGET_MS:
+            print(f"⚠️ Advertencia: El arranque supera {STARTUP_BUDGET_MS} ms")
+        
+        print("✅ El ejecutable arranca con los artefactos empaquetados")
+        return True
+        
+    except subprocess.TimeoutExpired:
+        print("❌ Error: La verificación del arranque no terminó a tiempo")
+        return False
+    except Exception as e:
+        print(f"❌ Error inesperado al verificar el arranque: {e}")
+        return False
+
+
 def check_problematic_modules():
     """Verifica módulos que pueden causar problemas con PyInstaller"""
     print("🔍 Verificando módulos problemáticos...")
@@ -218,6 +329,7 @@ def build_executable():
     required_for_build = [
         "main.py",
         "dataset_movies_api.csv",
+        os.path.join(ARTIFACTS_DIR, "manifest.json"),
         "models",
         "utils"
     ]
@@ -230,12 +342,13 @@ def build_executable():
     # Comando de PyInstaller usando módulo de Python (optimizado)
     cmd = [
         sys.executable, "-m", "PyInstaller",  # Usar PyInstaller como módulo
-        "--onefile",                    # Un solo archivo ejecutable
+        "--onedir",                     # Carpeta: los artefactos se mapean en su lugar, sin extraerlos
         "--windowed",                   # Sin ventana de consola
         "--name", "MovieRecommender",   # Nombre del ejecutable
         "--add-data", "dataset_movies_api.csv;.",  # Incluir dataset
         "--add-data", "models;models",  # Incluir carpeta models
         "--add-data", "utils;utils",    # Incluir carpeta utils
+        "--add-data", f"{ARTIFACTS_DIR};artefactos",  # Artefactos pre-entrenados
         "--distpath", "dist",           # Directorio de salida
         "--workpath", "build",          # Directorio de trabajo temporal
         "--specpath", ".",              # Directorio para el archivo .spec
@@ -340,20 +453,22 @@ def build_executable():
             return False
         
         # Verificar que el ejecutable se creó correctamente
-        exe_path = os.path.join("dist", "MovieRecommender.exe")
+        exe_path = os.path.join(EXE_DIR, "MovieRecommender.exe")
         if not os.path.exists(exe_path):
             print("❌ Error: El ejecutable no se creó en la ubicación esperada")
             return False
         
-        # Verificar tamaño del ejecutable (debe ser > 10MB para incluir todas las dependencias)
-        exe_size = os.path.getsize(exe_path) / (1024 * 1024)  # Tamaño en MB
-        print(f"📊 Tamaño del ejecutable: {exe_size:.1f} MB")
+        # Verificar tamaño de la carpeta (debe ser > 10MB para incluir todas las dependencias)
+        exe_size = sum(
+            os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(EXE_DIR) for f in files
+        ) / (1024 * 1024)  # Tamaño en MB
+        print(f"📊 Tamaño del ejecutable y sus archivos: {exe_size:.1f} MB")
         
         if exe_size < 10:
             print("⚠️ Advertencia: El ejecutable es muy pequeño, puede que falten dependencias")
         
         print("✅ Ejecutable creado exitosamente")
-        return True
+        return verify_executable_startup(exe_path)
         
     except Exception as e:
         print(f"❌ Error inesperado al crear ejecutable: {e}")
@@ -365,7 +480,7 @@ def cleanup():
     print("🧹 Limpiando archivos temporales...")
     
     # Eliminar carpetas temporales de construcción
-    temp_dirs = ["build", "__pycache__"]
+    temp_dirs = ["build", ARTIFACTS_DIR, "__pycache__"]
     for dir_name in temp_dirs:
         if os.path.exists(dir_name):
             shutil.rmtree(dir_name)
@@ -404,20 +519,28 @@ def main():
         print("🛑 Empaquetado detenido")
         return 1
     
-    # Paso 3: Construir ejecutable
+    # Paso 3: Construir artefactos pre-entrenados
+    if not build_artifacts():
+        print("❌ Falló la construcción de artefactos")
+        cleanup()
+        print("🛑 Empaquetado detenido")
+        return 1
+    
+    # Paso 4: Construir ejecutable
     if not build_executable():
         print("❌ Falló la construcción del ejecutable")
         cleanup()
         print("🛑 Empaquetado detenido")
         return 1
     
-    # Paso 4: Limpiar archivos temporales
+    # Paso 5: Limpiar archivos temporales
     cleanup()
     
     print("\n" + "=" * 70)
     print("🎉 ¡Ejecutable creado exitosamente!")
-    print("📂 Ubicación: dist/MovieRecommender.exe")
-    print("💡 El ejecutable incluye todos los archivos necesarios")
+    print(f"📂 Ubicación: {os.path.join(EXE_DIR, 'MovieRecommender.exe')}")
+    print(f"💡 Distribuye la carpeta {EXE_DIR} completa")
+    print("💡 El ejecutable incluye todos los archivos necesarios y los modelos ya entrenados")
     print("🚀 ¡Ya puedes distribuir tu aplicación!")
     return 0
 
@@ -1,5 +1,16 @@
+import time
+
+# Referencia para el perfil de arranque
+INICIO_PROCESO = time.perf_counter()
+
 import sys
 import os
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
 
 # Agregar el directorio actual al path de Python para encontrar módulos locales
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -9,54 +20,343 @@ from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QLineEdit, QPushButton, QTextEdit, QComboBox, QSpinBox,
     QDoubleSpinBox, QTabWidget, QMessageBox, QProgressDialog,
-    QTableWidget, QTableWidgetItem, QHeaderView, QGroupBox,
-    QGridLayout, QSplashScreen, QFrame
+    QTableView, QHeaderView, QGroupBox,
+    QGridLayout, QSplashScreen, QFrame, QCompleter
+)
+from PyQt5.QtCore import (
+    Qt, QThread, pyqtSignal, QTimer, QObject, QRunnable, QThreadPool, QStringListModel,
+    QAbstractTableModel, QModelIndex
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer
 from PyQt5.QtGui import QFont, QPalette, QColor, QPixmap
 
-# Importar módulos locales
-from utils import DataLoader, TextCorrector
-from models import MovieRecommender, MoviePredictor
+FIN_IMPORTACIONES = time.perf_counter()
+
+# Los módulos locales (utils, models) se importan en LoadingWorker, después de
+# mostrar la ventana, porque arrastran pandas y scikit-learn
+
+
+class PerfilArranque:
+    """Tiempos de cada etapa del arranque, medidos desde el inicio del proceso"""
+    
+    def __init__(self):
+        self.etapas = []
+        self._lock = threading.Lock()
+    
+    def registrar(self, nombre, inicio, fin):
+        with self._lock:
+            self.etapas.append((nombre, inicio - INICIO_PROCESO, fin - inicio,
+                                threading.current_thread().name))
+    
+    @contextmanager
+    def medir(self, nombre):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(nombre, inicio, time.perf_counter())
+    
+    def reporte(self):
+        """Tabla con el inicio, la duración y el hilo de cada etapa"""
+        lineas = ["Perfil de arranque (ms desde el inicio del proceso):"]
+        for nombre, desde, duracion, hilo in sorted(self.etapas, key=lambda e: e[1]):
+            lineas.append(f"  {nombre:<38} inicio {desde * 1000:>8.0f}  "
+                          f"duración {duracion * 1000:>8.0f}  [{hilo}]")
+        return "\n".join(lineas)
 
 
 class LoadingWorker(QThread):
-    """Hilo separado para cargar datos sin bloquear la interfaz"""
+    """Hilo separado para cargar datos sin bloquear la interfaz.
+    
+    La carga se hace por etapas: la búsqueda por similitud queda lista en
+    cuanto se mapean la matriz TF-IDF y la tabla de vecinos, y después el
+    modelo de predicción y los índices de actores y directores se preparan
+    en paralelo. Cada etapa terminada emite stage_ready.
+    """
     
     progress = pyqtSignal(str)
+    stage_ready = pyqtSignal(str)
     finished = pyqtSignal(bool, str)
     
-    def __init__(self):
+    def __init__(self, perfil):
         super().__init__()
+        self.perfil = perfil
         self.data_loader = None
         self.text_corrector = None
+        self.suggester = None
         self.recommender = None
         self.predictor = None
+        self.models_dir = None
+        self.obsoletas = {}
+        self.registro = None
     
     def run(self):
         try:
+            threading.current_thread().name = "LoadingWorker"
             self.progress.emit("Iniciando sistema...")
-            self.data_loader = DataLoader()
+            # Los módulos pesados se importan aquí, con la ventana ya visible;
+            # scikit-learn (lo más lento) se importa en otro hilo mientras se
+            # lee el dataset
+            with self.perfil.medir("Importación de utils (pandas)"):
+                from utils import DataLoader, TextCorrector, TitleSuggester
+                from utils.data_loader import EMPAQUETADO, rutas_datos, directorio_modelos_usuario
+            importacion_sklearn = threading.Thread(
+                target=self._importar_sklearn, name="importacion", daemon=True
+            )
+            importacion_sklearn.start()
+            dataset_path, self.models_dir = rutas_datos()
+            self.data_loader = DataLoader(dataset_path)
             
             self.progress.emit("Cargando dataset...")
-            if not self.data_loader.initialize_system():
-                self.finished.emit(False, "Error al inicializar el sistema de datos")
-                return
+            with self.perfil.medir("Carga del dataset"):
+                if not self.data_loader.load_data():
+                    self.finished.emit(False, "Error al cargar el dataset")
+                    return
             
-            self.progress.emit("Configurando corrector de texto...")
-            self.text_corrector = TextCorrector(self.data_loader.df)
+            importacion_sklearn.join()
+            from models import MovieRecommender
+            from models.query_log import RegistroConsultas
             
-            self.progress.emit("Inicializando sistema de recomendación...")
-            self.recommender = MovieRecommender(self.data_loader, self.text_corrector)
+            # Con MOVIE_REGISTRO_CONSULTAS se anotan las consultas para repetirlas
+            self.registro = RegistroConsultas.desde_entorno()
             
-            self.progress.emit("Configurando modelo de predicción...")
-            self.predictor = MoviePredictor(self.data_loader)
+            # Piezas guardadas que ya no corresponden al dataset o la configuración
+            self.obsoletas = self.data_loader.revisar_artefactos(self.models_dir, solo_lectura=EMPAQUETADO)
+            if EMPAQUETADO and self.obsoletas:
+                # Los artefactos del ejecutable son de solo lectura: lo que haya
+                # que reconstruir se guarda en el directorio del usuario
+                print(f"Artefactos empaquetados obsoletos: {self.obsoletas}")
+                self.models_dir = directorio_modelos_usuario()
+                self.obsoletas = self.data_loader.revisar_artefactos(self.models_dir)
+            if self.obsoletas and self.data_loader.manifiesto is not None:
+                self.obsoletas = self.data_loader.acotar_obsoletas(self.obsoletas, self.models_dir)
+            busqueda_obsoleta = [p for p in ('busqueda', 'vecinos', 'campos') if p in self.obsoletas]
+            if busqueda_obsoleta:
+                self.progress.emit("Reconstruyendo índices de búsqueda...")
+                with self.perfil.medir("Reconstrucción de índices de búsqueda"):
+                    self.data_loader.reconstruir_piezas(busqueda_obsoleta, self.models_dir)
+            
+            self.progress.emit("Mapeando índice de vecinos...")
+            with self.perfil.medir("Artefactos de búsqueda"):
+                modelos_listos = (
+                    self.data_loader.cargar_modelos_busqueda(self.models_dir, mmap=True)
+                    and self.data_loader.confirmar_artefactos(self.models_dir, registrar=False)
+                )
+            if not modelos_listos:
+                self.obsoletas = {}
+                if EMPAQUETADO:
+                    self.models_dir = directorio_modelos_usuario()
+                self.progress.emit("Creando modelos (solo la primera vez)...")
+                with self.perfil.medir("Entrenamiento de modelos"):
+                    if not self.data_loader.crear_modelos(mmap=True, models_dir=self.models_dir):
+                        self.finished.emit(False, "Error al inicializar el sistema de datos")
+                        return
+            
+            self.progress.emit("Configurando corrector de títulos...")
+            with self.perfil.medir("Índice de títulos y sugerencias"):
+                self.text_corrector = TextCorrector(self.data_loader.catalogo, entidades=False)
+                self.suggester = TitleSuggester(self.text_corrector)
+                self.recommender = MovieRecommender(self.data_loader, self.text_corrector,
+                                                    registro=self.registro)
+            self.stage_ready.emit('similares')
+            
+            # El resto se prepara en paralelo mientras ya se puede buscar
+            with ThreadPoolExecutor(max_workers=2, thread_name_prefix="carga") as pool:
+                futuros = {
+                    pool.submit(self._preparar_prediccion): 'prediccion',
+                    pool.submit(self._preparar_entidades): 'inteligente'
+                }
+                for futuro in as_completed(futuros):
+                    futuro.result()
+                    self.stage_ready.emit(futuros[futuro])
+            
+            # Registra en el manifiesto los artefactos de versiones anteriores
+            self.data_loader.confirmar_artefactos(self.models_dir)
             
-            self.progress.emit("¡Sistema listo!")
             self.finished.emit(True, "Sistema cargado exitosamente")
             
         except Exception as e:
             self.finished.emit(False, f"Error durante la carga: {str(e)}")
+    
+    def _importar_sklearn(self):
+        with self.perfil.medir("Importación de scikit-learn"):
+            import sklearn.feature_extraction.text  # vectorizador guardado
+            import sklearn.metrics.pairwise  # recomendador
+    
+    def _preparar_prediccion(self):
+        from models import MoviePredictor
+        
+        with self.perfil.medir("Modelo de predicción"):
+            if ('prediccion' in self.obsoletas
+                    and not self.data_loader.reconstruir_piezas(['prediccion'], self.models_dir)):
+                raise RuntimeError("No se pudo reentrenar el modelo de predicción")
+            # Tras crear todos los modelos, el modelo ya está cargado
+            if (self.data_loader.bosque is None
+                    and not self.data_loader.cargar_modelo_prediccion(self.models_dir, mmap=True)):
+                raise RuntimeError("No se pudo cargar el modelo de predicción")
+            self.predictor = MoviePredictor(self.data_loader, registro=self.registro)
+    
+    def _preparar_entidades(self):
+        with self.perfil.medir("Índices de actores y directores"):
+            self.text_corrector.construir_indices_entidades()
+
+
+class QuerySignals(QObject):
+    """Señales de QueryWorker (QRunnable no puede emitir señales por sí mismo)"""
+    
+    # id de la consulta, resultado, error, duración en ms
+    finished = pyqtSignal(int, object, object, float)
+
+
+class QueryWorker(QRunnable):
+    """Ejecuta una consulta del motor en el pool de hilos, fuera de la interfaz"""
+    
+    def __init__(self, query_id, funcion, *args, **kwargs):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.query_id = query_id
+        self.funcion = funcion
+        self.args = args
+        self.kwargs = kwargs
+        self.cancelado = False
+        self.signals = QuerySignals()
+    
+    def cancelar(self):
+        """Marca la consulta como obsoleta; su resultado se descartará"""
+        self.cancelado = True
+    
+    def run(self):
+        resultado, error, duracion = None, None, 0.0
+        if not self.cancelado:
+            inicio = time.perf_counter()
+            try:
+                resultado, error = self.funcion(*self.args, **self.kwargs)
+            except Exception as e:
+                resultado, error = None, f"Error inesperado: {str(e)}"
+            duracion = (time.perf_counter() - inicio) * 1000
+        
+        # Se emite siempre para que la interfaz libere la referencia al worker
+        self.signals.finished.emit(self.query_id, resultado, error, duracion)
+
+
+class ResultsTableModel(QAbstractTableModel):
+    """Modelo de tabla que lee los resultados directamente de los arrays del catálogo.
+    
+    Guarda solo las posiciones de las películas y formatea cada celda al
+    pintarla, sin crear un objeto por celda. Los resultados se amplían por
+    páginas (10 → 100 → 1000) cuando la vista llega al final.
+    """
+    
+    COLUMNAS = ["Título", "Calificación", "Fecha", "Géneros"]
+    PAGINAS = (10, 100, 1000)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.catalogo = None
+        self.posiciones = np.zeros(0, dtype=np.int64)
+        self.cargar_pagina = None
+        self.pagina_pendiente = False
+    
+    def set_catalogo(self, catalogo):
+        """Fija el catálogo del que se leen las columnas"""
+        self.beginResetModel()
+        self.catalogo = catalogo
+        self._titulos = catalogo.df['title'].to_numpy()
+        self._calificaciones = catalogo.df['vote_average'].to_numpy()
+        self._fechas = catalogo.df['release_date'].to_numpy()
+        self.posiciones = np.zeros(0, dtype=np.int64)
+        self.endResetModel()
+    
+    def set_resultados(self, results, cargar_pagina=None):
+        """Muestra un resultado nuevo.
+        
+        cargar_pagina(n) debe pedir los n primeros resultados de la misma
+        consulta y entregarlos luego a ampliar(); sin ella no hay paginado.
+        """
+        self.beginResetModel()
+        self.posiciones = self._posiciones_de(results)
+        self.cargar_pagina = cargar_pagina
+        self.pagina_pendiente = False
+        self.endResetModel()
+    
+    def ampliar(self, results):
+        """Añade las filas de una página mayor que aún no se muestran"""
+        self.pagina_pendiente = False
+        nuevas = self._posiciones_de(results)[len(self.posiciones):]
+        if len(nuevas) == 0:
+            # La consulta no tiene más resultados
+            self.cargar_pagina = None
+            return
+        
+        inicio = len(self.posiciones)
+        self.beginInsertRows(QModelIndex(), inicio, inicio + len(nuevas) - 1)
+        self.posiciones = np.concatenate([self.posiciones, nuevas])
+        self.endInsertRows()
+    
+    def _posiciones_de(self, results):
+        # Los resultados conservan como índice la posición en el catálogo
+        if results is None or results.empty or self.catalogo is None:
+            return np.zeros(0, dtype=np.int64)
+        return results.index.to_numpy(dtype=np.int64)
+    
+    def _siguiente_pagina(self):
+        for pagina in self.PAGINAS:
+            if pagina > len(self.posiciones):
+                return pagina
+        return None
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.posiciones)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNAS)
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNAS[section]
+        return super().headerData(section, orientation, role)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        
+        columna = index.column()
+        if role == Qt.TextAlignmentRole and columna == 1:
+            return Qt.AlignCenter
+        if role != Qt.DisplayRole:
+            return None
+        
+        i = int(self.posiciones[index.row()])
+        if columna == 0:
+            return str(self._titulos[i])
+        if columna == 1:
+            return f"{self._calificaciones[i]:.1f}"
+        if columna == 2:
+            fecha = self._fechas[i]
+            if np.isnat(fecha):
+                return "N/A"
+            return str(np.datetime_as_string(fecha, unit='D'))
+        
+        generos = self.catalogo.generos_de(i)
+        if not generos:
+            return "N/A"
+        texto = ", ".join(generos[:3])  # Primeros 3 géneros
+        if len(generos) > 3:
+            texto += "..."
+        return texto
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.cargar_pagina is None or self.pagina_pendiente:
+            return False
+        # Solo se pide otra página si la actual vino completa
+        if len(self.posiciones) not in self.PAGINAS:
+            return False
+        return self._siguiente_pagina() is not None
+    
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        self.pagina_pendiente = True
+        self.cargar_pagina(self._siguiente_pagina())
 
 
 class MovieRecommendationApp(QMainWindow):
@@ -66,6 +366,18 @@ class MovieRecommendationApp(QMainWindow):
         super().__init__()
         self.recommender = None
         self.predictor = None
+        self.suggester = None
+        self.perfil = PerfilArranque()
+        self.perfil.registrar("Importación de PyQt5 y numpy", INICIO_PROCESO, FIN_IMPORTACIONES)
+        
+        # Pool de consultas: una consulta activa por pestaña; las anteriores
+        # se cancelan o se descartan al llegar una nueva
+        self.query_pool = QThreadPool()
+        self.query_pool.setMaxThreadCount(max(2, QThreadPool.globalInstance().maxThreadCount() // 2))
+        self.consultas_activas = {}
+        self.workers_en_vuelo = set()
+        self.ultimo_query_id = 0
+        
         self.init_ui()
         self.show_loading_screen()
     
@@ -152,8 +464,12 @@ class MovieRecommendationApp(QMainWindow):
         self.create_intelligent_search_tab()
         self.create_prediction_tab()
         
-        # Estado inicial: deshabilitado hasta que se carguen los datos
-        self.tab_widget.setEnabled(False)
+        # Barra de estado con el tiempo de cada consulta
+        self.statusBar().showMessage("Cargando sistema...")
+        
+        # Estado inicial: cada pestaña se habilita cuando su etapa esté lista
+        for i in range(self.tab_widget.count()):
+            self.tab_widget.setTabEnabled(i, False)
     
     def create_similarity_tab(self):
         """Crea la pestaña de búsqueda por similitud"""
@@ -172,6 +488,20 @@ class MovieRecommendationApp(QMainWindow):
         title_layout.addWidget(self.similarity_title_input)
         input_layout.addLayout(title_layout)
         
+        # Sugerencias mientras se escribe: los prefijos se resuelven al instante
+        # y la búsqueda aproximada espera a una pausa al teclear
+        self.sugerencias_model = QStringListModel(self)
+        completer = QCompleter(self.sugerencias_model, self)
+        completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        completer.setCaseSensitivity(Qt.CaseInsensitive)
+        self.similarity_title_input.setCompleter(completer)
+        self.similarity_title_input.textEdited.connect(self.titulo_editado)
+        
+        self.sugerencias_timer = QTimer(self)
+        self.sugerencias_timer.setSingleShot(True)
+        self.sugerencias_timer.setInterval(250)
+        self.sugerencias_timer.timeout.connect(self.buscar_sugerencias_aproximadas)
+        
         # Botón de búsqueda
         search_btn = QPushButton("🔍 Buscar Películas Similares")
         search_btn.clicked.connect(self.search_similar_movies)
@@ -183,18 +513,28 @@ class MovieRecommendationApp(QMainWindow):
         results_group = QGroupBox("Resultados")
         results_layout = QVBoxLayout(results_group)
         
-        self.similarity_results_table = QTableWidget()
-        self.similarity_results_table.setColumnCount(4)
-        self.similarity_results_table.setHorizontalHeaderLabels([
-            "Título", "Calificación", "Fecha", "Géneros"
-        ])
-        self.similarity_results_table.horizontalHeader().setStretchLastSection(True)
+        self.similarity_results_model = ResultsTableModel(self)
+        self.similarity_results_table = self.crear_tabla_resultados(self.similarity_results_model)
         results_layout.addWidget(self.similarity_results_table)
         
         layout.addWidget(results_group)
         
         self.tab_widget.addTab(tab, "🎯 Búsqueda Similares")
     
+    def crear_tabla_resultados(self, modelo):
+        """Vista de resultados con filas de altura fija y anchos predefinidos"""
+        tabla = QTableView()
+        tabla.setModel(modelo)
+        tabla.setSelectionBehavior(QTableView.SelectRows)
+        tabla.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        
+        header = tabla.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.Stretch)
+        header.resizeSection(1, 100)
+        header.resizeSection(2, 110)
+        header.resizeSection(3, 260)
+        return tabla
+    
     def create_intelligent_search_tab(self):
         """Crea la pestaña de búsqueda inteligente"""
         tab = QWidget()
@@ -233,12 +573,8 @@ class MovieRecommendationApp(QMainWindow):
         results_group = QGroupBox("Resultados")
         results_layout = QVBoxLayout(results_group)
         
-        self.intelligent_results_table = QTableWidget()
-        self.intelligent_results_table.setColumnCount(4)
-        self.intelligent_results_table.setHorizontalHeaderLabels([
-            "Título", "Calificación", "Fecha", "Géneros"
-        ])
-        self.intelligent_results_table.horizontalHeader().setStretchLastSection(True)
+        self.intelligent_results_model = ResultsTableModel(self)
+        self.intelligent_results_table = self.crear_tabla_resultados(self.intelligent_results_model)
         results_layout.addWidget(self.intelligent_results_table)
         
         layout.addWidget(results_group)
@@ -335,8 +671,9 @@ class MovieRecommendationApp(QMainWindow):
         self.progress_dialog.show()
         
         # Iniciar carga en hilo separado
-        self.loading_worker = LoadingWorker()
+        self.loading_worker = LoadingWorker(self.perfil)
         self.loading_worker.progress.connect(self.update_loading_progress)
+        self.loading_worker.stage_ready.connect(self.stage_ready)
         self.loading_worker.finished.connect(self.loading_finished)
         self.loading_worker.start()
     
@@ -344,21 +681,36 @@ class MovieRecommendationApp(QMainWindow):
         """Actualiza el mensaje de progreso"""
         self.progress_dialog.setLabelText(message)
     
+    def stage_ready(self, etapa):
+        """Habilita la pestaña cuya etapa de carga terminó"""
+        if etapa == 'similares':
+            # La búsqueda por similitud ya funciona: se retira el diálogo
+            self.progress_dialog.close()
+            self.recommender = self.loading_worker.recommender
+            self.suggester = self.loading_worker.suggester
+            catalogo = self.loading_worker.data_loader.catalogo
+            self.similarity_results_model.set_catalogo(catalogo)
+            self.intelligent_results_model.set_catalogo(catalogo)
+            self.tab_widget.setTabEnabled(0, True)
+            self.statusBar().showMessage("Búsqueda por similitud lista; cargando el resto del sistema...")
+        elif etapa == 'inteligente':
+            self.tab_widget.setTabEnabled(1, True)
+        elif etapa == 'prediccion':
+            self.predictor = self.loading_worker.predictor
+            self.tab_widget.setTabEnabled(2, True)
+    
     def loading_finished(self, success, message):
         """Maneja la finalización de la carga"""
         self.progress_dialog.close()
         
         if success:
-            self.recommender = self.loading_worker.recommender
-            self.predictor = self.loading_worker.predictor
-            self.tab_widget.setEnabled(True)
+            self.perfil.registrar("Sistema completo", INICIO_PROCESO, time.perf_counter())
+            print(self.perfil.reporte())
+            self.loading_worker.data_loader.reporte_tiempos_carga()
             
-            # Mostrar mensaje de éxito
-            QMessageBox.information(
-                self, 
-                "Sistema Listo", 
-                "¡El sistema de recomendación está listo para usar!\n\n"
-                f"Películas cargadas: {len(self.loading_worker.data_loader.df)}"
+            self.statusBar().showMessage(
+                f"Sistema listo: {len(self.loading_worker.data_loader.df)} películas cargadas "
+                f"en {time.perf_counter() - INICIO_PROCESO:.1f} s"
             )
         else:
             QMessageBox.critical(
@@ -376,17 +728,67 @@ class MovieRecommendationApp(QMainWindow):
             QMessageBox.warning(self, "Entrada Vacía", "Por favor, ingresa un título de película.")
             return
         
-        try:
-            results, error = self.recommender.buscar_peliculas_similares(title, 10)
-            
-            if error:
-                QMessageBox.warning(self, "Error", error)
-                return
-            
-            self.populate_results_table(self.similarity_results_table, results)
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Error inesperado: {str(e)}")
+        self.lanzar_consulta(
+            'similares', "Búsqueda de similares",
+            lambda results, error: self.similar_movies_ready(title, results, error),
+            self.recommender.buscar_peliculas_similares, title, ResultsTableModel.PAGINAS[0]
+        )
+    
+    def titulo_editado(self, texto):
+        """Actualiza las sugerencias de título con cada tecla"""
+        self.sugerencias_timer.stop()
+        self.cancelar_consulta('sugerencias')
+        if self.suggester is None:
+            return
+        
+        sugerencias = self.suggester.sugerir(texto)
+        self.mostrar_sugerencias(sugerencias)
+        
+        # Si los prefijos no llenan la lista, completar con búsqueda aproximada
+        if texto.strip() and len(sugerencias) < self.suggester.limite:
+            self.sugerencias_timer.start()
+    
+    def buscar_sugerencias_aproximadas(self):
+        """Lanza la búsqueda aproximada de títulos tras la pausa al escribir"""
+        texto = self.similarity_title_input.text()
+        self.lanzar_consulta(
+            'sugerencias', None,
+            lambda resultado, error: self.sugerencias_aproximadas_listas(texto, resultado),
+            lambda: (self.suggester.sugerir_fuzzy(texto), None)
+        )
+    
+    def sugerencias_aproximadas_listas(self, texto, sugerencias):
+        """Añade las sugerencias aproximadas si el texto no cambió mientras tanto"""
+        if not sugerencias or texto != self.similarity_title_input.text():
+            return
+        
+        actuales = self.sugerencias_model.stringList()
+        nuevas = [t for t in sugerencias if t not in actuales]
+        self.mostrar_sugerencias((actuales + nuevas)[:self.suggester.limite])
+    
+    def mostrar_sugerencias(self, sugerencias):
+        """Muestra la lista de sugerencias bajo el campo de título"""
+        self.sugerencias_model.setStringList(sugerencias)
+        completer = self.similarity_title_input.completer()
+        if sugerencias and self.similarity_title_input.hasFocus():
+            completer.complete()
+        else:
+            completer.popup().hide()
+    
+    def similar_movies_ready(self, title, results, error):
+        """Muestra los resultados de la búsqueda por similitud"""
+        if error:
+            QMessageBox.warning(self, "Error", error)
+            return
+        
+        modelo = self.similarity_results_model
+        modelo.set_resultados(
+            results,
+            lambda n: self.lanzar_consulta(
+                'similares', "Carga de más resultados", self.pagina_lista(modelo),
+                self.recommender.buscar_peliculas_similares, title, n
+            )
+        )
     
     def intelligent_search(self):
         """Realiza búsqueda inteligente"""
@@ -402,22 +804,39 @@ class MovieRecommendationApp(QMainWindow):
             )
             return
         
-        try:
-            results, error = self.recommender.buscar_inteligente(
-                pelicula=title,
-                actores=actors, 
-                directores=directors,
-                top_n=10
+        criterios = dict(pelicula=title, actores=actors, directores=directors)
+        self.lanzar_consulta(
+            'inteligente', "Búsqueda inteligente",
+            lambda results, error: self.intelligent_search_ready(criterios, results, error),
+            self.recommender.buscar_inteligente,
+            top_n=ResultsTableModel.PAGINAS[0], **criterios
+        )
+    
+    def intelligent_search_ready(self, criterios, results, error):
+        """Muestra los resultados de la búsqueda inteligente"""
+        if error:
+            QMessageBox.warning(self, "Error", error)
+            return
+        
+        modelo = self.intelligent_results_model
+        modelo.set_resultados(
+            results,
+            lambda n: self.lanzar_consulta(
+                'inteligente', "Carga de más resultados", self.pagina_lista(modelo),
+                self.recommender.buscar_inteligente, top_n=n, **criterios
             )
-            
+        )
+    
+    def pagina_lista(self, modelo):
+        """Callback que añade al modelo una página mayor de resultados"""
+        def al_terminar(results, error):
             if error:
-                QMessageBox.warning(self, "Error", error)
+                # Sin más resultados: se deja de paginar
+                modelo.cargar_pagina = None
+                modelo.pagina_pendiente = False
                 return
-            
-            self.populate_results_table(self.intelligent_results_table, results)
-            
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Error inesperado: {str(e)}")
+            modelo.ampliar(results)
+        return al_terminar
     
     def predict_rating(self):
         """Predice la calificación de una película"""
@@ -442,81 +861,190 @@ class MovieRecommendationApp(QMainWindow):
                 )
                 return
             
-            prediction, error = self.predictor.predict_rating(
+            self.lanzar_consulta(
+                'prediccion', "Predicción", self.prediction_ready,
+                self.predictor.predict_rating,
                 budget, popularity, runtime, year, num_genres, num_cast
             )
             
-            if error:
-                QMessageBox.warning(self, "Error", error)
-                return
-            
-            # Mostrar resultado
-            self.prediction_result.setText(
-                f"🌟 Calificación Predicha: {prediction:.2f}/10.0\n\n"
-                f"{'⭐' * int(prediction)} {'☆' * (10 - int(prediction))}"
-            )
-            
-            # Cambiar color según la calificación
-            if prediction >= 8:
-                color = "#27ae60"  # Verde
-            elif prediction >= 6:
-                color = "#f39c12"  # Naranja
-            else:
-                color = "#e74c3c"  # Rojo
-                
-            self.prediction_result.setStyleSheet(f"""
-                QLabel {{
-                    background-color: {color};
-                    border: 2px solid {color};
-                    border-radius: 8px;
-                    padding: 20px;
-                    color: white;
-                    font-weight: bold;
-                }}
-            """)
-            
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error inesperado: {str(e)}")
     
-    def populate_results_table(self, table, results):
-        """Llena la tabla con los resultados"""
-        if results is None or results.empty:
-            table.setRowCount(0)
+    def prediction_ready(self, prediction, error):
+        """Muestra la calificación predicha"""
+        if error:
+            QMessageBox.warning(self, "Error", error)
             return
         
-        table.setRowCount(len(results))
+        # Mostrar resultado
+        self.prediction_result.setText(
+            f"🌟 Calificación Predicha: {prediction:.2f}/10.0\n\n"
+            f"{'⭐' * int(prediction)} {'☆' * (10 - int(prediction))}"
+        )
         
-        for i, (_, row) in enumerate(results.iterrows()):
-            # Título
-            table.setItem(i, 0, QTableWidgetItem(str(row['title'])))
+        # Cambiar color según la calificación
+        if prediction >= 8:
+            color = "#27ae60"  # Verde
+        elif prediction >= 6:
+            color = "#f39c12"  # Naranja
+        else:
+            color = "#e74c3c"  # Rojo
             
-            # Calificación
-            rating_item = QTableWidgetItem(f"{row['vote_average']:.1f}")
-            rating_item.setTextAlignment(Qt.AlignCenter)
-            table.setItem(i, 1, rating_item)
+        self.prediction_result.setStyleSheet(f"""
+            QLabel {{
+                background-color: {color};
+                border: 2px solid {color};
+                border-radius: 8px;
+                padding: 20px;
+                color: white;
+                font-weight: bold;
+            }}
+        """)
+    
+    def lanzar_consulta(self, canal, descripcion, al_terminar, funcion, *args, **kwargs):
+        """Ejecuta una consulta en el pool de hilos sin bloquear la interfaz.
+        
+        Solo hay una consulta vigente por canal (pestaña): la anterior se retira
+        de la cola si aún no empezó, y si ya está en curso su resultado se descarta.
+        """
+        self.cancelar_consulta(canal)
+        
+        self.ultimo_query_id += 1
+        worker = QueryWorker(self.ultimo_query_id, funcion, *args, **kwargs)
+        worker.signals.finished.connect(
+            lambda query_id, resultado, error, ms:
+                self.consulta_terminada(canal, descripcion, al_terminar, query_id, resultado, error, ms)
+        )
+        self.consultas_activas[canal] = worker
+        self.workers_en_vuelo.add(worker)
+        if descripcion:
+            self.statusBar().showMessage(f"{descripcion} en curso...")
+        self.query_pool.start(worker)
+    
+    def cancelar_consulta(self, canal):
+        """Cancela la consulta vigente de un canal, si la hay"""
+        anterior = self.consultas_activas.pop(canal, None)
+        if anterior is not None:
+            anterior.cancelar()
+            if self.query_pool.tryTake(anterior):
+                # No llegó a empezar: no emitirá la señal de fin
+                self.workers_en_vuelo.discard(anterior)
+    
+    def consulta_terminada(self, canal, descripcion, al_terminar, query_id, resultado, error, ms):
+        """Entrega el resultado solo si la consulta sigue siendo la vigente"""
+        self.workers_en_vuelo = {w for w in self.workers_en_vuelo if w.query_id != query_id}
+        
+        worker = self.consultas_activas.get(canal)
+        if worker is None or worker.query_id != query_id:
+            return
+        
+        del self.consultas_activas[canal]
+        if descripcion:
+            self.statusBar().showMessage(f"{descripcion} completada en {ms:.1f} ms")
+        al_terminar(resultado, error)
+
+
+def verificar_arranque(ruta_informe=None):
+    """Comprobación del arranque sin interfaz, pensada para el ejecutable.
+    
+    Abre los artefactos como la aplicación pero sin entrenar nada: falla si
+    alguna pieza está obsoleta, si los arrays no quedan mapeados desde disco
+    o si una suma sha256 no coincide. Después hace una recomendación y una
+    predicción. El ejecutable no tiene consola (--windowed), así que el
+    informe con los tiempos se escribe en un JSON y el resultado va en el
+    código de salida.
+    """
+    import json
+    
+    perfil = PerfilArranque()
+    informe = {'errores': []}
+    errores = informe['errores']
+    try:
+        with perfil.medir("Importación de utils y models"):
+            from utils import DataLoader, TextCorrector
+            from utils.artifacts import es_mapa
+            from utils.data_loader import EMPAQUETADO, rutas_datos
+            from models import MovieRecommender, MoviePredictor
+        
+        dataset_path, models_dir = rutas_datos()
+        informe.update(empaquetado=EMPAQUETADO, models_dir=models_dir)
+        data_loader = DataLoader(dataset_path)
+        
+        with perfil.medir("Carga del dataset"):
+            datos_ok = data_loader.load_data()
+        with perfil.medir("Revisión del manifiesto"):
+            obsoletas = data_loader.revisar_artefactos(models_dir, solo_lectura=True)
+        if not datos_ok:
+            errores.append("No se pudo cargar el dataset")
+        if data_loader.manifiesto is None:
+            errores.append(f"No hay manifiesto en {models_dir}")
+        errores.extend(f"Pieza obsoleta ({pieza}): {motivo}" for pieza, motivo in obsoletas.items())
+        
+        if not errores:
+            with perfil.medir("Mapeo de artefactos"):
+                modelos_ok = (
+                    data_loader.load_models(models_dir, mmap=True)
+                    and data_loader.confirmar_artefactos(models_dir, registrar=False)
+                )
+            if not modelos_ok:
+                errores.append("No se pudieron abrir los artefactos")
+        
+        if not errores:
+            informe['tiempos_carga_ms'] = dict(data_loader.tiempos_carga)
+            mapas = {
+                'tfidf_matrix': es_mapa(data_loader.tfidf_matrix.data),
+                'vecinos_ids': es_mapa(data_loader.vecinos_ids),
+                'bosque': es_mapa(data_loader.bosque.umbral)
+            }
+            informe['mapeados'] = mapas
+            errores.extend(f"{nombre} no está mapeado en memoria" for nombre, ok in mapas.items() if not ok)
             
-            # Fecha
-            if 'release_date' in row and row['release_date']:
-                date_str = str(row['release_date'])[:10]  # Solo la fecha, sin hora
-            else:
-                date_str = "N/A"
-            table.setItem(i, 2, QTableWidgetItem(date_str))
+            with perfil.medir("Verificación de sumas sha256"):
+                errores.extend(data_loader.verificar_integridad(models_dir))
             
-            # Géneros
-            if 'genres' in row and row['genres']:
-                genres_str = ", ".join(row['genres'][:3])  # Primeros 3 géneros
-                if len(row['genres']) > 3:
-                    genres_str += "..."
-            else:
-                genres_str = "N/A"
-            table.setItem(i, 3, QTableWidgetItem(genres_str))
-        
-        # Ajustar ancho de columnas
-        table.resizeColumnsToContents()
+            with perfil.medir("Primera recomendación y predicción"):
+                corrector = TextCorrector(data_loader.catalogo, entidades=False)
+                recommender = MovieRecommender(data_loader, corrector)
+                titulo = str(data_loader.catalogo.df['title'].iloc[0])
+                recomendaciones, error = recommender.get_movie_recommendations(titulo)
+                if error:
+                    errores.append(error)
+                prediccion, error = MoviePredictor(data_loader).predict_rating(
+                    1e7, 10.0, 100, 2000, 2, 10
+                )
+                if error:
+                    errores.append(error)
+            informe['prueba'] = {
+                'titulo': titulo,
+                'recomendaciones': 0 if recomendaciones is None else len(recomendaciones),
+                'prediccion': None if prediccion is None else float(prediccion)
+            }
+    except Exception as e:
+        errores.append(f"Error durante la verificación: {str(e)}")
+    
+    informe['total_ms'] = (time.perf_counter() - INICIO_PROCESO) * 1000
+    informe['etapas_ms'] = {nombre: duracion * 1000 for nombre, _, duracion, _ in perfil.etapas}
+    informe['ok'] = not errores
+    print(perfil.reporte())
+    for error in errores:
+        print(f"❌ {error}")
+    if ruta_informe:
+        with open(ruta_informe, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False)
+    return 0 if informe['ok'] else 1
 
 
 def main():
     """Función principal"""
+    # En el ejecutable, los procesos que reparten el conteo del TF-IDF
+    # (utils.tfidf) relanzan este mismo programa: deben atender su tarea y
+    # terminar en lugar de abrir la interfaz
+    multiprocessing.freeze_support()
+    if '--verificar-arranque' in sys.argv:
+        # Uso: main.py --verificar-arranque [informe.json]
+        posicion = sys.argv.index('--verificar-arranque') + 1
+        sys.exit(verificar_arranque(sys.argv[posicion] if posicion < len(sys.argv) else None))
+    
     app = QApplication(sys.argv)
     app.setApplicationName("Sistema de Recomendación de Películas")
     app.setApplicationVersion("1.0")
@@ -526,6 +1054,7 @@ def main():
     
     window = MovieRecommendationApp()
     window.show()
+    window.perfil.registrar("Ventana visible", INICIO_PROCESO, time.perf_counter())
     
     sys.exit(app.exec_())
 
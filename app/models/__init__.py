@@ -1,7 +1,11 @@
 from .recommender import MovieRecommender
 from .predictor import MoviePredictor
+from .query_cache import QueryCache
+from .batching import SearchBatcher
 
 __all__ = [
     'MovieRecommender',
-    'MoviePredictor'
+    'MoviePredictor',
+    'QueryCache',
+    'SearchBatcher'
 ]
@@ -0,0 +1,89 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class SearchBatcher:
+    """Agrupa búsquedas semánticas concurrentes en micro-lotes.
+
+    Las consultas que llegan dentro de una ventana corta (espera_ms) se apilan
+    en una matriz Q x V y se puntúan con un solo producto disperso contra el
+    catálogo; cada llamador recibe su resultado a través de un Future.
+    """
+
+    def __init__(self, recommender, max_lote=32, espera_ms=3.0):
+        self.recommender = recommender
+        self.max_lote = max_lote
+        self.espera = espera_ms / 1000.0
+        self._cola = queue.Queue()
+        self._activo = True
+        self.lotes = 0
+        self.consultas = 0
+        self._hilo = threading.Thread(target=self._bucle, name="SearchBatcher", daemon=True)
+        self._hilo.start()
+
+    def enviar(self, query, num_recommendations=10, filtros=None, fusion=None):
+        """Encola una consulta; el Future se resuelve con (resultados, error)"""
+        futuro = Future()
+        if not self._activo:
+            futuro.set_result((None, "El planificador de búsquedas está detenido"))
+            return futuro
+        self._cola.put((query, num_recommendations, filtros, fusion, futuro))
+        return futuro
+
+    def buscar(self, query, num_recommendations=10, filtros=None, fusion=None, timeout=None):
+        """Versión bloqueante con la misma firma que buscar_peliculas_similares"""
+        return self.enviar(query, num_recommendations, filtros, fusion).result(timeout)
+
+    def detener(self):
+        """Termina el hilo tras despachar lo pendiente"""
+        self._activo = False
+        self._cola.put(None)
+        self._hilo.join()
+
+    def estadisticas(self):
+        return {
+            'lotes': self.lotes,
+            'consultas': self.consultas,
+            'tamano_medio_lote': self.consultas / self.lotes if self.lotes else 0.0
+        }
+
+    def _bucle(self):
+        while True:
+            primero = self._cola.get()
+            if primero is None:
+                return
+
+            # Juntar lo que llegue dentro de la ventana, hasta max_lote
+            lote = [primero]
+            limite = time.monotonic() + self.espera
+            fin = False
+            while len(lote) < self.max_lote:
+                restante = limite - time.monotonic()
+                try:
+                    item = self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    fin = True
+                    break
+                lote.append(item)
+
+            self._despachar(lote)
+            if fin:
+                return
+
+    def _despachar(self, lote):
+        queries, ks, filtros, fusion, _ = zip(*lote)
+        try:
+            respuestas = self.recommender.buscar_peliculas_similares_lote(
+                list(queries), list(ks), list(filtros), list(fusion)
+            )
+        except Exception as e:
+            respuestas = [(None, f"Error en la búsqueda: {str(e)}")] * len(lote)
+
+        self.lotes += 1
+        self.consultas += len(lote)
+        for (*_, futuro), respuesta in zip(lote, respuestas):
+            futuro.set_result(respuesta)
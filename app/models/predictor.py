@@ -1,14 +1,25 @@
+import time
+
 import pandas as pd
 
+from utils.metrics import METRICAS
+from .query_log import CAMPOS_PREDICCION, registrada, registrar_lote
+
 
 class MoviePredictor:
     """Sistema de predicción de calificaciones de películas"""
     
-    def __init__(self, data_loader):
+    def __init__(self, data_loader, registro=None):
         self.data_loader = data_loader
-        self.rf_pipeline = data_loader.rf_pipeline
+        # Registro JSONL opcional de las predicciones (models.query_log)
+        self.registro = registro
+        # Random Forest en arrays planos (utils.forest.CompactForest)
+        self.modelo = data_loader.bosque
         self.feature_columns = data_loader.feature_columns
     
+    @METRICAS.medido('predictor.prediccion')
+    @registrada('predict', {'budget': 'budget', 'popularity': 'popularity', 'runtime': 'runtime',
+                            'year': 'year', 'num_genres': 'num_genres', 'num_cast': 'num_cast'})
     def predict_rating(self, budget, popularity, runtime, year, num_genres, num_cast):
         """Predice la calificación de una película basada en sus características"""
         try:
@@ -23,7 +34,7 @@ class MoviePredictor:
             })
             
             # Hacer predicción
-            prediction = self.rf_pipeline.predict(input_data)[0]
+            prediction = self.modelo.predict(input_data[self.feature_columns])[0]
             
             # Asegurar que la predicción esté en el rango válido (0-10)
             prediction = max(0, min(10, prediction))
@@ -33,10 +44,43 @@ class MoviePredictor:
         except Exception as e:
             return None, f"Error en la predicción: {str(e)}"
     
+    @METRICAS.medido('predictor.lote')
+    def predict_ratings(self, filas):
+        """Predice varias calificaciones en una sola llamada al modelo"""
+        inicio = time.perf_counter()
+        predicciones, error = self._predecir_lote(filas)
+        if self.registro is not None:
+            if error is None:
+                resultados = [(p, None) for p in predicciones]
+            else:
+                resultados = [(None, error)] * len(filas)
+            registrar_lote(
+                self.registro, 'predict', [dict(zip(CAMPOS_PREDICCION, fila)) for fila in filas],
+                resultados, (time.perf_counter() - inicio) * 1000, self
+            )
+        return predicciones, error
+    
+    def _predecir_lote(self, filas):
+        try:
+            # Cada fila: (budget, popularity, runtime, year, num_genres, num_cast)
+            input_data = pd.DataFrame(
+                [list(fila) for fila in filas],
+                columns=self.feature_columns
+            )
+            
+            predictions = self.modelo.predict(input_data)
+            METRICAS.contar('predictor.filas', len(input_data))
+            
+            # Asegurar que las predicciones estén en el rango válido (0-10)
+            return predictions.clip(0, 10), None
+            
+        except Exception as e:
+            return None, f"Error en la predicción: {str(e)}"
+    
     def get_feature_importance(self):
         """Obtiene la importancia de las características del modelo"""
         try:
-            importancias = self.rf_pipeline.named_steps['regressor'].feature_importances_
+            importancias = self.modelo.importancias
             
             importance_dict = {}
             for i, feature in enumerate(self.feature_columns):
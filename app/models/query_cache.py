@@ -0,0 +1,77 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class QueryCache:
+    """Caché LRU de resultados de consultas con expiración por tiempo (TTL)"""
+
+    def __init__(self, max_entradas=1024, ttl=3600.0):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.reiniciar_estadisticas()
+
+    def get(self, clave):
+        """Devuelve el valor guardado o None si no existe o expiró"""
+        if self.max_entradas <= 0:
+            return None
+
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+
+            valor, expira = entrada
+            if expira is not None and time.monotonic() > expira:
+                del self._entradas[clave]
+                self.expiraciones += 1
+                self.fallos += 1
+                return None
+
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def put(self, clave, valor):
+        """Guarda un valor, desalojando la entrada menos usada si hace falta"""
+        if self.max_entradas <= 0:
+            return
+
+        expira = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entradas[clave] = (valor, expira)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+                self.desalojos += 1
+
+    def clear(self):
+        """Elimina todas las entradas"""
+        with self._lock:
+            self._entradas.clear()
+
+    def reiniciar_estadisticas(self):
+        """Pone a cero los contadores"""
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.expiraciones = 0
+
+    def estadisticas(self):
+        """Contadores de uso y tasa de aciertos"""
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                'entradas': len(self._entradas),
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'desalojos': self.desalojos,
+                'expiraciones': self.expiraciones,
+                'tasa_aciertos': self.aciertos / total if total else 0.0
+            }
+
+    def __len__(self):
+        return len(self._entradas)
@@ -0,0 +1,240 @@
+"""
+Formato JSONL de consultas: lectura, ejecución y registro.
+
+Cada línea es un objeto con 'tipo' y los mismos campos que el endpoint del
+servidor. El registro (RegistroConsultas) agrega la duración, los ids de los
+resultados (o la predicción) y el error, así que un registro capturado sirve
+tal cual como archivo de consultas para profiler.py y benchmarks.replay.
+"""
+
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+
+
+# Tipos de consulta y sus campos, con los mismos nombres que los endpoints
+# del servidor (/similar, /search, /intelligent, /predict, /weighted, /profile)
+TIPOS = ('similar', 'search', 'intelligent', 'predict', 'weighted', 'profile')
+CAMPOS_PREDICCION = ('budget', 'popularity', 'runtime', 'year', 'num_genres', 'num_cast')
+
+
+def leer_consultas(ruta):
+    """Lee un archivo JSONL de consultas (una por línea, con su 'tipo').
+
+    Devuelve (consultas, error); las líneas vacías se ignoran.
+    """
+    consultas = []
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            for numero, linea in enumerate(f, 1):
+                if not linea.strip():
+                    continue
+                consulta = json.loads(linea)
+                if not isinstance(consulta, dict):
+                    return None, f"Línea {numero}: la consulta debe ser un objeto JSON"
+                error = _validar_consulta(consulta)
+                if error:
+                    return None, f"Línea {numero}: {error}"
+                consultas.append(consulta)
+    except FileNotFoundError:
+        return None, f"No existe el archivo de consultas: {ruta}"
+    except ValueError as e:
+        return None, f"Archivo de consultas inválido: {str(e)}"
+    return consultas, None
+
+
+def _validar_consulta(consulta):
+    """Mensaje de error si la consulta no se puede ejecutar, o None"""
+    if consulta.get('tipo') not in TIPOS:
+        return f"tipo de consulta desconocido {consulta.get('tipo')!r}"
+    try:
+        int(consulta.get('k', 10))
+    except (TypeError, ValueError):
+        return f"'k' debe ser un número entero, no {consulta.get('k')!r}"
+    if consulta['tipo'] == 'predict':
+        faltan = [c for c in CAMPOS_PREDICCION if c not in consulta]
+        if faltan:
+            return f"faltan los campos de predicción {', '.join(faltan)}"
+        try:
+            [float(consulta[c]) for c in CAMPOS_PREDICCION]
+        except (TypeError, ValueError):
+            return "los campos de predicción deben ser numéricos"
+    return None
+
+
+def ejecutar_consulta(consulta, recommender, predictor):
+    """Ejecuta una consulta del archivo y devuelve (resultado, error)"""
+    tipo = consulta['tipo']
+    k = int(consulta.get('k', 10))
+    filtros, fusion = consulta.get('filtros'), consulta.get('fusion')
+    if tipo == 'similar':
+        return recommender.get_movie_recommendations(consulta.get('title', ''), k, filtros, fusion)
+    if tipo == 'search':
+        return recommender.buscar_peliculas_similares(consulta.get('query', ''), k, filtros, fusion)
+    if tipo == 'intelligent':
+        return recommender.buscar_inteligente(
+            consulta.get('pelicula', ''), consulta.get('actores', ''),
+            consulta.get('directores', ''), k, filtros, fusion
+        )
+    if tipo == 'weighted':
+        # Con 'title' pondera la similitud a esa película; si no, busca 'query'
+        if consulta.get('title'):
+            return recommender.recomendar_ponderado(consulta['title'], consulta.get('pesos'), k,
+                                                    filtros, fusion)
+        return recommender.buscar_ponderada(consulta.get('query', ''), consulta.get('pesos'), k,
+                                            filtros, fusion)
+    if tipo == 'profile':
+        return recommender.recommend_for_profile(
+            consulta.get('titles', []), consulta.get('exclude_seen', True), k, filtros, fusion
+        )
+    return predictor.predict_rating(*(float(consulta[c]) for c in CAMPOS_PREDICCION))
+
+
+def consultas_de_catalogo(catalogo, cantidad=200, semilla=0):
+    """Mezcla de consultas sacadas del catálogo, para cuando no hay archivo"""
+    import numpy as np
+
+    rng = np.random.default_rng(semilla)
+    df = catalogo.df
+    consultas = []
+    for i in rng.integers(0, len(df), cantidad):
+        titulo = str(df['title'].iat[i])
+        tipo = TIPOS[len(consultas) % len(TIPOS)]
+        if tipo == 'similar':
+            consultas.append({'tipo': tipo, 'title': titulo})
+        elif tipo == 'search':
+            palabras = str(df['overview'].iat[i]).split()[:4]
+            consultas.append({'tipo': tipo, 'query': ' '.join(palabras) or titulo})
+        elif tipo == 'intelligent':
+            reparto = catalogo.reparto_de(i)
+            consultas.append({
+                'tipo': tipo, 'pelicula': titulo,
+                'actores': reparto[0] if reparto else '',
+                'directores': str(catalogo.director_de(i))
+            })
+        elif tipo == 'weighted':
+            consultas.append({'tipo': tipo, 'title': titulo,
+                              'pesos': {'reparto': 2.0, 'director': 2.0, 'sinopsis': 0.5}})
+        elif tipo == 'profile':
+            semillas = rng.integers(0, len(df), int(rng.integers(2, 20)))
+            consultas.append({'tipo': tipo, 'titles': [str(df['title'].iat[j]) for j in semillas]})
+        else:
+            anio = df['release_year'].iat[i]
+            consultas.append({
+                'tipo': tipo, 'budget': float(df['budget'].iat[i]),
+                'popularity': float(df['popularity'].iat[i]), 'runtime': float(df['runtime'].iat[i]),
+                # Sin fecha el año es NaN
+                'year': float(anio) if anio == anio else 2000.0,
+                'num_genres': float(df['num_genres'].iat[i]), 'num_cast': float(df['num_cast'].iat[i])
+            })
+    return consultas
+
+
+def ids_resultado(df, resultado):
+    """Ids de TMDb de las filas de un DataFrame de resultados"""
+    if resultado is None:
+        return None
+    # Los resultados conservan la posición de cada película en el catálogo
+    return [int(i) for i in df['id'].to_numpy()[resultado.index.to_numpy()]]
+
+
+class RegistroConsultas:
+    """Anota cada consulta atendida como una línea JSONL.
+
+    Cada línea se escribe con una sola llamada a os.write sobre un archivo
+    abierto en modo append, así que varios hilos o procesos (prefork) pueden
+    compartir el archivo sin mezclar líneas.
+    """
+
+    VARIABLE_ENTORNO = 'MOVIE_REGISTRO_CONSULTAS'
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._fd = os.open(ruta, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._local = threading.local()
+        self.registradas = 0
+
+    @classmethod
+    def desde_entorno(cls):
+        """Registro en la ruta de MOVIE_REGISTRO_CONSULTAS, o None si no está definida"""
+        ruta = os.environ.get(cls.VARIABLE_ENTORNO)
+        return cls(ruta) if ruta else None
+
+    def registrar(self, entrada):
+        linea = json.dumps(entrada, ensure_ascii=False, separators=(',', ':'), default=str)
+        os.write(self._fd, (linea + "\n").encode('utf-8'))
+        self.registradas += 1
+
+    def cerrar(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def registrada(tipo, campos):
+    """Decorador de los métodos de consulta de MovieRecommender y MoviePredictor.
+
+    campos: parámetro del método -> campo del registro. Si self.registro es
+    None no hace nada más que llamar al método. Las consultas que otra
+    consulta hace por dentro (la búsqueda inteligente sin filtros llama a la
+    búsqueda semántica) no se registran por separado.
+    """
+    def decorador(metodo):
+        firma = inspect.signature(metodo)
+
+        @functools.wraps(metodo)
+        def envoltura(self, *args, **kwargs):
+            registro = self.registro
+            if registro is None or getattr(registro._local, 'en_curso', False):
+                return metodo(self, *args, **kwargs)
+
+            registro._local.en_curso = True
+            inicio = time.perf_counter()
+            try:
+                resultado, error = metodo(self, *args, **kwargs)
+            finally:
+                registro._local.en_curso = False
+            ms = (time.perf_counter() - inicio) * 1000
+
+            argumentos = firma.bind(self, *args, **kwargs)
+            argumentos.apply_defaults()
+            entrada = {'tipo': tipo}
+            entrada.update((campo, registrable(argumentos.arguments[p])) for p, campo in campos.items())
+            entrada.update(_resultado(tipo, self, resultado), ms=round(ms, 3), error=error,
+                           t=round(time.time(), 3))
+            registro.registrar(entrada)
+            return resultado, error
+        return envoltura
+    return decorador
+
+
+def registrable(valor):
+    """Valor de un argumento tal como se anota en el registro.
+
+    Los filtros dados como arrays de bits (utils.filtros) no tienen nombre con
+    el que reproducirlos: se anotan como null y al reejecutar se ignoran.
+    """
+    if hasattr(valor, 'dtype'):
+        return None
+    if isinstance(valor, (list, tuple)) and any(hasattr(v, 'dtype') for v in valor):
+        return [registrable(v) for v in valor]
+    return valor
+
+
+def registrar_lote(registro, tipo, entradas, resultados, ms, origen):
+    """Anota las consultas de un lote; cada una lleva la duración del lote completo"""
+    t = round(time.time(), 3)
+    for entrada, (resultado, error) in zip(entradas, resultados):
+        registro.registrar(dict(
+            {'tipo': tipo}, **entrada, **_resultado(tipo, origen, resultado),
+            ms=round(ms, 3), error=error, t=t, lote=len(entradas)
+        ))
+
+
+def _resultado(tipo, origen, resultado):
+    if tipo == 'predict':
+        return {'prediccion': None if resultado is None else round(float(resultado), 6)}
+    return {'ids': ids_resultado(origen.df, resultado)}
@@ -1,191 +1,718 @@
+import time
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
+
+from utils.filtros import FiltrosCatalogo
+from utils.fusion import SenalesCatalogo
+from utils.validators import normalize_text
+from utils.metrics import METRICAS
+from utils.ranking import top_k_indices
+from utils.tfidf import CodificadorConsultas
+from .query_cache import QueryCache
+from .query_log import registrada, registrar_lote, registrable
+
+# Correcciones de títulos y nombres que se memorizan por versión de artefactos
+MAX_CORRECCIONES = 4096
 
 
 class MovieRecommender:
     """Sistema de recomendación de películas basado en contenido"""
     
-    def __init__(self, data_loader, text_corrector):
+    def __init__(self, data_loader, text_corrector, cache=None, registro=None):
         self.data_loader = data_loader
         self.text_corrector = text_corrector
-        self.df = data_loader.df
-        self.tfidf = data_loader.tfidf
-        self.tfidf_matrix = data_loader.tfidf_matrix
-        self.cosine_sim = data_loader.cosine_sim
+        self.cache = cache if cache is not None else QueryCache()
+        # Registro JSONL opcional de las consultas atendidas (models.query_log)
+        self.registro = registro
+        self._version = None
+        self._sincronizar()
+    
+    def _sincronizar(self):
+        """Toma los artefactos del DataLoader si fueron recargados"""
+        version = self.data_loader.version_artefactos
+        if version == self._version:
+            return
+        
+        self.df = self.data_loader.df
+        self.catalogo = self.data_loader.catalogo
+        self.tfidf = self.data_loader.tfidf
+        self.tfidf_matrix = self.data_loader.tfidf_matrix
+        self.codificador = CodificadorConsultas.desde_vectorizador(self.tfidf)
+        self.indice_campos = self.data_loader.indice_campos
+        self.vecinos_ids = self.data_loader.vecinos_ids
+        self.vecinos_scores = self.data_loader.vecinos_scores
+        # Los filtros registrados se refieren a filas del catálogo anterior:
+        # hay que volver a registrarlos después de recargar
+        self.filtros = FiltrosCatalogo(self.catalogo)
+        self.senales = SenalesCatalogo(self.catalogo)
+        # Memo propio de correcciones: no ocupa ni altera las estadísticas de
+        # la caché de resultados y sigue activo aunque esta esté deshabilitada
+        self._correccion = lru_cache(maxsize=MAX_CORRECCIONES)(self._corregir_sin_memo)
+        self._version = version
+        # Las claves incluyen la versión; limpiar solo libera memoria
+        self.cache.clear()
+    
+    def _desde_cache(self, clave):
+        """Copia del resultado guardado para la clave, o None"""
+        resultado = self.cache.get(clave)
+        return resultado.copy() if resultado is not None else None
+    
+    def _guardar_en_cache(self, clave, resultado):
+        """Guarda una copia del resultado para que el llamador pueda modificarlo"""
+        self.cache.put(clave, resultado.copy())
+    
+    def _permitidos(self, filtros):
+        """Máscara de películas permitidas por los filtros y su clave de caché.
+
+        (None, None) sin filtros; lanza ValueError si alguno no es válido.
+        """
+        return self.filtros.mascara(filtros)
+    
+    def _hibrido(self, fusion):
+        """Puntaje híbrido de la configuración de fusión y su clave de caché.
+        
+        (None, None) si el ranking es solo por similitud; lanza ValueError si
+        la configuración no es válida.
+        """
+        hibrido = self.senales.hibrido(fusion)
+        return hibrido, (hibrido.clave if hibrido is not None else None)
+    
+    def _vectorizar(self, textos):
+        """Vectores TF-IDF de las consultas, idénticos a los de tfidf.transform"""
+        if self.codificador is not None:
+            return self.codificador.codificar(textos)
+        return self.tfidf.transform(textos)
+    
+    def _similitudes(self, query_vecs, filas=None):
+        """Similitud coseno de cada consulta con el catálogo (o con esas filas), Q x N.
+        
+        Las filas de la matriz TF-IDF ya tienen norma 1: basta normalizar las
+        consultas y hacer un producto, sin validar ni copiar la matriz, que
+        puede estar mapeada en memoria y compartida entre procesos.
+        """
+        consultas = query_vecs.toarray()
+        normas = np.linalg.norm(consultas, axis=1, keepdims=True)
+        np.divide(consultas, normas, out=consultas, where=normas > 0)
+        matriz = self.tfidf_matrix if filas is None else self.tfidf_matrix[filas]
+        return np.asarray(matriz @ consultas.T).T
+    
+    def _corregir_sin_memo(self, entidad, texto):
+        if entidad == 'titulo':
+            return self.text_corrector.corregir_titulo(texto) or texto
+        return self.text_corrector.corregir_nombre_entidad(texto, entidad)
     
-    def get_movie_recommendations(self, title, num_recommendations=10):
-        """Obtiene recomendaciones para una película específica por título"""
+    def _corregir_titulo(self, query):
+        """Corrección de título memorizada para la versión actual"""
+        # El desempate usa el texto original, así que la clave es la consulta tal cual
+        return self._correccion('titulo', query)
+    
+    def _corregir_entidad(self, nombre, entidad):
+        """Corrección de actor/director memorizada para la versión actual"""
+        return self._correccion(entidad, normalize_text(nombre))
+    
+    @METRICAS.medido('recomendador.similares')
+    @registrada('similar', {'title': 'title', 'num_recommendations': 'k', 'filtros': 'filtros',
+                            'fusion': 'fusion'})
+    def get_movie_recommendations(self, title, num_recommendations=10, filtros=None, fusion=None):
+        """Obtiene recomendaciones para una película específica por título.
+        
+        filtros: restringe los resultados (ver utils.filtros); se devuelven
+        num_recommendations películas siempre que haya suficientes permitidas.
+        fusion: ordena por similitud combinada con popularidad y rating (ver
+        utils.fusion); el resultado trae además la columna hybrid_score.
+        """
         try:
+            METRICAS.contar('recomendador.similares.consultas')
+            self._sincronizar()
+            permitidos, clave_filtros = self._permitidos(filtros)
+            hibrido, clave_fusion = self._hibrido(fusion)
+            clave = ('recomendaciones', title.lower(), num_recommendations, clave_filtros,
+                     clave_fusion, self._version)
+            cacheado = self._desde_cache(clave)
+            if cacheado is not None:
+                METRICAS.contar('recomendador.similares.cache_aciertos')
+                return cacheado, None
+            
             # Buscar índice de la película por título
-            idx = self.df[self.df['title'].str.lower() == title.lower()].index
+            idx = self.catalogo.indice_titulo(title)
             
-            if len(idx) == 0:
+            if idx is None:
                 return None, f"Película '{title}' no encontrada en el dataset"
             
-            idx = idx[0]
-            
-            # Obtener puntuaciones de similitud para esa película
-            sim_scores = list(enumerate(self.cosine_sim[idx]))
-            
-            # Ordenar por similitud de mayor a menor
-            sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
-            
-            # Obtener índices de las películas más similares (excluyendo la misma)
-            movie_indices = [i[0] for i in sim_scores[1:num_recommendations+1]]
+            # Vecinos más similares. La propia película se excluye por índice:
+            # con perfiles idénticos el empate se resuelve por posición y no
+            # siempre queda primera
+            with METRICAS.tramo('recomendador.similares.vecinos'):
+                movie_indices = None
+                if permitidos is not None:
+                    permitidos[idx] = False
+                if hibrido is not None:
+                    if permitidos is None:
+                        permitidos = np.ones(len(self.df), dtype=bool)
+                        permitidos[idx] = False
+                    movie_indices, scores, hibridos = self._vecinos_hibridos(
+                        idx, num_recommendations, permitidos, hibrido
+                    )
+                else:
+                    # Vecinos precalculados que no son la película y pasan el filtro, si alcanzan
+                    vecinos = np.asarray(self.vecinos_ids[idx], dtype=np.int64)
+                    pasan = vecinos != idx
+                    if permitidos is not None:
+                        pasan &= permitidos[vecinos]
+                    pasan = np.flatnonzero(pasan)[:num_recommendations]
+                    if len(pasan) == num_recommendations:
+                        movie_indices = vecinos[pasan].tolist()
+                        scores = np.asarray(self.vecinos_scores[idx])[pasan].tolist()
+                
+                if movie_indices is None:
+                    # Más de los precalculados (o el filtro deja pocos): fila completa.
+                    # Las filas tienen norma 1, así que el producto por la fila
+                    # densa es la similitud coseno sin renormalizar la matriz
+                    sim_scores = self.tfidf_matrix @ self.tfidf_matrix[idx].toarray().ravel()
+                    if permitidos is None:
+                        mejores = top_k_indices(sim_scores, num_recommendations + 1)
+                        mejores = mejores[mejores != idx][:num_recommendations]
+                    else:
+                        mejores = top_k_indices(sim_scores, num_recommendations, permitidos)
+                    movie_indices = mejores.tolist()
+                    scores = sim_scores[mejores].tolist()
+                    METRICAS.contar('recomendador.similares.candidatos_puntuados', len(sim_scores))
             
             # Crear DataFrame con resultados
-            recommendations = self.df.iloc[movie_indices][
-                ['title', 'vote_average', 'popularity', 'release_date', 'genres']
-            ].copy()
-            
-            recommendations['similarity_score'] = [
-                score[1] for score in sim_scores[1:num_recommendations+1]
-            ]
+            with METRICAS.tramo('recomendador.similares.armado'):
+                recommendations = self.catalogo.filas(
+                    movie_indices,
+                    ['title', 'vote_average', 'popularity', 'release_date', 'genres']
+                )
+                recommendations['similarity_score'] = scores
+                if hibrido is not None:
+                    recommendations['hybrid_score'] = hibridos
             
+            self._guardar_en_cache(clave, recommendations)
             return recommendations, None
             
         except Exception as e:
             return None, f"Error al obtener recomendaciones: {str(e)}"
     
-    def buscar_peliculas_similares(self, query, num_recommendations=10):
-        """Búsqueda semántica de películas similares"""
+    def _vecinos_hibridos(self, idx, k, permitidos, hibrido):
+        """Los k permitidos con mayor puntaje híbrido frente a la fila idx.
+        
+        Devuelve (índices, similitudes, puntajes). Una película fuera de la
+        tabla de vecinos no supera la similitud mínima de la fila, así que
+        solo puede alcanzar al k-ésimo mejor de la tabla si su término previo
+        (popularidad y rating) es lo bastante alto: se puntúan la tabla y esas
+        filas en vez del catálogo completo, con el mismo resultado.
+        """
+        fila = self.tfidf_matrix[idx].toarray().ravel()
+        vecinos = np.asarray(self.vecinos_ids[idx], dtype=np.int64)
+        sims = self.tfidf_matrix[vecinos] @ fila
+        pasan = permitidos[vecinos]
+        if k > 0 and pasan.sum() >= k:
+            puntajes = hibrido.puntuar(sims[pasan], vecinos[pasan])
+            umbral = np.partition(puntajes, len(puntajes) - k)[len(puntajes) - k]
+            # Margen por el redondeo entre la tabla (cosine_similarity) y el producto
+            extra = hibrido.filas_con_previo(umbral - hibrido.termino_similitud(sims.min()) - 1e-9)
+            extra = extra[permitidos[extra] & ~np.isin(extra, vecinos)]
+            if len(extra) < len(permitidos) // 4:
+                candidatos = np.concatenate([vecinos[pasan], extra])
+                sims_candidatos = np.concatenate([sims[pasan], self.tfidf_matrix[extra] @ fila])
+                # Por índice, para desempatar igual que sobre el catálogo completo
+                orden = np.argsort(candidatos)
+                candidatos, sims_candidatos = candidatos[orden], sims_candidatos[orden]
+                puntajes = hibrido.puntuar(sims_candidatos, candidatos)
+                mejores = top_k_indices(puntajes, k)
+                METRICAS.contar('recomendador.similares.candidatos_puntuados', len(candidatos))
+                return (candidatos[mejores].tolist(), sims_candidatos[mejores].tolist(),
+                        puntajes[mejores].tolist())
+        
+        sim_scores = self.tfidf_matrix @ fila
+        puntajes = hibrido.puntuar(sim_scores)
+        mejores = top_k_indices(puntajes, k, permitidos)
+        METRICAS.contar('recomendador.similares.candidatos_puntuados', len(sim_scores))
+        return mejores.tolist(), sim_scores[mejores].tolist(), puntajes[mejores].tolist()
+    
+    @METRICAS.medido('recomendador.busqueda')
+    @registrada('search', {'query': 'query', 'num_recommendations': 'k', 'filtros': 'filtros',
+                           'fusion': 'fusion'})
+    def buscar_peliculas_similares(self, query, num_recommendations=10, filtros=None, fusion=None):
+        """Búsqueda semántica de películas similares (filtros y fusion: ver get_movie_recommendations)"""
         try:
             if not query or not query.strip():
                 return None, "La consulta no puede estar vacía"
             
+            METRICAS.contar('recomendador.busqueda.consultas')
+            self._sincronizar()
+            permitidos, clave_filtros = self._permitidos(filtros)
+            hibrido, clave_fusion = self._hibrido(fusion)
+            
             # Corregir ortografía del título si es posible
-            query_corregido = self.text_corrector.corregir_titulo(query)
-            if not query_corregido:
-                query_corregido = query
+            with METRICAS.tramo('recomendador.busqueda.correccion'):
+                query_corregido = self._corregir_titulo(query)
+            
+            clave = ('similares', query_corregido.lower(), num_recommendations, clave_filtros,
+                     clave_fusion, self._version)
+            cacheado = self._desde_cache(clave)
+            if cacheado is not None:
+                METRICAS.contar('recomendador.busqueda.cache_aciertos')
+                return cacheado, None
             
             # Vectorizar consulta del usuario
-            query_vec = self.tfidf.transform([query_corregido.lower()])
+            with METRICAS.tramo('recomendador.busqueda.transformacion'):
+                query_vec = self._vectorizar([query_corregido.lower()])
             
             # Calcular similitud coseno contra todas las películas
-            sim_scores = cosine_similarity(query_vec, self.tfidf_matrix).flatten()
+            with METRICAS.tramo('recomendador.busqueda.puntuacion'):
+                sim_scores = self._similitudes(query_vec)[0]
+            METRICAS.contar('recomendador.busqueda.candidatos_puntuados', len(sim_scores))
             
-            # Buscar si hay coincidencia exacta (case-insensitive)
-            idx_exact = self.df[self.df['title'].str.lower() == query_corregido.lower()].index
-            movie_indices = sim_scores.argsort()[-num_recommendations:][::-1]
+            recommendations = self._armar_similares(query_corregido, sim_scores, num_recommendations,
+                                                    permitidos, hibrido)
+            
+            self._guardar_en_cache(clave, recommendations)
+            return recommendations, None
+            
+        except Exception as e:
+            return None, f"Error en la búsqueda: {str(e)}"
+    
+    def _armar_similares(self, query_corregido, sim_scores, num_recommendations, permitidos=None,
+                         hibrido=None):
+        """Arma el DataFrame de resultados a partir de las similitudes de una consulta"""
+        with METRICAS.tramo('recomendador.busqueda.top_k'):
+            # Buscar si hay coincidencia exacta (case-insensitive) que pase el filtro
+            idx_exact = self.catalogo.indice_titulo(query_corregido)
+            if idx_exact is not None and permitidos is not None and not permitidos[idx_exact]:
+                idx_exact = None
+            ranking = sim_scores if hibrido is None else hibrido.puntuar(sim_scores)
+            movie_indices = top_k_indices(ranking, num_recommendations, permitidos).tolist()
             
             # Si hay coincidencia exacta, ponerla primero
-            if not idx_exact.empty:
-                idx_exact = idx_exact[0]
+            if idx_exact is not None and num_recommendations > 0:
                 indices_finales = [idx_exact] + [i for i in movie_indices if i != idx_exact][:num_recommendations-1]
             else:
-                indices_finales = movie_indices[:num_recommendations]
-            
-            # Crear DataFrame con resultados
-            recommendations = self.df.iloc[indices_finales][
+                indices_finales = movie_indices
+        
+        # Crear DataFrame con resultados
+        with METRICAS.tramo('recomendador.busqueda.armado'):
+            recommendations = self.catalogo.filas(
+                indices_finales,
                 ['title', 'vote_average', 'release_date', 'genres']
-            ].copy()
-            
+            )
             recommendations['similarity_score'] = sim_scores[indices_finales]
+            if hibrido is not None:
+                recommendations['hybrid_score'] = ranking[indices_finales]
+        return recommendations
+    
+    @METRICAS.medido('recomendador.lote')
+    def buscar_peliculas_similares_lote(self, queries, num_recommendations=10, filtros=None, fusion=None):
+        """Búsqueda semántica de varias consultas con un solo producto matricial.
+        
+        filtros, fusion: None o una lista con el valor de cada consulta. Devuelve una
+        lista de tuplas (resultados, error) en el mismo orden que las
+        consultas; cada resultado es idéntico al de buscar_peliculas_similares.
+        """
+        inicio = time.perf_counter()
+        if isinstance(num_recommendations, int):
+            num_recommendations = [num_recommendations] * len(queries)
+        if filtros is None:
+            filtros = [None] * len(queries)
+        if fusion is None:
+            fusion = [None] * len(queries)
+        
+        respuestas = [None] * len(queries)
+        pendientes = []
+        try:
+            self._sincronizar()
             
-            return recommendations, None
+            for i, (query, k, filtro, configuracion) in enumerate(zip(queries, num_recommendations,
+                                                                      filtros, fusion)):
+                if not query or not query.strip():
+                    respuestas[i] = (None, "La consulta no puede estar vacía")
+                    continue
+                try:
+                    permitidos, clave_filtros = self._permitidos(filtro)
+                    hibrido, clave_fusion = self._hibrido(configuracion)
+                except ValueError as e:
+                    respuestas[i] = (None, f"Error en la búsqueda: {str(e)}")
+                    continue
+                
+                query_corregido = self._corregir_titulo(query)
+                clave = ('similares', query_corregido.lower(), k, clave_filtros, clave_fusion,
+                         self._version)
+                cacheado = self._desde_cache(clave)
+                if cacheado is not None:
+                    respuestas[i] = (cacheado, None)
+                else:
+                    pendientes.append((i, query_corregido, k, permitidos, hibrido, clave))
+            
+            METRICAS.contar('recomendador.lote.consultas', len(queries))
+            if pendientes:
+                # Q x V consultas contra todo el catálogo en una sola operación
+                with METRICAS.tramo('recomendador.lote.transformacion'):
+                    query_vecs = self._vectorizar([pendiente[1].lower() for pendiente in pendientes])
+                with METRICAS.tramo('recomendador.lote.puntuacion'):
+                    sim_matrix = self._similitudes(query_vecs)
+                METRICAS.contar('recomendador.lote.candidatos_puntuados', sim_matrix.size)
+                
+                for (i, query_corregido, k, permitidos, hibrido, clave), sim_scores in zip(pendientes, sim_matrix):
+                    recommendations = self._armar_similares(query_corregido, sim_scores, k, permitidos, hibrido)
+                    self._guardar_en_cache(clave, recommendations)
+                    respuestas[i] = (recommendations, None)
             
         except Exception as e:
-            return None, f"Error en la búsqueda: {str(e)}"
+            error = f"Error en la búsqueda: {str(e)}"
+            respuestas = [r if r is not None else (None, error) for r in respuestas]
+        
+        if self.registro is not None:
+            registrar_lote(
+                self.registro, 'search',
+                [{'query': q, 'k': k, 'filtros': registrable(f), 'fusion': c}
+                 for q, k, f, c in zip(queries, num_recommendations, filtros, fusion)],
+                respuestas, (time.perf_counter() - inicio) * 1000, self
+            )
+        return respuestas
     
-    def buscar_inteligente(self, pelicula="", actores="", directores="", top_n=10):
-        """Búsqueda inteligente con filtros específicos"""
+    @METRICAS.medido('recomendador.inteligente')
+    @registrada('intelligent', {'pelicula': 'pelicula', 'actores': 'actores',
+                                'directores': 'directores', 'top_n': 'k', 'filtros': 'filtros',
+                                'fusion': 'fusion'})
+    def buscar_inteligente(self, pelicula="", actores="", directores="", top_n=10, filtros=None,
+                           fusion=None):
+        """Búsqueda inteligente con filtros específicos (y los de utils.filtros)"""
         try:
-            # Filtrado por actores
-            idxs = None
+            METRICAS.contar('recomendador.inteligente.consultas')
+            self._sincronizar()
+            permitidos, clave_filtros = self._permitidos(filtros)
+            hibrido, clave_fusion = self._hibrido(fusion)
             
-            if actores.strip():
+            with METRICAS.tramo('recomendador.inteligente.correccion'):
                 actores_lista = [
-                    self.text_corrector.corregir_nombre_entidad(a.strip(), 'actor') 
+                    self._corregir_entidad(a.strip(), 'actor') 
                     for a in actores.split(',') if a.strip()
                 ]
-                sets = [
-                    self.text_corrector.actor_index[a] 
-                    for a in actores_lista 
-                    if a in self.text_corrector.actor_index
-                ]
-                if sets:
-                    idxs = set.intersection(*sets) if len(sets) > 1 else sets[0].copy()
-                else:
-                    idxs = set()
-            
-            # Filtrado por directores
-            if directores.strip():
                 directores_lista = [
-                    self.text_corrector.corregir_nombre_entidad(d.strip(), 'director') 
+                    self._corregir_entidad(d.strip(), 'director') 
                     for d in directores.split(',') if d.strip()
                 ]
-                sets = [
-                    self.text_corrector.director_index[d] 
-                    for d in directores_lista 
-                    if d in self.text_corrector.director_index
-                ]
-                if sets:
-                    director_idxs = set.intersection(*sets) if len(sets) > 1 else sets[0].copy()
-                    idxs = (idxs & director_idxs) if idxs is not None else director_idxs
-                else:
-                    idxs = set() if idxs is None else set()
+            
+            clave = ('inteligente', pelicula.lower(), tuple(actores_lista),
+                     tuple(directores_lista), top_n, clave_filtros, clave_fusion, self._version)
+            cacheado = self._desde_cache(clave)
+            if cacheado is not None:
+                METRICAS.contar('recomendador.inteligente.cache_aciertos')
+                return cacheado, None
+            
+            with METRICAS.tramo('recomendador.inteligente.filtrado'):
+                # Filtrado por actores
+                idxs = None
+                
+                if actores_lista:
+                    sets = [
+                        self.text_corrector.actor_index[a] 
+                        for a in actores_lista 
+                        if a in self.text_corrector.actor_index
+                    ]
+                    if sets:
+                        idxs = set.intersection(*sets) if len(sets) > 1 else sets[0].copy()
+                    else:
+                        idxs = set()
+                
+                # Filtrado por directores
+                if directores_lista:
+                    sets = [
+                        self.text_corrector.director_index[d] 
+                        for d in directores_lista 
+                        if d in self.text_corrector.director_index
+                    ]
+                    if sets:
+                        director_idxs = set.intersection(*sets) if len(sets) > 1 else sets[0].copy()
+                        idxs = (idxs & director_idxs) if idxs is not None else director_idxs
+                    else:
+                        idxs = set() if idxs is None else set()
+                
+                if idxs and permitidos is not None:
+                    idxs = {i for i in idxs if permitidos[i]}
             
             # Si no hay filtros específicos o no hay resultados, usar búsqueda semántica global
             if idxs is None or not idxs:
-                return self.buscar_peliculas_similares(pelicula, num_recommendations=top_n)
+                METRICAS.contar('recomendador.inteligente.sin_filtro')
+                recs, error = self.buscar_peliculas_similares(pelicula, num_recommendations=top_n,
+                                                              filtros=filtros, fusion=fusion)
+                if error is None:
+                    self._guardar_en_cache(clave, recs)
+                return recs, error
             
             # Ranking semántico dentro del subconjunto filtrado
-            q_vec = self.tfidf.transform([pelicula.lower()]) if pelicula.strip() else self.tfidf.transform([""])
-            idx_list = list(idxs)
-            sims = cosine_similarity(q_vec, self.tfidf_matrix[idx_list]).flatten()
-            
-            ranked = sorted(
-                zip(idx_list, sims),
-                key=lambda x: x[1],
-                reverse=True
-            )
-            
-            resultados_idx = [i for i, _ in ranked][:top_n]
-            
-            # Priorizar coincidencia exacta en el subconjunto filtrado
-            if pelicula.strip():
-                idx_exact = [
-                    i for i in resultados_idx 
-                    if self.df.iloc[i]['title'].lower() == pelicula.lower()
-                ]
-                if idx_exact:
-                    resultados_idx = idx_exact + [i for i in resultados_idx if i not in idx_exact]
-                    resultados_idx = resultados_idx[:top_n]
+            METRICAS.contar('recomendador.inteligente.filas_filtradas', len(idxs))
+            with METRICAS.tramo('recomendador.inteligente.transformacion'):
+                q_vec = self._vectorizar([pelicula.lower()])
+            with METRICAS.tramo('recomendador.inteligente.puntuacion'):
+                idx_list = list(idxs)
+                sims = self._similitudes(q_vec, idx_list)[0]
+                puntajes = sims if hibrido is None else hibrido.puntuar(sims, idx_list)
+            METRICAS.contar('recomendador.inteligente.candidatos_puntuados', len(idx_list))
             
-            # Crear DataFrame con resultados
-            recs = self.df.iloc[resultados_idx][
-                ['title', 'vote_average', 'release_date', 'genres']
-            ].copy()
+            with METRICAS.tramo('recomendador.inteligente.top_k'):
+                # Posiciones dentro de idx_list, de mayor a menor puntaje
+                ranked = sorted(
+                    range(len(idx_list)),
+                    key=lambda p: puntajes[p],
+                    reverse=True
+                )
+                
+                # Priorizar coincidencia exacta en el subconjunto filtrado, antes de
+                # cortar: así la página de k resultados es prefijo de la de k' > k
+                if pelicula.strip():
+                    pos_exact = [
+                        p for p in ranked 
+                        if str(self.df['title'].iat[idx_list[p]]).lower() == pelicula.lower()
+                    ]
+                    if pos_exact:
+                        exactas = set(pos_exact)
+                        ranked = pos_exact + [p for p in ranked if p not in exactas]
+                
+                posiciones = ranked[:top_n]
+                resultados_idx = [idx_list[p] for p in posiciones]
             
-            recs['similarity_score'] = [
-                cosine_similarity(q_vec, self.tfidf_matrix[[i]]).flatten()[0]
-                for i in resultados_idx
-            ]
+            # Crear DataFrame con resultados; los scores salen del mismo producto
+            with METRICAS.tramo('recomendador.inteligente.armado'):
+                recs = self.catalogo.filas(
+                    resultados_idx,
+                    ['title', 'vote_average', 'release_date', 'genres']
+                )
+                
+                recs['similarity_score'] = sims[posiciones]
+                if hibrido is not None:
+                    recs['hybrid_score'] = puntajes[posiciones]
             
+            self._guardar_en_cache(clave, recs)
             return recs, None
             
         except Exception as e:
             return None, f"Error en la búsqueda inteligente: {str(e)}"
     
+    @METRICAS.medido('recomendador.perfil')
+    @registrada('profile', {'seed_titles': 'titles', 'exclude_seen': 'exclude_seen',
+                            'num_recommendations': 'k', 'filtros': 'filtros', 'fusion': 'fusion'})
+    def recommend_for_profile(self, seed_titles, exclude_seen=True, num_recommendations=10,
+                              filtros=None, fusion=None):
+        """Recomendaciones para una lista de películas que le gustaron al usuario.
+        
+        seed_titles: lista de títulos o diccionario título -> peso (por ejemplo
+        la calificación del usuario). Se puntúa todo el catálogo contra el
+        centroide ponderado de las filas TF-IDF de las semillas con un solo
+        producto disperso, así que la latencia no depende de cuántas semillas
+        haya. Los títulos que no están en el catálogo se ignoran; con
+        exclude_seen las semillas no aparecen en los resultados. filtros y
+        fusion: ver get_movie_recommendations.
+        """
+        try:
+            METRICAS.contar('recomendador.perfil.consultas')
+            self._sincronizar()
+            permitidos, clave_filtros = self._permitidos(filtros)
+            hibrido, clave_fusion = self._hibrido(fusion)
+            
+            if isinstance(seed_titles, str):
+                seed_titles = [seed_titles]
+            pesos_titulos = (dict(seed_titles) if isinstance(seed_titles, dict)
+                             else {t: 1.0 for t in seed_titles})
+            
+            # Semillas repetidas (mismo título con otra capitalización) suman su peso
+            pesos = {}
+            for titulo, peso in pesos_titulos.items():
+                try:
+                    peso = float(peso)
+                except (TypeError, ValueError):
+                    return None, f"El peso de '{titulo}' debe ser numérico"
+                if not (np.isfinite(peso) and peso > 0):
+                    return None, f"El peso de '{titulo}' debe ser un número positivo"
+                idx = self.catalogo.indice_titulo(str(titulo))
+                if idx is not None:
+                    pesos[idx] = pesos.get(idx, 0.0) + peso
+            if not pesos:
+                return None, "Ninguna de las películas indicadas está en el dataset"
+            
+            semillas = sorted(pesos)
+            clave = ('perfil', tuple((i, pesos[i]) for i in semillas), bool(exclude_seen),
+                     num_recommendations, clave_filtros, clave_fusion, self._version)
+            cacheado = self._desde_cache(clave)
+            if cacheado is not None:
+                METRICAS.contar('recomendador.perfil.cache_aciertos')
+                return cacheado, None
+            
+            with METRICAS.tramo('recomendador.perfil.centroide'):
+                filas = self.tfidf_matrix[semillas]
+                centroide = np.asarray(filas.T @ np.array([pesos[i] for i in semillas])).ravel()
+                norma = np.linalg.norm(centroide)
+            
+            with METRICAS.tramo('recomendador.perfil.puntuacion'):
+                # Las filas de la matriz tienen norma 1: el producto por el
+                # centroide normalizado es la similitud coseno
+                sim_scores = self.tfidf_matrix @ (centroide / norma if norma else centroide)
+            METRICAS.contar('recomendador.perfil.candidatos_puntuados', len(sim_scores))
+            
+            with METRICAS.tramo('recomendador.perfil.top_k'):
+                if exclude_seen:
+                    if permitidos is None:
+                        permitidos = np.ones(len(sim_scores), dtype=bool)
+                    permitidos[semillas] = False
+                ranking = sim_scores if hibrido is None else hibrido.puntuar(sim_scores)
+                mejores = top_k_indices(ranking, num_recommendations, permitidos)
+            
+            with METRICAS.tramo('recomendador.perfil.armado'):
+                recommendations = self.catalogo.filas(
+                    mejores,
+                    ['title', 'vote_average', 'popularity', 'release_date', 'genres']
+                )
+                recommendations['similarity_score'] = sim_scores[mejores]
+                if hibrido is not None:
+                    recommendations['hybrid_score'] = ranking[mejores]
+            
+            self._guardar_en_cache(clave, recommendations)
+            return recommendations, None
+            
+        except Exception as e:
+            return None, f"Error en las recomendaciones del perfil: {str(e)}"
+    
+    def _pesos_campos(self, pesos):
+        """Pesos normalizados por campo y su forma canónica para la clave de caché"""
+        if self.indice_campos is None:
+            raise ValueError("El índice por campos no está disponible")
+        normalizados = self.indice_campos.pesos(pesos)
+        return normalizados, tuple(zip(self.indice_campos.campos, normalizados.round(6).tolist()))
+    
+    @METRICAS.medido('recomendador.ponderada.similares')
+    @registrada('weighted', {'title': 'title', 'pesos': 'pesos', 'num_recommendations': 'k',
+                             'filtros': 'filtros', 'fusion': 'fusion'})
+    def recomendar_ponderado(self, title, pesos=None, num_recommendations=10, filtros=None, fusion=None):
+        """Películas similares a una del catálogo pesando cada campo del perfil.
+        
+        pesos: diccionario campo -> peso (catalog.CAMPOS_CONTENIDO); los campos
+        que no aparecen pesan 1. El score es el promedio ponderado de la
+        similitud coseno de cada campo.
+        """
+        try:
+            METRICAS.contar('recomendador.ponderada.similares.consultas')
+            self._sincronizar()
+            pesos, clave_pesos = self._pesos_campos(pesos)
+            permitidos, clave_filtros = self._permitidos(filtros)
+            hibrido, clave_fusion = self._hibrido(fusion)
+            clave = ('ponderada', title.lower(), clave_pesos, num_recommendations, clave_filtros,
+                     clave_fusion, self._version)
+            cacheado = self._desde_cache(clave)
+            if cacheado is not None:
+                METRICAS.contar('recomendador.ponderada.similares.cache_aciertos')
+                return cacheado, None
+            
+            idx = self.catalogo.indice_titulo(title)
+            if idx is None:
+                return None, f"Película '{title}' no encontrada en el dataset"
+            
+            with METRICAS.tramo('recomendador.ponderada.similares.puntuacion'):
+                sim_scores = self.indice_campos.puntuar(self.indice_campos.vector_pelicula(idx, pesos))
+            METRICAS.contar('recomendador.ponderada.similares.candidatos_puntuados', len(sim_scores))
+            
+            with METRICAS.tramo('recomendador.ponderada.similares.top_k'):
+                ranking = sim_scores if hibrido is None else hibrido.puntuar(sim_scores)
+                # La propia película queda fuera
+                if permitidos is None:
+                    mejores = [i for i in top_k_indices(ranking, num_recommendations + 1).tolist()
+                               if i != idx][:num_recommendations]
+                else:
+                    permitidos[idx] = False
+                    mejores = top_k_indices(ranking, num_recommendations, permitidos)
+            
+            with METRICAS.tramo('recomendador.ponderada.similares.armado'):
+                recommendations = self.catalogo.filas(
+                    mejores,
+                    ['title', 'vote_average', 'popularity', 'release_date', 'genres']
+                )
+                recommendations['similarity_score'] = sim_scores[mejores]
+                if hibrido is not None:
+                    recommendations['hybrid_score'] = ranking[mejores]
+            
+            self._guardar_en_cache(clave, recommendations)
+            return recommendations, None
+            
+        except Exception as e:
+            return None, f"Error en la recomendación ponderada: {str(e)}"
+    
+    @METRICAS.medido('recomendador.ponderada.busqueda')
+    @registrada('weighted', {'query': 'query', 'pesos': 'pesos', 'num_recommendations': 'k',
+                             'filtros': 'filtros', 'fusion': 'fusion'})
+    def buscar_ponderada(self, query, pesos=None, num_recommendations=10, filtros=None, fusion=None):
+        """Búsqueda por texto libre pesando cada campo del perfil (ver recomendar_ponderado)"""
+        try:
+            if not query or not query.strip():
+                return None, "La consulta no puede estar vacía"
+            
+            METRICAS.contar('recomendador.ponderada.busqueda.consultas')
+            self._sincronizar()
+            pesos, clave_pesos = self._pesos_campos(pesos)
+            permitidos, clave_filtros = self._permitidos(filtros)
+            hibrido, clave_fusion = self._hibrido(fusion)
+            
+            with METRICAS.tramo('recomendador.ponderada.busqueda.correccion'):
+                query_corregido = self._corregir_titulo(query)
+            
+            clave = ('busqueda_ponderada', query_corregido.lower(), clave_pesos,
+                     num_recommendations, clave_filtros, clave_fusion, self._version)
+            cacheado = self._desde_cache(clave)
+            if cacheado is not None:
+                METRICAS.contar('recomendador.ponderada.busqueda.cache_aciertos')
+                return cacheado, None
+            
+            with METRICAS.tramo('recomendador.ponderada.busqueda.puntuacion'):
+                vector = self.indice_campos.vector_consulta(query_corregido.lower(), pesos)
+                sim_scores = self.indice_campos.puntuar(vector)
+            METRICAS.contar('recomendador.ponderada.busqueda.candidatos_puntuados', len(sim_scores))
+            
+            recommendations = self._armar_similares(query_corregido, sim_scores, num_recommendations,
+                                                    permitidos, hibrido)
+            
+            self._guardar_en_cache(clave, recommendations)
+            return recommendations, None
+            
+        except Exception as e:
+            return None, f"Error en la búsqueda ponderada: {str(e)}"
+    
+    def precalentar_cache(self, titulos=None, n=100, num_recommendations=10):
+        """Llena la caché con las películas más populares (o los títulos dados)"""
+        self._sincronizar()
+        if titulos is None:
+            titulos = self.df.nlargest(n, 'popularity')['title'].tolist()
+        
+        for titulo in titulos:
+            self.get_movie_recommendations(titulo, num_recommendations)
+            self.buscar_peliculas_similares(titulo, num_recommendations)
+        
+        return len(self.cache)
+    
+    def estadisticas_cache(self):
+        """Contadores de aciertos/fallos de la caché de consultas"""
+        return self.cache.estadisticas()
+    
     def get_movie_details(self, title):
         """Obtiene detalles completos de una película"""
         try:
-            movie = self.df[self.df['title'].str.lower() == title.lower()]
-            if movie.empty:
+            self._sincronizar()
+            idx = self.catalogo.indice_titulo(title)
+            if idx is None:
                 return None, f"Película '{title}' no encontrada"
             
-            movie_data = movie.iloc[0]
+            movie_data = self.df.iloc[idx]
             return {
                 'title': movie_data['title'],
                 'vote_average': movie_data['vote_average'],
                 'release_date': movie_data['release_date'],
-                'genres': movie_data['genres'],
-                'cast': movie_data['cast'],
-                'director': movie_data['director'],
+                'genres': self.catalogo.generos_de(idx),
+                'cast': self.catalogo.reparto_de(idx),
+                'director': self.catalogo.director_de(idx),
                 'overview': movie_data['overview'],
                 'popularity': movie_data['popularity'],
                 'runtime': movie_data['runtime'],
-                'production_companies': movie_data['production_companies']
+                'production_companies': self.catalogo.companias_de(idx)
             }, None
             
         except Exception as e:
@@ -0,0 +1,263 @@
+"""
+Perfilado del arranque y de una repetición de consultas, sin interfaz gráfica.
+
+Ejecuta DataLoader.initialize_system y luego repite un archivo de consultas
+(JSONL, ver models.query_log) con MovieRecommender y MoviePredictor, cada fase
+bajo un perfilador:
+
+- cprofile: perfil determinista; escribe {fase}.prof (para pstats, snakeviz o
+  gprof2dot) y {fase}.txt con las funciones ordenadas por tiempo acumulado y
+  propio;
+- muestreo: un hilo toma cada --intervalo-ms la pila de todos los hilos;
+  escribe {fase}.folded (pilas colapsadas para flamegraph.pl o speedscope) y
+  {fase}.txt con las funciones ordenadas por muestras propias e inclusivas.
+  Distorsiona menos los tiempos que cprofile.
+
+Con memoria activada (por defecto) tracemalloc guarda una instantánea al
+terminar cada fase: memoria_arranque.txt lista las líneas que más memoria
+retienen y memoria_consultas.txt lo que creció durante las consultas.
+resumen.json reúne duraciones, picos de memoria y, con --metricas, los tramos
+del registro de utils.metrics.
+
+Uso:
+    python profiler.py --consultas consultas.jsonl --salida perfil
+    python profiler.py --perfilador muestreo --intervalo-ms 2 --repeticiones 5
+"""
+
+import argparse
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+# Agregar el directorio actual al path de Python para encontrar módulos locales
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+PERFILADORES = ('cprofile', 'muestreo')
+
+
+class MuestreadorPilas:
+    """Perfilador por muestreo: cuenta las pilas de todos los hilos del proceso"""
+
+    def __init__(self, intervalo=0.005):
+        self.intervalo = intervalo
+        self.pilas = Counter()
+        self.muestras = 0
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def __enter__(self):
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._bucle, name="MuestreadorPilas", daemon=True)
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *excepcion):
+        self._detener.set()
+        self._hilo.join()
+        return False
+
+    def _bucle(self):
+        propio = threading.get_ident()
+        while not self._detener.wait(self.intervalo):
+            nombres = {h.ident: h.name for h in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == propio:
+                    continue
+                marcos = []
+                while frame is not None:
+                    marcos.append(_etiqueta(frame))
+                    frame = frame.f_back
+                # El hilo es la raíz de la pila (los pools de carga aparecen aparte)
+                marcos.append(nombres.get(ident, f"hilo-{ident}").replace(';', ','))
+                self.pilas[';'.join(reversed(marcos))] += 1
+            self.muestras += 1
+
+    def colapsadas(self):
+        """Líneas 'raíz;...;hoja cantidad' del formato de flamegraph.pl"""
+        return [f"{pila} {n}" for pila, n in self.pilas.most_common()]
+
+    def ranking(self, top=40):
+        """Funciones con más muestras propias e inclusivas"""
+        propias, inclusivas = Counter(), Counter()
+        for pila, n in self.pilas.items():
+            marcos = pila.split(';')
+            propias[marcos[-1]] += n
+            for marco in set(marcos[1:]):
+                inclusivas[marco] += n
+        total = sum(self.pilas.values()) or 1
+        lineas = [f"{self.muestras} muestras cada {self.intervalo * 1000:g} ms "
+                  f"({total} pilas de hilos)", "", "Muestras propias:"]
+        lineas += [f"{n:>8} {n / total:>6.1%}  {marco}" for marco, n in propias.most_common(top)]
+        lineas += ["", "Muestras inclusivas:"]
+        lineas += [f"{n:>8} {n / total:>6.1%}  {marco}" for marco, n in inclusivas.most_common(top)]
+        return "\n".join(lineas) + "\n"
+
+
+def _etiqueta(frame):
+    codigo = frame.f_code
+    archivo = os.path.basename(codigo.co_filename)
+    return f"{codigo.co_name} ({archivo}:{codigo.co_firstlineno})".replace(';', ',')
+
+
+def _escribir(ruta, texto):
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write(texto)
+
+
+def perfilar(nombre, funcion, args):
+    """Ejecuta funcion() bajo el perfilador elegido y escribe sus reportes.
+
+    Devuelve (resultado, segundos).
+    """
+    base = os.path.join(args.salida, nombre)
+    inicio = time.perf_counter()
+    if args.perfilador == 'cprofile':
+        perfil = cProfile.Profile()
+        perfil.enable()
+        try:
+            resultado = funcion()
+        finally:
+            perfil.disable()
+        segundos = time.perf_counter() - inicio
+        perfil.dump_stats(f"{base}.prof")
+
+        texto = io.StringIO()
+        estadisticas = pstats.Stats(perfil, stream=texto).strip_dirs()
+        texto.write("Por tiempo acumulado:\n")
+        estadisticas.sort_stats('cumulative').print_stats(args.top)
+        texto.write("Por tiempo propio:\n")
+        estadisticas.sort_stats('tottime').print_stats(args.top)
+        _escribir(f"{base}.txt", texto.getvalue())
+    else:
+        with MuestreadorPilas(args.intervalo_ms / 1000) as muestreador:
+            resultado = funcion()
+        segundos = time.perf_counter() - inicio
+        _escribir(f"{base}.folded", "\n".join(muestreador.colapsadas()) + "\n")
+        _escribir(f"{base}.txt", muestreador.ranking(args.top))
+    return resultado, segundos
+
+
+def reporte_memoria(instantanea, anterior, top):
+    """Líneas que más memoria retienen (o que más crecieron respecto de 'anterior')"""
+    if anterior is None:
+        estadisticas = instantanea.statistics('lineno')
+        encabezado = "Memoria retenida por línea:"
+    else:
+        estadisticas = instantanea.compare_to(anterior, 'lineno')
+        encabezado = "Crecimiento de memoria por línea respecto del arranque:"
+    # Sin las asignaciones de los propios perfiladores; filtrar las estadísticas
+    # ya agrupadas es mucho más barato que filtrar las trazas
+    propios = {tracemalloc.__file__, cProfile.__file__, pstats.__file__}
+    estadisticas = [e for e in estadisticas if e.traceback[0].filename not in propios]
+    return "\n".join([encabezado] + [str(e) for e in estadisticas[:top]]) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perfilado del arranque y de una repetición de consultas")
+    parser.add_argument('--dataset', default='dataset_movies_api.csv')
+    parser.add_argument('--models-dir', default='models/saved')
+    parser.add_argument('--mmap', action='store_true', help="Mapear los artefactos en memoria")
+    parser.add_argument('--consultas', help="Archivo JSONL de consultas (por defecto, una mezcla del catálogo)")
+    parser.add_argument('--cantidad', type=int, default=200,
+                        help="Consultas generadas si no se indica archivo")
+    parser.add_argument('--repeticiones', type=int, default=1)
+    parser.add_argument('--con-cache', action='store_true',
+                        help="Usar la caché de consultas (por defecto deshabilitada)")
+    parser.add_argument('--perfilador', choices=PERFILADORES, default='cprofile')
+    parser.add_argument('--intervalo-ms', type=float, default=5.0, help="Intervalo del muestreo")
+    parser.add_argument('--sin-memoria', action='store_true', help="No usar tracemalloc")
+    parser.add_argument('--metricas', action='store_true', help="Registrar también los tramos de utils.metrics")
+    parser.add_argument('--top', type=int, default=40, help="Filas de cada reporte")
+    parser.add_argument('--salida', default='perfil')
+    args = parser.parse_args()
+
+    os.makedirs(args.salida, exist_ok=True)
+    memoria = not args.sin_memoria
+    if memoria:
+        tracemalloc.start()
+
+    from utils import DataLoader, TextCorrector
+    from utils.metrics import METRICAS
+    from models import MovieRecommender, MoviePredictor, QueryCache
+    from models.query_log import leer_consultas, consultas_de_catalogo, ejecutar_consulta
+
+    if args.metricas:
+        METRICAS.habilitar()
+    resumen = {'perfilador': args.perfilador, 'memoria': memoria, 'fases': {}}
+
+    def arrancar():
+        data_loader = DataLoader(args.dataset)
+        if not data_loader.initialize_system(mmap=args.mmap, models_dir=args.models_dir):
+            return None
+        corrector = TextCorrector(data_loader.catalogo)
+        cache = None if args.con_cache else QueryCache(max_entradas=0)
+        return data_loader, MovieRecommender(data_loader, corrector, cache), MoviePredictor(data_loader)
+
+    componentes, segundos = perfilar('arranque', arrancar, args)
+    if componentes is None:
+        print("Error al inicializar el sistema de datos")
+        return 1
+    data_loader, recommender, predictor = componentes
+    resumen['fases']['arranque'] = {'segundos': segundos}
+
+    instantanea_arranque = None
+    if memoria:
+        actual, pico = tracemalloc.get_traced_memory()
+        resumen['fases']['arranque'].update(memoria_mb=actual / 2**20, pico_mb=pico / 2**20)
+        instantanea_arranque = tracemalloc.take_snapshot()
+        _escribir(os.path.join(args.salida, "memoria_arranque.txt"),
+                  reporte_memoria(instantanea_arranque, None, args.top))
+        tracemalloc.reset_peak()
+
+    if args.consultas:
+        consultas, error = leer_consultas(args.consultas)
+        if error:
+            print(error)
+            return 1
+    else:
+        consultas = consultas_de_catalogo(data_loader.catalogo, args.cantidad)
+
+    errores = Counter()
+
+    def repetir():
+        for _ in range(args.repeticiones):
+            for consulta in consultas:
+                _, error = ejecutar_consulta(consulta, recommender, predictor)
+                if error:
+                    errores[consulta['tipo']] += 1
+
+    _, segundos = perfilar('consultas', repetir, args)
+    total = len(consultas) * args.repeticiones
+    resumen['fases']['consultas'] = {
+        'segundos': segundos,
+        'consultas': total,
+        'por_segundo': total / segundos if segundos else None,
+        'errores': dict(errores)
+    }
+    if memoria:
+        actual, pico = tracemalloc.get_traced_memory()
+        resumen['fases']['consultas'].update(memoria_mb=actual / 2**20, pico_mb=pico / 2**20)
+        _escribir(os.path.join(args.salida, "memoria_consultas.txt"),
+                  reporte_memoria(tracemalloc.take_snapshot(), instantanea_arranque, args.top))
+        tracemalloc.stop()
+
+    if args.metricas:
+        resumen['metricas'] = METRICAS.instantanea()
+    _escribir(os.path.join(args.salida, "resumen.json"), json.dumps(resumen, indent=2, ensure_ascii=False))
+
+    print(f"Arranque: {resumen['fases']['arranque']['segundos']:.2f} s | "
+          f"{total} consultas en {segundos:.2f} s ({sum(errores.values())} con error)")
+    print(f"Reportes en {os.path.abspath(args.salida)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
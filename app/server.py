@@ -0,0 +1,590 @@
+"""
+Servidor HTTP/JSON sin interfaz gráfica para el sistema de recomendación.
+
+Carga los artefactos una sola vez y los comparte entre todas las peticiones.
+El cálculo (TF-IDF, similitud, Random Forest) se ejecuta en un pool de hilos
+para no bloquear el bucle de asyncio, y las predicciones y búsquedas que
+llegan casi a la vez se agrupan en una sola llamada al modelo.
+
+Con --procesos N el proceso padre carga los artefactos una vez, mapeados en
+memoria (matriz TF-IDF, tabla de vecinos, bosque), construye los índices de
+entidades y luego crea N procesos hijos con fork que atienden el mismo socket.
+Los hijos leen los mismos mapas y arrays sin copiarlos, y el GIL deja de
+limitar el uso de varios núcleos.
+
+Con --metricas se registran tramos de tiempo y contadores de cada consulta
+(ver utils.metrics) y /metrics los expone en formato Prometheus (o JSON con
+?formato=json). Con --procesos cada hijo tiene su propio registro.
+
+Con --registro-consultas RUTA cada consulta atendida se agrega a un archivo
+JSONL (entrada, duración, ids del resultado) que benchmarks.replay puede
+repetir contra otra versión del motor.
+
+Uso:
+    python server.py --port 8000 --workers 4 --metricas
+    python server.py --port 8000 --procesos 4 --workers 2
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import signal
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qsl
+
+# Agregar el directorio actual al path de Python para encontrar módulos locales
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from utils import DataLoader, TextCorrector
+from utils.metrics import METRICAS
+from models import MovieRecommender, MoviePredictor, SearchBatcher
+from models.query_log import RegistroConsultas
+
+
+MAX_CUERPO = 1024 * 1024
+CAMPOS_PREDICCION = ['budget', 'popularity', 'runtime', 'year', 'num_genres', 'num_cast']
+
+ESTADOS_HTTP = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error'
+}
+
+
+class RespuestaTexto(str):
+    """Cuerpo de respuesta en texto plano en lugar de JSON"""
+
+    tipo = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class ErrorPeticion(Exception):
+    """Error atribuible a la petición del cliente"""
+
+    def __init__(self, mensaje, estado=400):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+def _valor_json(valor):
+    """Convierte valores de numpy/pandas a tipos serializables"""
+    if valor is None:
+        return None
+    if hasattr(valor, 'strftime'):
+        return None if valor != valor else valor.strftime('%Y-%m-%d')
+    if isinstance(valor, (list, tuple)):
+        return [_valor_json(v) for v in valor]
+    if hasattr(valor, 'item'):
+        valor = valor.item()
+    if isinstance(valor, float) and math.isnan(valor):
+        return None
+    return valor
+
+
+def dataframe_a_registros(df):
+    """Convierte un DataFrame de resultados en una lista de diccionarios JSON"""
+    if df is None:
+        return []
+    columnas = list(df.columns)
+    return [
+        {col: _valor_json(valor) for col, valor in zip(columnas, fila)}
+        for fila in df.itertuples(index=False, name=None)
+    ]
+
+
+def _texto(datos, campo):
+    """Campo de texto de la petición ('' si falta o es null)"""
+    valor = datos.get(campo)
+    if valor is None:
+        return ''
+    if not isinstance(valor, str):
+        raise ErrorPeticion(f"'{campo}' debe ser un texto")
+    return valor
+
+
+def _error_recomendador(error):
+    """ErrorPeticion para un error del recomendador: 404 solo si la película no existe"""
+    return ErrorPeticion(error, 404 if 'no encontrada' in error else 400)
+
+
+def _entero(datos, campo, defecto):
+    try:
+        return int(datos.get(campo, defecto))
+    except (TypeError, ValueError):
+        raise ErrorPeticion(f"'{campo}' debe ser un número entero")
+
+
+def _pesos(datos):
+    """Pesos por campo: objeto JSON o, en la query string, 'reparto:2,sinopsis:0.5'"""
+    pesos = datos.get('pesos')
+    if pesos is None or isinstance(pesos, dict):
+        return pesos
+    if isinstance(pesos, str):
+        try:
+            return {campo.strip(): float(valor) for campo, valor in
+                    (par.split(':', 1) for par in pesos.split(',') if par.strip())}
+        except ValueError:
+            pass
+    raise ErrorPeticion("'pesos' debe ser un objeto campo -> peso o 'campo:peso,...'")
+
+
+def _fusion(datos):
+    """Fusión de puntajes: objeto JSON o, en la query string, 'popularidad:0.2,rating:0.1,modo:log'"""
+    fusion = datos.get('fusion')
+    if fusion is None or isinstance(fusion, dict):
+        return fusion
+    if isinstance(fusion, str):
+        try:
+            pares = dict(par.split(':', 1) for par in fusion.split(',') if par.strip())
+            return {clave.strip(): valor.strip() if clave.strip() == 'modo' else float(valor)
+                    for clave, valor in pares.items()}
+        except ValueError:
+            pass
+    raise ErrorPeticion("'fusion' debe ser un objeto señal -> peso o 'señal:peso,...,modo:lineal|log'")
+
+
+def _fila_prediccion(datos):
+    """Extrae y valida los campos de una petición de predicción"""
+    try:
+        fila = [float(datos[campo]) for campo in CAMPOS_PREDICCION]
+    except KeyError as e:
+        raise ErrorPeticion(f"Falta el campo {e}")
+    except (TypeError, ValueError):
+        raise ErrorPeticion("Los campos de predicción deben ser numéricos")
+    if not all(math.isfinite(valor) for valor in fila):
+        raise ErrorPeticion("Los campos de predicción deben ser números finitos")
+    return fila
+
+
+class MovieService:
+    """Componentes del motor compartidos por todas las peticiones"""
+
+    def __init__(self, data_loader, text_corrector, recommender, predictor):
+        self.data_loader = data_loader
+        self.text_corrector = text_corrector
+        self.recommender = recommender
+        self.predictor = predictor
+
+    @classmethod
+    def cargar(cls, dataset_path="dataset_movies_api.csv", mmap=False, registro=None):
+        """Carga dataset y modelos una sola vez"""
+        data_loader = DataLoader(dataset_path)
+        if not data_loader.initialize_system(mmap=mmap):
+            raise RuntimeError("Error al inicializar el sistema de datos")
+
+        text_corrector = TextCorrector(data_loader.catalogo)
+        recommender = MovieRecommender(data_loader, text_corrector, registro=registro)
+        predictor = MoviePredictor(data_loader, registro=registro)
+        return cls(data_loader, text_corrector, recommender, predictor)
+
+    def filtros(self, datos):
+        """Filtros de la petición (utils.filtros), o None.
+
+        'filtros': lista de nombres o, en la query string,
+        'genero:Drama,decada:1990'. 'excluir_ids': ids de TMDb que no deben
+        aparecer (lista o '603,604').
+        """
+        filtros = datos.get('filtros') or []
+        if isinstance(filtros, str):
+            filtros = [f.strip() for f in filtros.split(',') if f.strip()]
+        if not isinstance(filtros, list) or not all(isinstance(f, str) for f in filtros):
+            raise ErrorPeticion("'filtros' debe ser una lista de nombres o 'nombre,nombre,...'")
+
+        excluir = datos.get('excluir_ids') or []
+        if isinstance(excluir, str):
+            excluir = [i for i in excluir.split(',') if i.strip()]
+        try:
+            excluir = [int(i) for i in excluir]
+        except (TypeError, ValueError):
+            raise ErrorPeticion("'excluir_ids' debe ser una lista de ids numéricos")
+        if excluir:
+            filtros = filtros + [self.recommender.filtros.sin_ids(excluir)]
+        return filtros or None
+
+    # ------------------------------------------------------------------
+    # Manejadores síncronos (se ejecutan en el pool de hilos)
+    # ------------------------------------------------------------------
+    def similares(self, datos):
+        title = _texto(datos, 'title')
+        if not title:
+            raise ErrorPeticion("Falta el campo 'title'")
+        recs, error = self.recommender.get_movie_recommendations(
+            title, _entero(datos, 'k', 10), self.filtros(datos), _fusion(datos)
+        )
+        if error:
+            raise _error_recomendador(error)
+        return {'resultados': dataframe_a_registros(recs)}
+
+    def inteligente(self, datos):
+        pelicula = _texto(datos, 'pelicula')
+        actores = _texto(datos, 'actores')
+        directores = _texto(datos, 'directores')
+        if not any([pelicula.strip(), actores.strip(), directores.strip()]):
+            raise ErrorPeticion("Se necesita al menos un criterio de búsqueda")
+        recs, error = self.recommender.buscar_inteligente(
+            pelicula=pelicula, actores=actores, directores=directores,
+            top_n=_entero(datos, 'k', 10), filtros=self.filtros(datos), fusion=_fusion(datos)
+        )
+        if error:
+            raise _error_recomendador(error)
+        return {'resultados': dataframe_a_registros(recs)}
+
+    def ponderada(self, datos):
+        title = _texto(datos, 'title')
+        query = _texto(datos, 'query')
+        if not title and not query:
+            raise ErrorPeticion("Falta el campo 'title' o 'query'")
+        k = _entero(datos, 'k', 10)
+        filtros, fusion = self.filtros(datos), _fusion(datos)
+        if title:
+            recs, error = self.recommender.recomendar_ponderado(title, _pesos(datos), k, filtros, fusion)
+        else:
+            recs, error = self.recommender.buscar_ponderada(query, _pesos(datos), k, filtros, fusion)
+        if error:
+            raise _error_recomendador(error)
+        return {'resultados': dataframe_a_registros(recs)}
+
+    def perfil(self, datos):
+        titulos = datos.get('titles')
+        if isinstance(titulos, str):
+            # En la URL: titles=Avatar|Titanic|Inception
+            titulos = [t for t in titulos.split('|') if t.strip()]
+        if (not titulos or not isinstance(titulos, (list, dict))
+                or not all(isinstance(t, str) for t in titulos)):
+            raise ErrorPeticion("'titles' debe ser una lista no vacía de títulos o un objeto título -> peso")
+        excluir = datos.get('exclude_seen', True)
+        if isinstance(excluir, str):
+            excluir = excluir.lower() not in ('0', 'false', 'no')
+        recs, error = self.recommender.recommend_for_profile(
+            titulos, bool(excluir), _entero(datos, 'k', 10), self.filtros(datos), _fusion(datos)
+        )
+        if error:
+            raise _error_recomendador(error)
+        return {'resultados': dataframe_a_registros(recs)}
+
+    def validar_prediccion(self, fila):
+        errores = self.predictor.validate_input_ranges(*fila)
+        if errores:
+            raise ErrorPeticion("; ".join(errores))
+
+    def predecir_lote(self, filas):
+        predicciones, error = self.predictor.predict_ratings(filas)
+        if error:
+            raise RuntimeError(error)
+        return [float(p) for p in predicciones]
+
+    def estadisticas(self):
+        return {
+            'peliculas': len(self.data_loader.df),
+            'cache': self.recommender.estadisticas_cache()
+        }
+
+
+class PredictionBatcher:
+    """Agrupa predicciones concurrentes en una sola llamada al modelo"""
+
+    def __init__(self, servicio, executor, max_lote=64, espera_ms=2.0):
+        self.servicio = servicio
+        self.executor = executor
+        self.max_lote = max_lote
+        self.espera = espera_ms / 1000.0
+        self._pendientes = []
+        self._temporizador = None
+
+    async def predecir(self, fila):
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        self._pendientes.append((fila, futuro))
+
+        if len(self._pendientes) >= self.max_lote:
+            self._despachar()
+        elif self._temporizador is None:
+            self._temporizador = loop.call_later(self.espera, self._despachar)
+
+        return await futuro
+
+    def _despachar(self):
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+            self._temporizador = None
+        lote, self._pendientes = self._pendientes, []
+        if lote:
+            asyncio.ensure_future(self._ejecutar(lote))
+
+    async def _ejecutar(self, lote):
+        loop = asyncio.get_running_loop()
+        try:
+            predicciones = await loop.run_in_executor(
+                self.executor, self.servicio.predecir_lote, [fila for fila, _ in lote]
+            )
+        except Exception as e:
+            for _, futuro in lote:
+                if not futuro.done():
+                    futuro.set_exception(e)
+            return
+
+        for (_, futuro), prediccion in zip(lote, predicciones):
+            if not futuro.done():
+                futuro.set_result(prediccion)
+
+
+class MovieHTTPServer:
+    """Servidor HTTP/1.1 mínimo sobre asyncio con respuestas JSON"""
+
+    def __init__(self, servicio, workers=4, max_lote=64, espera_ms=2.0):
+        self.servicio = servicio
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.batcher = PredictionBatcher(servicio, self.executor, max_lote, espera_ms)
+        # Las búsquedas semánticas concurrentes se puntúan juntas en un micro-lote
+        self.search_batcher = SearchBatcher(servicio.recommender, max_lote, espera_ms)
+        self.rutas = {
+            '/similar': self.servicio.similares,
+            '/intelligent': self.servicio.inteligente,
+            '/weighted': self.servicio.ponderada,
+            '/profile': self.servicio.perfil,
+        }
+
+    async def _en_pool(self, funcion, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, funcion, *args)
+
+    async def atender(self, metodo, ruta, datos):
+        """Resuelve una petición y devuelve el cuerpo JSON de la respuesta"""
+        if ruta == '/health':
+            return {'estado': 'ok'}
+        if ruta == '/metrics':
+            if datos.get('formato') == 'json':
+                return METRICAS.instantanea()
+            return RespuestaTexto(METRICAS.a_prometheus())
+        if ruta == '/stats':
+            estadisticas = self.servicio.estadisticas()
+            estadisticas['lotes_busqueda'] = self.search_batcher.estadisticas()
+            return estadisticas
+
+        if ruta in self.rutas:
+            return await self._en_pool(self.rutas[ruta], datos)
+
+        if ruta == '/search':
+            futuro = self.search_batcher.enviar(_texto(datos, 'query'), _entero(datos, 'k', 10),
+                                                self.servicio.filtros(datos), _fusion(datos))
+            recs, error = await asyncio.wrap_future(futuro)
+            if error:
+                raise _error_recomendador(error)
+            return {'resultados': dataframe_a_registros(recs)}
+
+        if ruta == '/predict':
+            fila = _fila_prediccion(datos)
+            self.servicio.validar_prediccion(fila)
+            return {'prediccion': await self.batcher.predecir(fila)}
+
+        if ruta == '/predict/batch':
+            if metodo != 'POST':
+                raise ErrorPeticion("Use POST para predicciones por lote", 405)
+            items = datos.get('items')
+            if not isinstance(items, list) or not items:
+                raise ErrorPeticion("'items' debe ser una lista no vacía")
+            filas = [_fila_prediccion(item) for item in items]
+            for fila in filas:
+                self.servicio.validar_prediccion(fila)
+            return {'predicciones': await self._en_pool(self.servicio.predecir_lote, filas)}
+
+        raise ErrorPeticion(f"Ruta no encontrada: {ruta}", 404)
+
+    async def _leer_peticion(self, reader):
+        """Lee una petición HTTP; devuelve None si el cliente cerró la conexión"""
+        try:
+            cabecera = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+
+        lineas = cabecera.decode('latin-1').split('\r\n')
+        peticion = lineas[0].split(' ', 2)
+        if len(peticion) != 3:
+            raise ErrorPeticion("Línea de petición inválida")
+        metodo, objetivo, version = peticion
+        headers = {}
+        for linea in lineas[1:]:
+            if ':' in linea:
+                nombre, valor = linea.split(':', 1)
+                headers[nombre.strip().lower()] = valor.strip()
+
+        try:
+            longitud = int(headers.get('content-length', 0) or 0)
+        except ValueError:
+            raise ErrorPeticion("Content-Length inválido")
+        if longitud < 0:
+            raise ErrorPeticion("Content-Length inválido")
+        if longitud > MAX_CUERPO:
+            raise ErrorPeticion("Cuerpo demasiado grande", 413)
+        cuerpo = await reader.readexactly(longitud) if longitud else b''
+
+        partes = urlsplit(objetivo)
+        datos = dict(parse_qsl(partes.query))
+        if cuerpo:
+            try:
+                datos.update(json.loads(cuerpo))
+            except (ValueError, TypeError):
+                raise ErrorPeticion("El cuerpo debe ser JSON válido")
+
+        mantener = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+        return metodo.upper(), partes.path.rstrip('/') or '/', datos, mantener
+
+    @staticmethod
+    def _respuesta(estado, cuerpo, mantener):
+        if isinstance(cuerpo, RespuestaTexto):
+            datos, tipo = cuerpo.encode('utf-8'), cuerpo.tipo
+        else:
+            datos = json.dumps(cuerpo, ensure_ascii=False).encode('utf-8')
+            tipo = 'application/json; charset=utf-8'
+        cabecera = (
+            f"HTTP/1.1 {estado} {ESTADOS_HTTP.get(estado, '')}\r\n"
+            f"Content-Type: {tipo}\r\n"
+            f"Content-Length: {len(datos)}\r\n"
+            f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n"
+        )
+        return cabecera.encode('latin-1') + datos
+
+    async def manejar_conexion(self, reader, writer):
+        try:
+            while True:
+                mantener = False
+                try:
+                    peticion = await self._leer_peticion(reader)
+                    if peticion is None:
+                        break
+                    metodo, ruta, datos, mantener = peticion
+                    inicio = time.perf_counter()
+                    cuerpo = await self.atender(metodo, ruta, datos)
+                    if not isinstance(cuerpo, RespuestaTexto):
+                        cuerpo['tiempo_ms'] = round((time.perf_counter() - inicio) * 1000, 3)
+                    estado = 200
+                except ErrorPeticion as e:
+                    estado, cuerpo = e.estado, {'error': str(e)}
+                except Exception as e:
+                    estado, cuerpo = 500, {'error': f"Error interno: {str(e)}"}
+
+                writer.write(self._respuesta(estado, cuerpo, mantener))
+                await writer.drain()
+                if not mantener:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def servir(self, host='127.0.0.1', port=8000, sock=None):
+        if sock is not None:
+            server = await asyncio.start_server(self.manejar_conexion, sock=sock)
+        else:
+            server = await asyncio.start_server(self.manejar_conexion, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def _registro(args):
+    """Registro de consultas pedido por línea de comandos o por entorno"""
+    if args.registro_consultas:
+        return RegistroConsultas(args.registro_consultas)
+    return RegistroConsultas.desde_entorno()
+
+
+def servir_prefork(args):
+    """Carga una vez en el padre y atiende con N procesos hijos (fork)"""
+    if not hasattr(os, 'fork'):
+        print("fork no está disponible en este sistema; se usa un solo proceso")
+        args.procesos = 1
+        return servir_un_proceso(args)
+
+    servicio = MovieService.cargar(args.dataset, mmap=True, registro=_registro(args))
+
+    sock = socket.create_server((args.host, args.port), backlog=1024)
+    sock.setblocking(False)
+
+    hijos = []
+    for _ in range(args.procesos):
+        pid = os.fork()
+        if pid == 0:
+            # Proceso hijo: su propio bucle y pool de hilos, artefactos compartidos
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            codigo = 0
+            try:
+                servidor = MovieHTTPServer(servicio, args.workers, args.max_lote, args.espera_ms)
+                asyncio.run(servidor.servir(sock=sock))
+            except KeyboardInterrupt:
+                pass
+            except Exception as e:
+                print(f"Error en el proceso {os.getpid()}: {str(e)}")
+                codigo = 1
+            finally:
+                os._exit(codigo)
+        hijos.append(pid)
+
+    def detener(signum, frame):
+        for pid in hijos:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, detener)
+    signal.signal(signal.SIGINT, detener)
+
+    print(f"Servidor escuchando en http://{args.host}:{args.port} "
+          f"con {args.procesos} procesos: {hijos}")
+    for pid in hijos:
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
+    sock.close()
+    print("Servidor detenido")
+    return 0
+
+
+def servir_un_proceso(args):
+    """Servidor en un único proceso"""
+    servicio = MovieService.cargar(args.dataset, registro=_registro(args))
+    servidor = MovieHTTPServer(servicio, args.workers, args.max_lote, args.espera_ms)
+
+    print(f"Servidor escuchando en http://{args.host}:{args.port}")
+    try:
+        asyncio.run(servidor.servir(args.host, args.port))
+    except KeyboardInterrupt:
+        print("Servidor detenido")
+    return 0
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Servidor HTTP/JSON del sistema de recomendación")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=4, help="Hilos para el cálculo")
+    parser.add_argument('--dataset', default='dataset_movies_api.csv')
+    parser.add_argument('--max-lote', type=int, default=64, help="Máximo de consultas por lote")
+    parser.add_argument('--espera-ms', type=float, default=2.0, help="Espera máxima para formar un lote")
+    parser.add_argument('--procesos', type=int, default=1,
+                        help="Procesos hijos (fork) que comparten los artefactos mapeados")
+    parser.add_argument('--metricas', action='store_true',
+                        help="Registrar tramos y contadores, expuestos en /metrics")
+    parser.add_argument('--registro-consultas', metavar='RUTA',
+                        help="Agregar cada consulta atendida a este archivo JSONL")
+    args = parser.parse_args()
+
+    if args.metricas:
+        METRICAS.habilitar()
+    if args.procesos > 1:
+        return servir_prefork(args)
+    return servir_un_proceso(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+El ajuste del TF-IDF con el conteo repartido entre procesos (utils.tfidf)
+debe dar exactamente el mismo vectorizador y la misma matriz que en serie.
+
+Uso (desde app/):
+    python -m pytest -q tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from utils import tfidf
+from utils.tfidf import CodificadorConsultas, ajustar_tfidf
+
+PALABRAS = ("love war night city dark star man woman story house fight magic world "
+            "girl boy dream king queen secret last first return road blood the of and").split()
+
+PARAMETROS = [
+    {},
+    {'min_df': 2, 'max_df': 0.8},
+    {'stop_words': 'english', 'ngram_range': (1, 2), 'min_df': 2, 'max_df': 0.8,
+     'max_features': 50},
+    {'ngram_range': (1, 2), 'max_features': 7},
+    {'min_df': 3, 'max_df': 40, 'max_features': 20},
+    {'ngram_range': (1, 3), 'min_df': 0.01, 'sublinear_tf': True},
+    {'binary': True, 'norm': None, 'max_features': 30},
+]
+
+
+@pytest.fixture(scope='module')
+def documentos():
+    rng = np.random.default_rng(7)
+    # Frecuencias muy desiguales para que haya términos recortados y empates
+    pesos = 1.0 / np.arange(1, len(PALABRAS) + 1)
+    pesos /= pesos.sum()
+    return [" ".join(rng.choice(PALABRAS, size=rng.integers(0, 12), p=pesos)) for _ in range(400)]
+
+
+@pytest.fixture(autouse=True)
+def paralelo_siempre(monkeypatch):
+    monkeypatch.setattr(tfidf, 'MIN_DOCUMENTOS_PARALELO', 0)
+
+
+@pytest.mark.parametrize('parametros', PARAMETROS)
+@pytest.mark.parametrize('procesos', [2, 3])
+def test_paralelo_identico_a_serie(documentos, parametros, procesos):
+    serie, matriz_serie = ajustar_tfidf(documentos, parametros, procesos=1)
+    paralelo, matriz_paralelo = ajustar_tfidf(documentos, parametros, procesos=procesos)
+
+    assert paralelo.vocabulary_ == serie.vocabulary_
+    assert paralelo.idf_.dtype == serie.idf_.dtype
+    assert np.array_equal(paralelo.idf_, serie.idf_)
+    assert matriz_paralelo.shape == matriz_serie.shape
+    for arreglo in ('data', 'indices', 'indptr'):
+        esperado, obtenido = getattr(matriz_serie, arreglo), getattr(matriz_paralelo, arreglo)
+        assert obtenido.dtype == esperado.dtype
+        assert np.array_equal(obtenido, esperado)
+
+
+@pytest.mark.parametrize('parametros', PARAMETROS[:4])
+def test_vectorizador_paralelo_transforma_igual(documentos, parametros):
+    serie, _ = ajustar_tfidf(documentos, parametros, procesos=1)
+    paralelo, _ = ajustar_tfidf(documentos, parametros, procesos=2)
+    consultas = ["dark night", "love story of the king", "zzz", ""]
+
+    assert (paralelo.transform(consultas) != serie.transform(consultas)).nnz == 0
+    codificador = CodificadorConsultas.desde_vectorizador(paralelo)
+    assert (codificador.codificar(consultas) != serie.transform(consultas)).nnz == 0
@@ -1,11 +1,16 @@
 from .data_loader import DataLoader
+from .catalog import MovieCatalog, EntityPostings
 from .validators import validate_float, validate_int, validate_text, TextCorrector, normalize_text
+from .suggest import TitleSuggester
 
 __all__ = [
     'DataLoader',
+    'MovieCatalog',
+    'EntityPostings',
     'validate_float',
     'validate_int', 
     'validate_text',
     'TextCorrector',
-    'normalize_text'
+    'normalize_text',
+    'TitleSuggester'
 ]
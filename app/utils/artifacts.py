@@ -0,0 +1,165 @@
+"""Almacenamiento de artefactos como arrays .npy que pueden mapearse en memoria.
+
+Opcionalmente cada .npy se guarda comprimido (zstd o lz4 si están instalados,
+zlib siempre). Los archivos comprimidos se descomprimen en memoria al cargar,
+así que no se mapean.
+"""
+import io
+import os
+import json
+import zlib
+import numpy as np
+import scipy.sparse as sp
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+
+# Compresores disponibles: nombre -> (extensión, comprimir, descomprimir)
+COMPRESORES = {
+    'zlib': ('zlib', lambda datos: zlib.compress(datos, 6), zlib.decompress)
+}
+if zstandard is not None:
+    COMPRESORES['zstd'] = (
+        'zst',
+        lambda datos: zstandard.ZstdCompressor(level=10).compress(datos),
+        lambda datos: zstandard.ZstdDecompressor().decompress(datos)
+    )
+if lz4_frame is not None:
+    COMPRESORES['lz4'] = ('lz4', lz4_frame.compress, lz4_frame.decompress)
+
+
+def resolver_compresion(compresion):
+    """Compresor a usar: el pedido si está instalado; si no, zlib"""
+    if compresion is None or compresion in COMPRESORES:
+        return compresion
+    print(f"Compresión '{compresion}' no disponible; se usa zlib")
+    return 'zlib'
+
+
+def _ruta(directorio, nombre, clave):
+    return os.path.join(directorio, f"{nombre}.{clave}.npy")
+
+
+def _variantes(directorio, nombre, clave):
+    """Rutas posibles de un array: .npy plano y una por compresor"""
+    ruta = _ruta(directorio, nombre, clave)
+    return [(None, ruta)] + [
+        (compresor, f"{ruta}.{ext}") for compresor, (ext, _, _) in COMPRESORES.items()
+    ]
+
+
+def _ruta_existente(directorio, nombre, clave):
+    for compresor, ruta in _variantes(directorio, nombre, clave):
+        if os.path.exists(ruta):
+            return compresor, ruta
+    return None, None
+
+
+def guardar_arrays(directorio, nombre, arrays, compresion=None):
+    """Guarda un diccionario de arrays como archivos <nombre>.<clave>.npy[.ext]"""
+    os.makedirs(directorio, exist_ok=True)
+    compresion = resolver_compresion(compresion)
+    for clave, array in arrays.items():
+        # Quitar variantes anteriores para que no quede ambigüedad al cargar
+        for _, ruta in _variantes(directorio, nombre, clave):
+            if os.path.exists(ruta):
+                os.remove(ruta)
+
+        array = np.ascontiguousarray(array)
+        if compresion is None:
+            np.save(_ruta(directorio, nombre, clave), array)
+            continue
+
+        ext, comprimir, _ = COMPRESORES[compresion]
+        buffer = io.BytesIO()
+        np.save(buffer, array)
+        with open(f"{_ruta(directorio, nombre, clave)}.{ext}", "wb") as f:
+            f.write(comprimir(buffer.getbuffer()))
+
+
+def cargar_arrays(directorio, nombre, claves, mmap=False):
+    """Carga los arrays indicados; con mmap=True los .npy planos quedan mapeados
+    en solo lectura"""
+    modo = 'r' if mmap else None
+    arrays = {}
+    for clave in claves:
+        compresor, ruta = _ruta_existente(directorio, nombre, clave)
+        if ruta is None:
+            raise FileNotFoundError(f"No existe el artefacto {_ruta(directorio, nombre, clave)}")
+        if compresor is None:
+            arrays[clave] = np.load(ruta, mmap_mode=modo)
+        else:
+            with open(ruta, "rb") as f:
+                datos = COMPRESORES[compresor][2](f.read())
+            arrays[clave] = np.load(io.BytesIO(datos))
+    return arrays
+
+
+def es_mapa(array):
+    """Indica si un array (o el array del que es vista) está mapeado desde disco"""
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = getattr(array, 'base', None)
+    return False
+
+
+def existen_arrays(directorio, nombre, claves):
+    """Indica si están todos los archivos de un artefacto"""
+    return all(_ruta_existente(directorio, nombre, clave)[1] is not None for clave in claves)
+
+
+def archivos_arrays(directorio, nombre, claves):
+    """Nombres de los archivos que forman un artefacto, en el formato guardado"""
+    archivos = []
+    for clave in claves:
+        ruta = _ruta_existente(directorio, nombre, clave)[1]
+        archivos.append(os.path.basename(ruta or _ruta(directorio, nombre, clave)))
+    return archivos
+
+
+CLAVES_CSR = ('data', 'indices', 'indptr', 'shape')
+
+
+def guardar_csr(directorio, nombre, matriz, compresion=None):
+    """Guarda una matriz CSR como sus tres arrays más la forma"""
+    matriz = sp.csr_matrix(matriz)
+    matriz.sort_indices()
+    guardar_arrays(directorio, nombre, {
+        'data': matriz.data,
+        'indices': matriz.indices,
+        'indptr': matriz.indptr,
+        'shape': np.asarray(matriz.shape, dtype=np.int64)
+    }, compresion)
+
+
+def cargar_csr(directorio, nombre, mmap=False):
+    """Reconstruye una matriz CSR sin copiar los arrays cargados"""
+    arrays = cargar_arrays(directorio, nombre, CLAVES_CSR, mmap)
+    shape = tuple(int(x) for x in arrays['shape'])
+    matriz = sp.csr_matrix(
+        (arrays['data'], arrays['indices'], arrays['indptr']),
+        shape=shape, copy=False
+    )
+    matriz.has_sorted_indices = True
+    return matriz
+
+
+def guardar_json(directorio, nombre, datos):
+    """Guarda datos auxiliares (vocabularios, nombres) como JSON"""
+    os.makedirs(directorio, exist_ok=True)
+    with open(os.path.join(directorio, f"{nombre}.json"), "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False)
+
+
+def cargar_json(directorio, nombre):
+    with open(os.path.join(directorio, f"{nombre}.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
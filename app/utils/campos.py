@@ -0,0 +1,126 @@
+"""
+Índice TF-IDF separado por campo del perfil, combinable con pesos al consultar.
+
+El perfil de contenido concatena géneros, reparto, productoras, director y
+sinopsis en un solo texto, así que cambiar cuánto pesa el reparto frente a la
+trama obliga a vectorizar todo de nuevo. Aquí cada campo tiene su propio
+vectorizador y su bloque de columnas en una única matriz CSR
+N x (V_1 + ... + V_k), con cada bloque normalizado por separado. Multiplicar
+esa matriz por un vector de consulta cuyo bloque f está escalado por w_f da
+sum_f w_f * coseno_f en un solo producto disperso: los pesos se eligen en cada
+consulta sin reentrenar ni invalidar los artefactos guardados.
+
+Un campo sin vocabulario (vacío en todo el catálogo o solo con stop words)
+no interrumpe el ajuste: queda sin vectorizador, con un bloque vacío y peso 0.
+"""
+
+import os
+import pickle
+
+import numpy as np
+
+from .artifacts import guardar_csr, cargar_csr, existen_arrays, CLAVES_CSR
+from .catalog import CAMPOS_CONTENIDO
+from .tfidf import ajustar_tfidf, CodificadorConsultas
+
+
+class IndiceCampos:
+    """Vectorizadores y matriz TF-IDF por campo (géneros, reparto, ...)"""
+
+    def __init__(self, campos, vectorizadores, matriz):
+        self.campos = tuple(campos)
+        # None en los campos sin vocabulario
+        self.vectorizadores = list(vectorizadores)
+        self.matriz = matriz
+        self.vacios = np.array([v is None for v in self.vectorizadores], dtype=bool)
+        tamanos = [0 if v is None else len(v.vocabulary_) for v in self.vectorizadores]
+        # Columna donde empieza el bloque de cada campo (y el final del último)
+        self.inicios = np.concatenate([[0], np.cumsum(tamanos)]).astype(np.int64)
+        self.codificadores = [CodificadorConsultas.desde_vectorizador(v) for v in self.vectorizadores]
+
+    @classmethod
+    def ajustar(cls, catalogo, parametros, procesos=None):
+        """Ajusta un TF-IDF por campo; parametros: campo -> parámetros de TfidfVectorizer"""
+        import scipy.sparse as sp
+
+        campos = [c for c in CAMPOS_CONTENIDO if c in parametros]
+        vectorizadores, bloques = [], []
+        for campo in campos:
+            try:
+                vectorizador, bloque = ajustar_tfidf(catalogo.textos_campo(campo), parametros[campo],
+                                                     procesos)
+            except ValueError as e:
+                # Vocabulario vacío (o nada queda tras min_df/max_df): bloque sin columnas
+                if 'vocabulary' not in str(e) and 'no terms remain' not in str(e):
+                    raise
+                print(f"Campo '{campo}' sin vocabulario, se omite del índice: {e}")
+                vectorizador, bloque = None, sp.csr_matrix((len(catalogo), 0))
+            vectorizadores.append(vectorizador)
+            bloques.append(bloque)
+        matriz = sp.hstack(bloques, format='csr')
+        matriz.sort_indices()
+        return cls(campos, vectorizadores, matriz)
+
+    def guardar(self, directorio, nombre="tfidf_campos", compresion=None):
+        with open(os.path.join(directorio, f"{nombre}.pkl"), "wb") as f:
+            pickle.dump({'campos': self.campos, 'vectorizadores': self.vectorizadores}, f)
+        guardar_csr(directorio, nombre, self.matriz, compresion)
+
+    @classmethod
+    def cargar(cls, directorio, nombre="tfidf_campos", mmap=False):
+        with open(os.path.join(directorio, f"{nombre}.pkl"), "rb") as f:
+            datos = pickle.load(f)
+        return cls(datos['campos'], datos['vectorizadores'], cargar_csr(directorio, nombre, mmap))
+
+    @staticmethod
+    def existe(directorio, nombre="tfidf_campos"):
+        return (os.path.exists(os.path.join(directorio, f"{nombre}.pkl"))
+                and existen_arrays(directorio, nombre, CLAVES_CSR))
+
+    def pesos(self, pesos=None):
+        """Peso de cada campo, en el orden de self.campos, normalizados a suma 1.
+
+        pesos: diccionario campo -> peso no negativo; los campos que no
+        aparecen pesan 1 y los campos sin vocabulario, 0. Lanza ValueError si
+        hay campos desconocidos, pesos negativos o todos son cero.
+        """
+        pesos = dict(pesos or {})
+        desconocidos = sorted(set(pesos) - set(self.campos))
+        if desconocidos:
+            raise ValueError(f"Campos desconocidos: {', '.join(desconocidos)} "
+                             f"(válidos: {', '.join(self.campos)})")
+        try:
+            valores = np.array([float(pesos.get(c, 1.0)) for c in self.campos])
+        except (TypeError, ValueError):
+            raise ValueError("Los pesos deben ser numéricos")
+        if not np.all(np.isfinite(valores)) or (valores < 0).any():
+            raise ValueError("Los pesos deben ser números no negativos")
+        valores[self.vacios] = 0.0
+        if valores.sum() == 0:
+            raise ValueError("Al menos un campo debe tener peso mayor que cero")
+        return valores / valores.sum()
+
+    def vector_consulta(self, texto, pesos):
+        """Vector denso de la consulta con cada bloque escalado por su peso"""
+        vector = np.zeros(self.matriz.shape[1])
+        for f, peso in enumerate(pesos):
+            if not peso or self.vacios[f]:
+                continue
+            codificador = self.codificadores[f]
+            fila = (codificador.codificar([texto]) if codificador is not None
+                    else self.vectorizadores[f].transform([texto]).tocsr())
+            vector[self.inicios[f] + fila.indices] = peso * fila.data
+        return vector
+
+    def vector_pelicula(self, i, pesos):
+        """Vector denso de la fila i con cada bloque escalado por su peso"""
+        inicio, fin = self.matriz.indptr[i], self.matriz.indptr[i + 1]
+        columnas = self.matriz.indices[inicio:fin]
+        bloques = np.searchsorted(self.inicios, columnas, side='right') - 1
+        vector = np.zeros(self.matriz.shape[1])
+        vector[columnas] = self.matriz.data[inicio:fin] * pesos[bloques]
+        return vector
+
+    def puntuar(self, vector):
+        """Similitud ponderada de todas las películas con el vector (un solo producto)"""
+        return self.matriz @ vector
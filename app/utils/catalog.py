@@ -0,0 +1,289 @@
+import sys
+import numpy as np
+import pandas as pd
+from collections.abc import Mapping
+
+
+# Columnas numéricas que se reducen al tipo más pequeño que las representa.
+# popularity y vote_average se mantienen en float64: alimentan el modelo y
+# pasarlas a float32 cambiaría las predicciones.
+COLUMNAS_ENTERAS = ['id', 'runtime', 'vote_count', 'budget', 'num_genres', 'num_cast']
+COLUMNAS_FLOTANTES = ['release_year']
+
+# Campos del perfil de contenido, en el orden en que se concatenan
+CAMPOS_CONTENIDO = ('generos', 'reparto', 'companias', 'director', 'sinopsis')
+
+
+def _aplanar_listas(listas, dtype=np.int32):
+    """Convierte una secuencia de listas en (vocabulario, códigos planos, offsets)"""
+    longitudes = np.fromiter((len(l) for l in listas), dtype=np.int64, count=len(listas))
+    offsets = np.zeros(len(listas) + 1, dtype=np.int32)
+    np.cumsum(longitudes, out=offsets[1:])
+
+    valores = [v for l in listas for v in l]
+    if not valores:
+        return [], np.zeros(0, dtype=dtype), offsets
+
+    # factorize conserva el orden de primera aparición
+    codigos, vocabulario = pd.factorize(pd.Series(valores, dtype=object))
+    return list(vocabulario), codigos.astype(dtype), offsets
+
+
+def _reducir_numericas(df):
+    """Reduce las columnas numéricas a su tipo mínimo sin perder precisión"""
+    for col in COLUMNAS_ENTERAS:
+        if col in df.columns and df[col].dtype.kind in 'iu':
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+    for col in COLUMNAS_FLOTANTES:
+        if col in df.columns and df[col].dtype.kind in 'fiu':
+            df[col] = df[col].astype(np.float32)
+    return df
+
+
+def memoria_profunda(df):
+    """Memoria aproximada de un DataFrame contando el contenido de las listas"""
+    total = int(df.memory_usage(index=True).sum())
+    for col in df.columns:
+        if df[col].dtype != object:
+            if df[col].dtype.kind not in 'biufcmM':
+                total += int(df[col].memory_usage(index=False, deep=True)) - int(df[col].memory_usage(index=False))
+            continue
+        for valor in df[col]:
+            total += sys.getsizeof(valor)
+            if isinstance(valor, list):
+                total += sum(sys.getsizeof(v) for v in valor)
+    return total
+
+
+class EntityPostings(Mapping):
+    """Índice invertido nombre normalizado -> filas, respaldado por arrays int32"""
+
+    __slots__ = ('_slot', '_offsets', '_filas')
+
+    def __init__(self, nombres, offsets, filas):
+        self._slot = {nombre: i for i, nombre in enumerate(nombres)}
+        self._offsets = offsets
+        self._filas = filas
+
+    @classmethod
+    def desde_pares(cls, nombres, claves, filas):
+        """Construye el índice a partir de pares (clave de nombre, fila)"""
+        claves = np.asarray(claves, dtype=np.int64)
+        filas = np.asarray(filas, dtype=np.int64)
+
+        # Ordenar por (clave, fila) y eliminar pares repetidos
+        orden = np.lexsort((filas, claves))
+        claves, filas = claves[orden], filas[orden]
+        if len(claves):
+            unicos = np.ones(len(claves), dtype=bool)
+            unicos[1:] = (claves[1:] != claves[:-1]) | (filas[1:] != filas[:-1])
+            claves, filas = claves[unicos], filas[unicos]
+
+        offsets = np.zeros(len(nombres) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(claves, minlength=len(nombres)), out=offsets[1:])
+        return cls(nombres, offsets, filas.astype(np.int32))
+
+    def filas(self, nombre):
+        """Filas (ordenadas) asociadas a un nombre normalizado"""
+        i = self._slot.get(nombre)
+        if i is None:
+            return np.zeros(0, dtype=np.int32)
+        return self._filas[self._offsets[i]:self._offsets[i + 1]]
+
+    def __getitem__(self, nombre):
+        i = self._slot[nombre]
+        return set(self._filas[self._offsets[i]:self._offsets[i + 1]].tolist())
+
+    def __contains__(self, nombre):
+        return nombre in self._slot
+
+    def __iter__(self):
+        return iter(self._slot)
+
+    def __len__(self):
+        return len(self._slot)
+
+    def memoria(self):
+        """Bytes ocupados por los arrays del índice"""
+        return int(self._offsets.nbytes + self._filas.nbytes)
+
+
+class MovieCatalog:
+    """Catálogo columnar compacto: listas aplanadas en arrays con offsets"""
+
+    __slots__ = (
+        'df',
+        'generos', '_genero_codigos', '_genero_offsets',
+        'actores', '_actor_ids', '_actor_offsets',
+        'companias', '_compania_ids', '_compania_offsets',
+        '_titulo_a_indice'
+    )
+
+    def __init__(self, df, generos, genero_codigos, genero_offsets,
+                 actores, actor_ids, actor_offsets,
+                 companias, compania_ids, compania_offsets):
+        self.df = df
+        self.generos = generos
+        self._genero_codigos = genero_codigos
+        self._genero_offsets = genero_offsets
+        self.actores = actores
+        self._actor_ids = actor_ids
+        self._actor_offsets = actor_offsets
+        self.companias = companias
+        self._compania_ids = compania_ids
+        self._compania_offsets = compania_offsets
+        self._titulo_a_indice = None
+
+    @classmethod
+    def desde_dataframe(cls, df):
+        """Construye el catálogo a partir de un DataFrame con columnas de listas"""
+        df = df.reset_index(drop=True)
+
+        generos, genero_codigos, genero_offsets = _aplanar_listas(df['genres'].tolist(), np.int16)
+        actores, actor_ids, actor_offsets = _aplanar_listas(df['cast'].tolist())
+        companias, compania_ids, compania_offsets = _aplanar_listas(df['production_companies'].tolist())
+
+        # Las listas quedan fuera del DataFrame; el director pasa a categórico
+        compacto = df.drop(columns=['genres', 'cast', 'production_companies', 'content_profile'],
+                           errors='ignore')
+        compacto['director'] = compacto['director'].astype('category')
+        compacto = _reducir_numericas(compacto)
+
+        return cls(compacto, generos, genero_codigos, genero_offsets,
+                   actores, actor_ids, actor_offsets,
+                   companias, compania_ids, compania_offsets)
+
+    def __len__(self):
+        return len(self.df)
+
+    # ------------------------------------------------------------------
+    # Accesores por fila
+    # ------------------------------------------------------------------
+    def generos_de(self, i):
+        """Lista de géneros de la película i"""
+        codigos = self._genero_codigos[self._genero_offsets[i]:self._genero_offsets[i + 1]]
+        return [self.generos[c] for c in codigos]
+
+    def reparto_de(self, i):
+        """Lista de actores de la película i"""
+        ids = self._actor_ids[self._actor_offsets[i]:self._actor_offsets[i + 1]]
+        return [self.actores[a] for a in ids]
+
+    def companias_de(self, i):
+        """Lista de productoras de la película i"""
+        ids = self._compania_ids[self._compania_offsets[i]:self._compania_offsets[i + 1]]
+        return [self.companias[c] for c in ids]
+
+    def director_de(self, i):
+        """Director de la película i"""
+        return self.df['director'].iat[i]
+
+    def ids_reparto(self, i):
+        """Ids (int32) de los actores de la película i"""
+        return self._actor_ids[self._actor_offsets[i]:self._actor_offsets[i + 1]]
+
+    def indice_titulo(self, titulo):
+        """Posición de la primera película con ese título (sin distinguir mayúsculas)"""
+        if self._titulo_a_indice is None:
+            mapa = {}
+            for i, t in enumerate(self.df['title'].tolist()):
+                mapa.setdefault(str(t).lower(), i)
+            self._titulo_a_indice = mapa
+        return self._titulo_a_indice.get(titulo.lower())
+
+    def filas(self, indices, columnas):
+        """DataFrame con las filas indicadas, materializando solo las listas pedidas"""
+        indices = list(indices)
+        escalares = [c for c in columnas if c in self.df.columns]
+        resultado = self.df.iloc[indices][escalares].copy()
+
+        if 'director' in resultado.columns:
+            resultado['director'] = resultado['director'].astype(object)
+        if 'genres' in columnas:
+            resultado['genres'] = [self.generos_de(i) for i in indices]
+        if 'cast' in columnas:
+            resultado['cast'] = [self.reparto_de(i) for i in indices]
+        if 'production_companies' in columnas:
+            resultado['production_companies'] = [self.companias_de(i) for i in indices]
+
+        return resultado[list(columnas)]
+
+    # ------------------------------------------------------------------
+    # Acceso masivo para construir índices
+    # ------------------------------------------------------------------
+    def pares_reparto(self):
+        """Arrays paralelos (fila, id de actor) de todo el catálogo"""
+        filas = np.repeat(np.arange(len(self), dtype=np.int32), np.diff(self._actor_offsets))
+        return filas, self._actor_ids
+
+    def pares_generos(self):
+        """Arrays paralelos (fila, código de género) de todo el catálogo"""
+        filas = np.repeat(np.arange(len(self), dtype=np.int32), np.diff(self._genero_offsets))
+        return filas, self._genero_codigos
+
+    def pares_companias(self):
+        """Arrays paralelos (fila, id de productora) de todo el catálogo"""
+        filas = np.repeat(np.arange(len(self), dtype=np.int32), np.diff(self._compania_offsets))
+        return filas, self._compania_ids
+
+    def perfiles_contenido(self):
+        """Genera el perfil de contenido de cada película (solo para ajustar TF-IDF)"""
+        directores = self.df['director'].astype(object).tolist()
+        overviews = self.df['overview'].tolist()
+        for i in range(len(self)):
+            genres = ' '.join(self.generos_de(i))
+            cast = ' '.join(self.reparto_de(i))
+            companies = ' '.join(self.companias_de(i))
+            profile = f"{genres} {cast} {companies} {directores[i]} {overviews[i]}"
+            yield profile.lower()
+
+    def textos_campo(self, campo):
+        """Genera el texto de un solo campo del perfil de contenido de cada película"""
+        if campo == 'director':
+            textos = self.df['director'].astype(object).tolist()
+        elif campo == 'sinopsis':
+            textos = self.df['overview'].tolist()
+        else:
+            partes = {'generos': self.generos_de, 'reparto': self.reparto_de,
+                      'companias': self.companias_de}[campo]
+            textos = (' '.join(partes(i)) for i in range(len(self)))
+        for texto in textos:
+            yield str(texto).lower()
+
+    # ------------------------------------------------------------------
+    # Memoria
+    # ------------------------------------------------------------------
+    def memoria(self):
+        """Bytes ocupados por el catálogo (DataFrame compacto + arrays + vocabularios)"""
+        total = memoria_profunda(self.df)
+        for arr in (self._genero_codigos, self._genero_offsets,
+                    self._actor_ids, self._actor_offsets,
+                    self._compania_ids, self._compania_offsets):
+            total += arr.nbytes
+        for vocabulario in (self.generos, self.actores, self.companias):
+            total += sys.getsizeof(vocabulario) + sum(sys.getsizeof(v) for v in vocabulario)
+        return total
+
+    def a_dataframe_legado(self):
+        """Reconstruye el formato anterior (listas + content_profile) para comparar"""
+        indices = range(len(self))
+        legado = self.df.copy()
+        legado['director'] = legado['director'].astype(object)
+        legado['genres'] = [self.generos_de(i) for i in indices]
+        legado['cast'] = [self.reparto_de(i) for i in indices]
+        legado['production_companies'] = [self.companias_de(i) for i in indices]
+        legado['content_profile'] = list(self.perfiles_contenido())
+        for col in COLUMNAS_ENTERAS + COLUMNAS_FLOTANTES:
+            if col in legado.columns:
+                legado[col] = legado[col].astype(np.float64 if legado[col].dtype.kind == 'f' else np.int64)
+        return legado
+
+    def reporte_memoria(self):
+        """Compara la memoria del formato anterior con la del catálogo compacto"""
+        antes = memoria_profunda(self.a_dataframe_legado())
+        despues = self.memoria()
+        return {
+            'antes_mb': antes / (1024 * 1024),
+            'despues_mb': despues / (1024 * 1024),
+            'reduccion': antes / despues if despues else 0.0
+        }
@@ -1,37 +1,123 @@
 import pandas as pd
 import numpy as np
 import ast
+import hashlib
 import os
 import pickle
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.preprocessing import StandardScaler
-from sklearn.pipeline import Pipeline
-from sklearn.compose import ColumnTransformer
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .catalog import MovieCatalog
+from .artifacts import (
+    guardar_arrays, cargar_arrays, existen_arrays, guardar_csr, cargar_csr, CLAVES_CSR,
+    guardar_json
+)
+from .ranking import tabla_vecinos, top_k_indices, codificar_vecinos, decodificar_scores
+from .forest import CompactForest, CLAVES_BOSQUE
+from .tfidf import ajustar_tfidf
+from .campos import IndiceCampos
+from .metrics import METRICAS
+from .manifest import (
+    PIEZAS, cargar_manifiesto, huella_dataset, normalizar, piezas_afectadas,
+    piezas_obsoletas, registrar_piezas, verificar_sumas, versiones_librerias,
+    NOMBRE_MANIFIESTO
+)
+
+# En el ejecutable de PyInstaller (--onedir) los datos del paquete están en sys._MEIPASS
+EMPAQUETADO = bool(getattr(sys, 'frozen', False)) and hasattr(sys, '_MEIPASS')
+# Carpeta del paquete con los artefactos construidos por build_exe.py
+DIRECTORIO_ARTEFACTOS_EMPAQUETADOS = "artefactos"
+
+
+def rutas_datos():
+    """Dataset y directorio de artefactos con que arranca la aplicación.
+    
+    En el ejecutable son los del paquete (artefactos ya construidos, de solo
+    lectura); desde el código fuente, los del directorio de trabajo.
+    """
+    if EMPAQUETADO:
+        return (os.path.join(sys._MEIPASS, "dataset_movies_api.csv"),
+                os.path.join(sys._MEIPASS, DIRECTORIO_ARTEFACTOS_EMPAQUETADOS))
+    return "dataset_movies_api.csv", "models/saved"
+
+
+def directorio_modelos_usuario():
+    """Directorio escribible para reconstruir artefactos cuando los del paquete no sirven"""
+    return os.path.join(os.path.expanduser("~"), ".movie_recommender", "models")
 
 
 class DataLoader:
     def __init__(self, dataset_path="dataset_movies_api.csv"):
         self.dataset_path = dataset_path
         self.df = None
+        self.catalogo = None
         self.tfidf = None
         self.tfidf_matrix = None
-        self.cosine_sim = None
-        self.rf_pipeline = None
+        # Tabla de los K vecinos más similares de cada película (reemplaza a
+        # la matriz densa N x N de similitud coseno)
+        self.vecinos_ids = None
+        self.vecinos_scores = None
+        self.k_vecinos = 100
+        # TF-IDF por campo del perfil, para combinar con pesos al consultar
+        self.indice_campos = None
+        # Random Forest de predicción en arrays planos (mapeable en memoria)
+        self.bosque = None
+        # Se incrementa cada vez que se crean o recargan los artefactos que lee
+        # el recomendador (TF-IDF, vecinos, índice por campos); el modelo de
+        # predicción no la cambia, para no invalidar la caché de búsquedas
+        self.version_artefactos = 0
+        self._lock_version = threading.Lock()
+        # Duración en ms de la última carga de cada artefacto
+        self.tiempos_carga = {}
         self.feature_columns = ['budget', 'popularity', 'runtime', 'release_year', 'num_genres', 'num_cast']
+        # Parámetros de entrenamiento; quedan registrados en el manifiesto
+        self.parametros_tfidf = {
+            'max_features': 5000,
+            'stop_words': 'english',
+            'ngram_range': (1, 2),
+            'min_df': 2,
+            'max_df': 0.8
+        }
+        # Un TF-IDF por campo (catalog.CAMPOS_CONTENIDO); los nombres de personas
+        # y productoras quedan como unigramas y bigramas igual que en el perfil
+        self.parametros_campos = {
+            'generos': {'ngram_range': (1, 2)},
+            'reparto': {'stop_words': 'english', 'ngram_range': (1, 2), 'min_df': 2,
+                        'max_features': 5000},
+            'companias': {'stop_words': 'english', 'ngram_range': (1, 2), 'min_df': 2,
+                          'max_features': 2000},
+            'director': {'stop_words': 'english', 'ngram_range': (1, 2), 'min_df': 2,
+                         'max_features': 2000},
+            'sinopsis': dict(self.parametros_tfidf)
+        }
+        self.parametros_rf = {'n_estimators': 100, 'random_state': 42}
+        # Procesos para contar términos al ajustar el TF-IDF (None: todos los
+        # CPU). No va al manifiesto: el resultado es idéntico al ajuste en serie.
+        self.procesos_tfidf = None
+        # Formato en disco: precisión de los scores de vecinos ('float32',
+        # 'float16' o 'uint8') y compresión opcional ('zstd', 'lz4', 'zlib').
+        # Sin compresión los arrays se pueden mapear en memoria.
+        self.formato_artefactos = {'scores_vecinos': 'float16', 'compresion': None}
+        # Huella del dataset (tamaño, fecha, sha256) y manifiesto leído
+        self.huella = None
+        self.manifiesto = None
         
+    def _resolver_dataset(self):
+        """Verifica que el dataset exista, buscándolo también en el directorio padre"""
+        if not os.path.exists(self.dataset_path):
+            parent_path = os.path.join("..", self.dataset_path)
+            if os.path.exists(parent_path):
+                self.dataset_path = parent_path
+            else:
+                raise FileNotFoundError(f"No se encontró el dataset: {self.dataset_path}")
+    
+    @METRICAS.medido('data_loader.carga_dataset')
     def load_data(self):
         """Carga y preprocesa el dataset"""
         try:
-            # Verificar si el dataset existe
-            if not os.path.exists(self.dataset_path):
-                # Buscar en el directorio padre
-                parent_path = os.path.join("..", self.dataset_path)
-                if os.path.exists(parent_path):
-                    self.dataset_path = parent_path
-                else:
-                    raise FileNotFoundError(f"No se encontró el dataset: {self.dataset_path}")
+            self._resolver_dataset()
             
             # Cargar dataset
             self.df = pd.read_csv(self.dataset_path)
@@ -52,45 +138,45 @@ class DataLoader:
             self.df['num_genres'] = self.df['genres'].apply(len)
             self.df['num_cast'] = self.df['cast'].apply(len)
             
-            # Crear content profile
-            self.df['content_profile'] = self.df.apply(self._crear_content_profile, axis=1)
+            # Compactar: listas aplanadas en arrays, director categórico y
+            # columnas numéricas reducidas. El content profile ya no se guarda:
+            # se genera solo al ajustar el TF-IDF.
+            self.catalogo = MovieCatalog.desde_dataframe(self.df)
+            self.df = self.catalogo.df
             
-            print(f"Dataset cargado exitosamente: {len(self.df)} películas")
+            print(f"Dataset cargado exitosamente: {len(self.df)} películas "
+                  f"({self.catalogo.memoria() / (1024 * 1024):.1f} MB en memoria)")
             return True
             
         except Exception as e:
             print(f"Error al cargar el dataset: {str(e)}")
             return False
     
-    def _crear_content_profile(self, row):
-        """Crea el perfil de contenido para cada película"""
-        genres = ' '.join(row['genres'])
-        cast = ' '.join(row['cast'])
-        companies = ' '.join(row['production_companies'])
-        director = row['director']
-        overview = row['overview']
-        
-        profile = f"{genres} {cast} {companies} {director} {overview}"
-        return profile.lower()
+    def reporte_memoria(self):
+        """Muestra la memoria del formato anterior frente al catálogo compacto"""
+        reporte = self.catalogo.reporte_memoria()
+        print(f"Memoria antes: {reporte['antes_mb']:.1f} MB | "
+              f"después: {reporte['despues_mb']:.1f} MB | "
+              f"reducción: {reporte['reduccion']:.1f}x")
+        return reporte
     
+    @METRICAS.medido('data_loader.indice')
     def create_similarity_matrix(self):
         """Crea la matriz de similitud TF-IDF"""
         try:
-            # Crear vectorizador TF-IDF
-            self.tfidf = TfidfVectorizer(
-                max_features=5000,
-                stop_words='english',
-                ngram_range=(1, 2),
-                min_df=2,
-                max_df=0.8
+            # Ajustar y transformar, con el conteo de términos repartido entre
+            # procesos en catálogos grandes (los perfiles se descartan tras el ajuste)
+            self.tfidf, self.tfidf_matrix = ajustar_tfidf(
+                self.catalogo.perfiles_contenido(), self.parametros_tfidf, self.procesos_tfidf
             )
             
-            # Ajustar y transformar
-            self.tfidf_matrix = self.tfidf.fit_transform(self.df['content_profile'])
-            
-            # Calcular similitud coseno
-            self.cosine_sim = cosine_similarity(self.tfidf_matrix, self.tfidf_matrix)
+            # Vecinos más similares por bloques, sin materializar la matriz N x N
+            # (K + 1 columnas porque la primera es la propia película)
+            self.vecinos_ids, self.vecinos_scores = tabla_vecinos(
+                self.tfidf_matrix, self.k_vecinos + 1
+            )
             
+            self._nueva_version()
             print(f"Matriz de similitud creada: {self.tfidf_matrix.shape}")
             return True
             
@@ -98,12 +184,34 @@ class DataLoader:
             print(f"Error al crear matriz de similitud: {str(e)}")
             return False
     
+    @METRICAS.medido('data_loader.indice_campos')
+    def crear_indice_campos(self):
+        """Crea las matrices TF-IDF de cada campo del perfil"""
+        try:
+            self.indice_campos = IndiceCampos.ajustar(
+                self.catalogo, self.parametros_campos, self.procesos_tfidf
+            )
+            self._nueva_version()
+            print(f"Índice por campos creado: {self.indice_campos.matriz.shape} "
+                  f"({', '.join(self.indice_campos.campos)})")
+            return True
+            
+        except Exception as e:
+            print(f"Error al crear el índice por campos: {str(e)}")
+            return False
+    
+    @METRICAS.medido('data_loader.entrenamiento')
     def train_prediction_model(self):
         """Entrena el modelo de predicción de calificaciones"""
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.preprocessing import StandardScaler
+        from sklearn.pipeline import Pipeline
+        from sklearn.compose import ColumnTransformer
+        
         try:
             # Preparar datos para el modelo
             df_model = self.df[self.feature_columns + ['vote_average']].dropna()
-            X = df_model[self.feature_columns]
+            X = df_model[self.feature_columns].astype('float64')
             y = df_model['vote_average']
             
             # Crear pipeline
@@ -113,13 +221,14 @@ class DataLoader:
                 ]
             )
             
-            self.rf_pipeline = Pipeline([
+            rf_pipeline = Pipeline([
                 ('preprocessor', preprocessor),
-                ('regressor', RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1))
+                ('regressor', RandomForestRegressor(**self.parametros_rf, n_jobs=-1))
             ])
             
-            # Entrenar modelo
-            self.rf_pipeline.fit(X, y)
+            # Entrenar modelo; solo se conserva su versión en arrays planos
+            rf_pipeline.fit(X, y)
+            self.bosque = CompactForest.desde_pipeline(rf_pipeline)
             
             print("Modelo de predicción entrenado exitosamente")
             return True
@@ -128,27 +237,30 @@ class DataLoader:
             print(f"Error al entrenar modelo: {str(e)}")
             return False
     
-    def save_models(self, models_dir="models/saved"):
-        """Guarda los modelos entrenados"""
+    @METRICAS.medido('data_loader.guardado')
+    def save_models(self, models_dir="models/saved", piezas=PIEZAS):
+        """Guarda los modelos entrenados y los registra en el manifiesto"""
         try:
             os.makedirs(models_dir, exist_ok=True)
+            compresion = self.formato_artefactos['compresion']
             
-            # Guardar vectorizador TF-IDF
-            with open(os.path.join(models_dir, "tfidf_vectorizer.pkl"), "wb") as f:
-                pickle.dump(self.tfidf, f)
+            if 'busqueda' in piezas:
+                # Guardar vectorizador TF-IDF y matriz como arrays mapeables
+                with open(os.path.join(models_dir, "tfidf_vectorizer.pkl"), "wb") as f:
+                    pickle.dump(self.tfidf, f)
+                guardar_csr(models_dir, "tfidf_matrix", self.tfidf_matrix, compresion)
             
-            # Guardar matriz TF-IDF
-            with open(os.path.join(models_dir, "tfidf_matrix.pkl"), "wb") as f:
-                pickle.dump(self.tfidf_matrix, f)
+            if 'vecinos' in piezas:
+                self._guardar_vecinos(models_dir, self.vecinos_ids, self.vecinos_scores)
             
-            # Guardar matriz de similitud coseno
-            with open(os.path.join(models_dir, "cosine_similarity.pkl"), "wb") as f:
-                pickle.dump(self.cosine_sim, f)
+            if 'campos' in piezas:
+                self.indice_campos.guardar(models_dir, compresion=compresion)
             
-            # Guardar modelo de predicción
-            with open(os.path.join(models_dir, "rf_pipeline.pkl"), "wb") as f:
-                pickle.dump(self.rf_pipeline, f)
+            if 'prediccion' in piezas:
+                # Guardar modelo de predicción (arrays e importancias, sin pickle)
+                self.bosque.guardar(models_dir, compresion=compresion)
             
+            self._registrar_manifiesto(models_dir, piezas)
             print("Modelos guardados exitosamente")
             return True
             
@@ -156,55 +268,414 @@ class DataLoader:
             print(f"Error al guardar modelos: {str(e)}")
             return False
     
-    def load_models(self, models_dir="models/saved"):
-        """Carga los modelos pre-entrenados"""
+    @METRICAS.medido('data_loader.carga_modelos')
+    def load_models(self, models_dir="models/saved", mmap=False):
+        """Carga los modelos pre-entrenados.
+        
+        Con mmap=True la matriz TF-IDF, la tabla de vecinos y el bosque quedan
+        mapeados en memoria (solo lectura), de modo que varios procesos los
+        comparten sin copiarlos. Los artefactos de búsqueda y de predicción se
+        leen en paralelo.
+        """
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            busqueda = pool.submit(self.cargar_modelos_busqueda, models_dir, mmap)
+            prediccion = pool.submit(self.cargar_modelo_prediccion, models_dir, mmap)
+            if not (busqueda.result() and prediccion.result()):
+                return False
+        
+        print("Modelos cargados exitosamente")
+        return True
+    
+    def cargar_modelos_busqueda(self, models_dir="models/saved", mmap=False):
+        """Carga el vectorizador, la matriz TF-IDF, la tabla de vecinos y,
+        si existe, el índice por campos"""
         try:
-            # Cargar vectorizador TF-IDF
-            with open(os.path.join(models_dir, "tfidf_vectorizer.pkl"), "rb") as f:
-                self.tfidf = pickle.load(f)
+            tareas = {
+                'tfidf_vectorizer': lambda: self._cargar_pickle(models_dir, "tfidf_vectorizer.pkl"),
+                'tfidf_matrix': lambda: self._cargar_matriz_tfidf(models_dir, mmap)
+            }
+            # Los artefactos anteriores al índice por campos no lo traen:
+            # initialize_system lo crea aparte
+            if IndiceCampos.existe(models_dir):
+                tareas['campos'] = lambda: IndiceCampos.cargar(models_dir, mmap=mmap)
+            # La tabla de vecinos solo depende de la matriz si hay que derivarla
+            vecinos_guardados = existen_arrays(models_dir, "vecinos", ('ids', 'scores'))
+            if vecinos_guardados:
+                tareas['vecinos'] = lambda: cargar_arrays(models_dir, "vecinos", ('ids', 'scores'), mmap)
             
-            # Cargar matriz TF-IDF
-            with open(os.path.join(models_dir, "tfidf_matrix.pkl"), "rb") as f:
-                self.tfidf_matrix = pickle.load(f)
+            artefactos = self._cargar_en_paralelo(tareas)
+            self.tfidf = artefactos['tfidf_vectorizer']
+            self.tfidf_matrix = artefactos['tfidf_matrix']
+            self.indice_campos = artefactos.get('campos')
             
-            # Cargar matriz de similitud coseno
-            with open(os.path.join(models_dir, "cosine_similarity.pkl"), "rb") as f:
-                self.cosine_sim = pickle.load(f)
+            if not vecinos_guardados:
+                artefactos.update(self._cargar_en_paralelo({
+                    'vecinos': lambda: self._cargar_vecinos(models_dir, mmap)
+                }))
+            self.vecinos_ids = artefactos['vecinos']['ids']
+            self.vecinos_scores = decodificar_scores(artefactos['vecinos']['scores'])
             
-            # Cargar modelo de predicción
-            with open(os.path.join(models_dir, "rf_pipeline.pkl"), "rb") as f:
-                self.rf_pipeline = pickle.load(f)
+            self._nueva_version()
+            return True
             
-            print("Modelos cargados exitosamente")
+        except Exception as e:
+            print(f"Error al cargar modelos de búsqueda: {str(e)}")
+            return False
+    
+    def cargar_modelo_prediccion(self, models_dir="models/saved", mmap=False):
+        """Carga el Random Forest en arrays planos, con sus importancias"""
+        try:
+            if not CompactForest.existe(models_dir):
+                # Artefactos anteriores (pipeline en pickle): hay que reentrenar
+                raise FileNotFoundError(f"no hay bosque en arrays en {models_dir}")
+            self.bosque = self._cargar_en_paralelo({
+                'bosque': lambda: CompactForest.cargar(models_dir, mmap=mmap)
+            })['bosque']
             return True
             
         except Exception as e:
-            print(f"Error al cargar modelos: {str(e)}")
+            print(f"Error al cargar modelo de predicción: {str(e)}")
+            return False
+    
+    def _cargar_en_paralelo(self, tareas):
+        """Ejecuta cargas independientes en un pool de hilos, midiendo cada una.
+        
+        tareas: diccionario nombre -> función sin argumentos. Devuelve el
+        diccionario nombre -> resultado; si una carga falla, se propaga su error.
+        """
+        with ThreadPoolExecutor(max_workers=len(tareas), thread_name_prefix="artefactos") as pool:
+            futuros = {
+                nombre: pool.submit(self._medir, nombre, funcion)
+                for nombre, funcion in tareas.items()
+            }
+            return {nombre: futuro.result() for nombre, futuro in futuros.items()}
+    
+    def _medir(self, nombre, funcion):
+        """Ejecuta funcion() y guarda su duración en tiempos_carga"""
+        inicio = time.perf_counter()
+        resultado = funcion()
+        self.tiempos_carga[nombre] = (time.perf_counter() - inicio) * 1000
+        METRICAS.observar(f'data_loader.artefacto.{nombre}', self.tiempos_carga[nombre] / 1000)
+        return resultado
+    
+    def _nueva_version(self):
+        with self._lock_version:
+            self.version_artefactos += 1
+    
+    @staticmethod
+    def _cargar_pickle(models_dir, nombre):
+        with open(os.path.join(models_dir, nombre), "rb") as f:
+            return pickle.load(f)
+    
+    def _cargar_matriz_tfidf(self, models_dir, mmap):
+        """Carga la matriz TF-IDF; el formato anterior (pickle) se convierte
+        a arrays para las siguientes cargas"""
+        if not existen_arrays(models_dir, "tfidf_matrix", CLAVES_CSR):
+            guardar_csr(models_dir, "tfidf_matrix", self._cargar_pickle(models_dir, "tfidf_matrix.pkl"),
+                        self.formato_artefactos['compresion'])
+        return cargar_csr(models_dir, "tfidf_matrix", mmap)
+    
+    def _cargar_vecinos(self, models_dir, mmap):
+        """Carga la tabla de vecinos, derivándola si solo hay artefactos anteriores"""
+        if not existen_arrays(models_dir, "vecinos", ('ids', 'scores')):
+            legado = os.path.join(models_dir, "cosine_similarity.pkl")
+            if os.path.exists(legado):
+                # Matriz densa del formato anterior: quedarse solo con los K mejores
+                cosine_sim = self._cargar_pickle(models_dir, "cosine_similarity.pkl")
+                k = min(self.k_vecinos + 1, cosine_sim.shape[0])
+                ids = np.empty((cosine_sim.shape[0], k), dtype=np.int32)
+                scores = np.empty((cosine_sim.shape[0], k), dtype=np.float32)
+                for i, fila in enumerate(cosine_sim):
+                    mejores = top_k_indices(fila, k)
+                    ids[i] = mejores
+                    scores[i] = fila[mejores]
+                del cosine_sim
+            else:
+                ids, scores = tabla_vecinos(self.tfidf_matrix, self.k_vecinos + 1)
+            
+            # Guardar en el formato nuevo para las siguientes cargas
+            self._guardar_vecinos(models_dir, ids, scores)
+        
+        return cargar_arrays(models_dir, "vecinos", ('ids', 'scores'), mmap)
+    
+    def _guardar_vecinos(self, models_dir, ids, scores):
+        """Guarda la tabla de vecinos en el formato compacto configurado"""
+        guardar_arrays(
+            models_dir, "vecinos",
+            codificar_vecinos(ids, scores, self.formato_artefactos['scores_vecinos']),
+            self.formato_artefactos['compresion']
+        )
+    
+    def reporte_tiempos_carga(self, total_ms=None):
+        """Imprime la duración de cada artefacto, de la carga más lenta a la más rápida"""
+        print("Tiempos de carga por artefacto:")
+        for nombre, ms in sorted(self.tiempos_carga.items(), key=lambda t: -t[1]):
+            print(f"  {nombre:<18} {ms:>9.1f} ms")
+        if total_ms is not None:
+            print(f"  {'suma':<18} {sum(self.tiempos_carga.values()):>9.1f} ms | "
+                  f"tiempo real: {total_ms:.1f} ms")
+        return dict(self.tiempos_carga)
+    
+    # ------------------------------------------------------------------
+    # Manifiesto de artefactos
+    # ------------------------------------------------------------------
+    def configuraciones_piezas(self):
+        """Lo que determina el contenido de cada pieza de artefactos"""
+        sklearn = versiones_librerias()['scikit-learn']
+        dataset = self.huella['sha256']
+        compresion = self.formato_artefactos['compresion']
+        return normalizar({
+            'busqueda': {
+                'dataset': dataset, 'tfidf': self.parametros_tfidf, 'scikit-learn': sklearn,
+                'compresion': compresion
+            },
+            'vecinos': {
+                'dataset': dataset, 'tfidf': self.parametros_tfidf, 'k': self.k_vecinos + 1,
+                'scores': self.formato_artefactos['scores_vecinos'], 'compresion': compresion
+            },
+            'campos': {
+                'dataset': dataset, 'tfidf': self.parametros_campos, 'scikit-learn': sklearn,
+                'compresion': compresion
+            },
+            'prediccion': {
+                'dataset': dataset, 'features': self.feature_columns,
+                'rf': self.parametros_rf, 'scikit-learn': sklearn, 'compresion': compresion,
+                # Los artefactos sin importancias (con rf_pipeline.pkl) se reentrenan
+                'arrays': CLAVES_BOSQUE
+            }
+        })
+    
+    def revisar_artefactos(self, models_dir="models/saved", solo_lectura=False):
+        """Piezas guardadas que no corresponden al dataset y la configuración actuales.
+        
+        Devuelve un diccionario pieza -> motivo. Solo lee el manifiesto y el
+        tamaño de los archivos; el dataset se vuelve a leer solo si cambió su
+        tamaño o su fecha. Sin manifiesto (artefactos anteriores) no se marca
+        nada: se validan al cargar y se registran entonces. Con
+        solo_lectura=True (artefactos del ejecutable) nunca se reescribe el
+        manifiesto.
+        """
+        self._resolver_dataset()
+        self.manifiesto = cargar_manifiesto(models_dir)
+        anterior = self.manifiesto.get('dataset') if self.manifiesto else None
+        self.huella = huella_dataset(self.dataset_path, anterior)
+        
+        if self.manifiesto is None:
+            return {}
+        
+        obsoletas = piezas_obsoletas(models_dir, self.manifiesto, self.configuraciones_piezas())
+        if (not obsoletas and not solo_lectura
+                and {k: anterior.get(k) for k in self.huella} != self.huella):
+            # Mismo contenido con otra fecha: actualizar para no rehashear
+            self.manifiesto['dataset'].update(self.huella)
+            guardar_json(models_dir, NOMBRE_MANIFIESTO, self.manifiesto)
+        return obsoletas
+    
+    def huellas_contenido(self, piezas=PIEZAS):
+        """Hash de las columnas del dataset cargado de las que depende cada pieza"""
+        huellas = {}
+        if {'busqueda', 'vecinos', 'campos'} & set(piezas):
+            # El índice depende del perfil de contenido de cada fila, en orden
+            h = hashlib.sha256()
+            for perfil in self.catalogo.perfiles_contenido():
+                h.update(perfil.encode('utf-8'))
+                h.update(b'\0')
+            huellas['busqueda'] = huellas['vecinos'] = huellas['campos'] = h.hexdigest()
+        if 'prediccion' in piezas:
+            columnas = self.df[self.feature_columns + ['vote_average']]
+            valores = pd.util.hash_pandas_object(columnas, index=False).to_numpy()
+            huellas['prediccion'] = hashlib.sha256(valores.tobytes()).hexdigest()
+        return {pieza: huellas[pieza] for pieza in piezas}
+    
+    def acotar_obsoletas(self, obsoletas, models_dir="models/saved", delta=None):
+        """Descarta las piezas marcadas solo porque cambió el dataset si sus
+        columnas no cambiaron.
+        
+        Requiere el dataset cargado. Una pieza sigue valiendo si, aparte del
+        hash del dataset, su configuración y sus archivos coinciden con el
+        manifiesto y la huella de sus columnas es la registrada (o, en
+        manifiestos sin esa huella, si el delta de refresco no la afecta). Esas
+        piezas se vuelven a registrar con el dataset nuevo sin reconstruirlas.
+        """
+        registros = (self.manifiesto or {}).get('piezas', {})
+        configuraciones = self.configuraciones_piezas()
+        actuales = self.huellas_contenido([p for p in obsoletas if p in registros])
+        afectadas = piezas_afectadas(delta) if delta is not None else set(PIEZAS)
+        
+        vigentes = []
+        for pieza in obsoletas:
+            registro = registros.get(pieza)
+            if registro is None:
+                continue
+            config = dict(configuraciones[pieza], dataset=registro['config'].get('dataset'))
+            if piezas_obsoletas(models_dir, {'piezas': {pieza: registro}}, {pieza: config}):
+                continue
+            if registro.get('contenido') is not None:
+                if registro['contenido'] == actuales[pieza]:
+                    vigentes.append(pieza)
+            elif pieza not in afectadas:
+                vigentes.append(pieza)
+        
+        if vigentes:
+            print(f"Sin cambios en sus columnas, se conservan: {', '.join(vigentes)}")
+            self._registrar_manifiesto(models_dir, vigentes)
+        return {pieza: motivo for pieza, motivo in obsoletas.items() if pieza not in vigentes}
+    
+    def confirmar_artefactos(self, models_dir="models/saved", registrar=True):
+        """Comprueba que los artefactos cargados correspondan al dataset cargado.
+        
+        Si no había manifiesto y registrar=True, registra los artefactos aceptados.
+        """
+        if self.tfidf_matrix is not None and self.tfidf_matrix.shape[0] != len(self.df):
+            print(f"Los artefactos tienen {self.tfidf_matrix.shape[0]} filas y el dataset "
+                  f"{len(self.df)}: se reconstruirán")
             return False
+        
+        if self.manifiesto is None and registrar:
+            print("Artefactos sin manifiesto: se registran con la configuración actual")
+            # El índice por campos, si falta, se registra al crearlo
+            self._registrar_manifiesto(
+                models_dir, [p for p in PIEZAS if p != 'campos' or self.indice_campos is not None]
+            )
+        return True
+    
+    def verificar_integridad(self, models_dir="models/saved"):
+        """Recalcula las sumas sha256 de todos los artefactos (lee cada archivo)"""
+        manifiesto = cargar_manifiesto(models_dir)
+        if manifiesto is None:
+            return ["No hay manifiesto de artefactos"]
+        return verificar_sumas(models_dir, manifiesto)
     
-    def initialize_system(self):
-        """Inicializa todo el sistema de datos y modelos"""
+    def _registrar_manifiesto(self, models_dir, piezas):
+        if self.huella is None:
+            self._resolver_dataset()
+            self.huella = huella_dataset(self.dataset_path)
+        self.manifiesto = registrar_piezas(
+            models_dir, piezas, self.configuraciones_piezas(), self.huella, len(self.df),
+            self.huellas_contenido(piezas)
+        )
+    
+    @METRICAS.medido('data_loader.inicializacion')
+    def initialize_system(self, mmap=False, models_dir="models/saved"):
+        """Inicializa todo el sistema de datos y modelos.
+        
+        El dataset y los artefactos guardados son independientes, así que se
+        leen a la vez en un pool de hilos. Las piezas que el manifiesto marca
+        como obsoletas se reconstruyen sin tocar las demás.
+        """
         print("Iniciando sistema de recomendación...")
         
-        # Cargar datos
-        if not self.load_data():
+        try:
+            obsoletas = self.revisar_artefactos(models_dir)
+        except Exception as e:
+            print(f"Error al revisar artefactos: {str(e)}")
+            return False
+        
+        if obsoletas:
+            for pieza, motivo in obsoletas.items():
+                print(f"Artefactos obsoletos ({pieza}): {motivo}")
+            if not self.load_data():
+                return False
+            obsoletas = self.acotar_obsoletas(obsoletas, models_dir)
+            if obsoletas and not self.reconstruir_piezas(obsoletas, models_dir):
+                return False
+            return self.load_models(models_dir, mmap)
+        
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            datos = pool.submit(self._medir, 'dataset', self.load_data)
+            modelos = pool.submit(self.load_models, models_dir, mmap)
+            datos_ok, modelos_ok = datos.result(), modelos.result()
+        self.reporte_tiempos_carga((time.perf_counter() - inicio) * 1000)
+        
+        if not datos_ok:
             return False
         
         # Intentar cargar modelos existentes
-        if self.load_models():
+        if modelos_ok and self.confirmar_artefactos(models_dir):
+            if self.indice_campos is None and not self.reconstruir_piezas(['campos'], models_dir):
+                return False
             print("Sistema inicializado con modelos pre-entrenados")
             return True
         
         # Si no existen modelos, crearlos
-        print("Creando nuevos modelos...")
-        if not self.create_similarity_matrix():
+        if not self.crear_modelos(mmap=mmap, models_dir=models_dir):
             return False
         
-        if not self.train_prediction_model():
+        print("Sistema inicializado exitosamente")
+        return True
+    
+    def reconstruir_incremental(self, delta=None, models_dir="models/saved"):
+        """Pone al día los artefactos tras un refresco del dataset.
+        
+        Solo se reconstruyen las piezas cuyas columnas cambiaron (por ejemplo,
+        un refresco que movió popularidad y votos reentrena el modelo de
+        predicción sin tocar el índice TF-IDF ni la tabla de vecinos).
+        Devuelve un diccionario pieza -> motivo con las piezas reconstruidas,
+        o None si hubo un error.
+        """
+        try:
+            if not self.load_data():
+                return None
+            obsoletas = self.acotar_obsoletas(self.revisar_artefactos(models_dir), models_dir, delta)
+        except Exception as e:
+            print(f"Error al revisar artefactos: {str(e)}")
+            return None
+        
+        if self.manifiesto is None:
+            # Artefactos sin manifiesto: no hay con qué comparar
+            obsoletas = {pieza: "no hay manifiesto" for pieza in PIEZAS}
+        for pieza, motivo in obsoletas.items():
+            print(f"Artefactos obsoletos ({pieza}): {motivo}")
+        if obsoletas and not self.reconstruir_piezas(obsoletas, models_dir):
+            return None
+        return obsoletas
+    
+    def crear_modelos(self, mmap=False, models_dir="models/saved"):
+        """Entrena y guarda todos los modelos a partir del dataset cargado"""
+        if not self.reconstruir_piezas(PIEZAS, models_dir):
             return False
         
-        # Guardar modelos para uso futuro
-        self.save_models()
+        # Volver a abrir los artefactos recién guardados como mapas de memoria
+        if mmap and not self.load_models(models_dir, mmap=True):
+            return False
         
-        print("Sistema inicializado exitosamente")
         return True
+    
+    @METRICAS.medido('data_loader.reconstruccion')
+    def reconstruir_piezas(self, piezas, models_dir="models/saved"):
+        """Reconstruye y guarda solo las piezas indicadas.
+        
+        Las piezas reconstruidas quedan en memoria; las demás no se cargan.
+        """
+        piezas = set(piezas)
+        if piezas == set(PIEZAS):
+            print("Creando nuevos modelos...")
+        else:
+            print(f"Reconstruyendo: {', '.join(sorted(piezas))}")
+        
+        if 'busqueda' in piezas:
+            # La tabla de vecinos sale de la matriz nueva
+            piezas.add('vecinos')
+            if not self.create_similarity_matrix():
+                return False
+        elif 'vecinos' in piezas:
+            # Solo cambió K: basta la matriz TF-IDF guardada
+            try:
+                self.tfidf_matrix = self._cargar_matriz_tfidf(models_dir, mmap=False)
+                self.vecinos_ids, self.vecinos_scores = tabla_vecinos(
+                    self.tfidf_matrix, self.k_vecinos + 1
+                )
+            except Exception as e:
+                print(f"Error al reconstruir la tabla de vecinos: {str(e)}")
+                return False
+        
+        if 'campos' in piezas and not self.crear_indice_campos():
+            return False
+        
+        if 'prediccion' in piezas and not self.train_prediction_model():
+            return False
+        
+        METRICAS.contar('data_loader.piezas_reconstruidas', len(piezas))
+        # Guardar modelos para uso futuro
+        return self.save_models(models_dir, piezas)
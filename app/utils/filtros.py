@@ -0,0 +1,158 @@
+"""
+Filtros de películas como arrays de bits empaquetados (un bit por fila).
+
+Los métodos de MovieRecommender aceptan un filtro que se aplica dentro de la
+selección top-K, no después: se devuelven k resultados siempre que haya k
+películas permitidas. Un filtro puede ser:
+
+- un nombre de FiltrosCatalogo, con '!' delante para negarlo:
+  'genero:Drama', 'decada:1990', 'rating_min:7', 'votos_min:500' o uno
+  registrado por la aplicación (p. ej. 'region:AR' con la disponibilidad);
+- un array booleano de N elementos (True = permitida) o su versión
+  empaquetada con np.packbits;
+- una lista de lo anterior, que se combina con AND.
+
+Los filtros con nombre se calculan una vez y quedan en caché empaquetados
+(N / 8 bytes cada uno); combinar varios es un AND de bytes.
+"""
+
+import hashlib
+import threading
+
+import numpy as np
+
+# Filtros con nombre calculados a pedido que se conservan en caché
+MAX_FILTROS_CACHE = 256
+
+
+class FiltrosCatalogo:
+    """Filtros con nombre sobre un catálogo y combinación de filtros en bits"""
+
+    def __init__(self, catalogo, max_cache=MAX_FILTROS_CACHE):
+        self.catalogo = catalogo
+        self.n = len(catalogo)
+        self.max_cache = max_cache
+        self._cache = {}
+        self._registrados = {}
+        self._id_a_fila = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Conversión entre máscaras y bits
+    # ------------------------------------------------------------------
+    def empaquetar(self, mascara):
+        """Bits empaquetados de una máscara booleana (o ya empaquetada) de N filas"""
+        mascara = np.asarray(mascara)
+        if mascara.dtype == np.uint8 and mascara.shape == ((self.n + 7) // 8,):
+            return mascara
+        if mascara.dtype != np.bool_ or mascara.shape != (self.n,):
+            raise ValueError(f"El filtro debe ser un array booleano de {self.n} elementos "
+                             f"o su versión empaquetada ({(self.n + 7) // 8} bytes)")
+        return np.packbits(mascara)
+
+    def desempaquetar(self, bits):
+        """Máscara booleana de N filas a partir de los bits"""
+        return np.unpackbits(bits, count=self.n).view(np.bool_)
+
+    # ------------------------------------------------------------------
+    # Filtros con nombre
+    # ------------------------------------------------------------------
+    def registrar(self, nombre, mascara):
+        """Registra un filtro con nombre (disponibilidad por región, lista de bloqueo...)"""
+        bits = self.empaquetar(mascara)
+        with self._lock:
+            self._registrados[nombre] = bits
+            self._cache.pop(nombre, None)
+
+    def bits(self, nombre):
+        """Bits del filtro con nombre, calculados una vez y guardados en caché"""
+        if nombre.startswith('!'):
+            return np.invert(self.bits(nombre[1:]))
+        with self._lock:
+            bits = self._registrados.get(nombre)
+            if bits is None:
+                bits = self._cache.get(nombre)
+        if bits is not None:
+            return bits
+
+        bits = np.packbits(self._calcular(nombre))
+        with self._lock:
+            if len(self._cache) >= self.max_cache:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[nombre] = bits
+        return bits
+
+    def _calcular(self, nombre):
+        tipo, _, valor = nombre.partition(':')
+        df = self.catalogo.df
+        try:
+            if tipo == 'genero':
+                mascara = np.zeros(self.n, dtype=bool)
+                codigos = [c for c, g in enumerate(self.catalogo.generos)
+                           if str(g).lower() == valor.strip().lower()]
+                if codigos:
+                    filas, generos = self.catalogo.pares_generos()
+                    mascara[filas[np.isin(generos, codigos)]] = True
+                return mascara
+            if tipo == 'decada':
+                decada = int(valor)
+                anios = df['release_year'].to_numpy(dtype=np.float64)
+                return (anios >= decada) & (anios < decada + 10)
+            if tipo == 'rating_min':
+                return df['vote_average'].to_numpy(dtype=np.float64) >= float(valor)
+            if tipo == 'votos_min':
+                return df['vote_count'].to_numpy(dtype=np.float64) >= float(valor)
+        except (TypeError, ValueError):
+            raise ValueError(f"Valor inválido en el filtro '{nombre}'")
+        raise ValueError(f"Filtro desconocido: '{nombre}' (genero:, decada:, rating_min:, "
+                         f"votos_min: o uno registrado)")
+
+    def de_ids(self, ids):
+        """Bits de las películas con esos ids de TMDb (p. ej. las ya vistas)"""
+        if self._id_a_fila is None:
+            ids_catalogo = self.catalogo.df['id'].to_numpy()
+            self._id_a_fila = dict(zip(ids_catalogo.tolist(), range(self.n)))
+        mascara = np.zeros(self.n, dtype=bool)
+        filas = [self._id_a_fila[int(i)] for i in ids if int(i) in self._id_a_fila]
+        mascara[filas] = True
+        return np.packbits(mascara)
+
+    def sin_ids(self, ids):
+        """Bits de todas las películas salvo las de esos ids (lista de bloqueo)"""
+        return np.invert(self.de_ids(ids))
+
+    # ------------------------------------------------------------------
+    # Combinación
+    # ------------------------------------------------------------------
+    def combinar(self, filtro):
+        """(bits permitidos, clave para la caché de consultas); (None, None) sin filtro.
+
+        Lanza ValueError si algún filtro no es válido.
+        """
+        if filtro is None:
+            return None, None
+        partes = [filtro] if isinstance(filtro, (str, np.ndarray)) else list(filtro)
+        if not partes:
+            return None, None
+
+        bits, claves = None, []
+        for parte in partes:
+            if parte is None:
+                # Array anotado como null en un registro de consultas
+                continue
+            if isinstance(parte, str):
+                actuales = self.bits(parte)
+                claves.append(parte)
+            else:
+                actuales = self.empaquetar(parte)
+                # Los arrays se identifican por su contenido
+                claves.append('bits:' + hashlib.blake2b(actuales.tobytes(), digest_size=12).hexdigest())
+            bits = actuales if bits is None else np.bitwise_and(bits, actuales)
+        if bits is None:
+            return None, None
+        return bits, tuple(sorted(claves))
+
+    def mascara(self, filtro):
+        """(máscara booleana permitida, clave); (None, None) sin filtro"""
+        bits, clave = self.combinar(filtro)
+        return (None, None) if bits is None else (self.desempaquetar(bits), clave)
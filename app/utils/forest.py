@@ -0,0 +1,99 @@
+import numpy as np
+
+from .artifacts import guardar_arrays, cargar_arrays, existen_arrays
+
+
+CLAVES_BOSQUE = ('media', 'escala', 'raices', 'izquierda', 'derecha',
+                 'caracteristica', 'umbral', 'valor', 'importancias')
+
+
+class CompactForest:
+    """Random Forest del pipeline (escalado + árboles) en arrays planos.
+
+    Predice igual que rf_pipeline.predict, pero los nodos de todos los árboles
+    viven en unos pocos arrays que pueden mapearse en memoria y compartirse
+    entre procesos sin copiarse. Guarda también feature_importances_, así que
+    no hace falta conservar el pipeline de scikit-learn.
+    """
+
+    def __init__(self, media, escala, raices, izquierda, derecha, caracteristica, umbral, valor,
+                 importancias):
+        self.media = media
+        self.escala = escala
+        self.raices = raices
+        self.izquierda = izquierda
+        self.derecha = derecha
+        self.caracteristica = caracteristica
+        self.umbral = umbral
+        self.valor = valor
+        # Importancia de cada característica, en el orden de las columnas
+        self.importancias = importancias
+
+    @classmethod
+    def desde_pipeline(cls, rf_pipeline):
+        """Extrae los arrays del StandardScaler y de cada árbol del pipeline"""
+        scaler = rf_pipeline.named_steps['preprocessor'].named_transformers_['num']
+        bosque = rf_pipeline.named_steps['regressor']
+
+        raices, izquierda, derecha, caracteristica, umbral, valor = [], [], [], [], [], []
+        desplazamiento = 0
+        for estimador in bosque.estimators_:
+            arbol = estimador.tree_
+            hoja = arbol.children_left == -1
+            raices.append(desplazamiento)
+            # Índices globales; las hojas apuntan a sí mismas para poder
+            # iterar todos los árboles a la vez sin ramas especiales
+            propios = np.arange(arbol.node_count) + desplazamiento
+            izquierda.append(np.where(hoja, propios, arbol.children_left + desplazamiento))
+            derecha.append(np.where(hoja, propios, arbol.children_right + desplazamiento))
+            caracteristica.append(np.where(hoja, 0, arbol.feature))
+            umbral.append(arbol.threshold)
+            valor.append(arbol.value[:, 0, 0])
+            desplazamiento += arbol.node_count
+
+        return cls(
+            np.asarray(scaler.mean_, dtype=np.float64),
+            np.asarray(scaler.scale_, dtype=np.float64),
+            np.asarray(raices, dtype=np.int32),
+            np.concatenate(izquierda).astype(np.int32),
+            np.concatenate(derecha).astype(np.int32),
+            np.concatenate(caracteristica).astype(np.int32),
+            np.concatenate(umbral).astype(np.float64),
+            np.concatenate(valor).astype(np.float64),
+            np.asarray(bosque.feature_importances_, dtype=np.float64)
+        )
+
+    def guardar(self, directorio, nombre="bosque", compresion=None):
+        guardar_arrays(
+            directorio, nombre, {clave: getattr(self, clave) for clave in CLAVES_BOSQUE}, compresion
+        )
+
+    @classmethod
+    def cargar(cls, directorio, nombre="bosque", mmap=True):
+        arrays = cargar_arrays(directorio, nombre, CLAVES_BOSQUE, mmap)
+        return cls(*(arrays[clave] for clave in CLAVES_BOSQUE))
+
+    @staticmethod
+    def existe(directorio, nombre="bosque"):
+        return existen_arrays(directorio, nombre, CLAVES_BOSQUE)
+
+    def predict(self, X):
+        """Predice para un DataFrame o array con las columnas del modelo"""
+        X = np.asarray(X, dtype=np.float64)
+        # Mismo escalado que StandardScaler y misma precisión que los árboles
+        X = ((X - self.media) / self.escala).astype(np.float32)
+
+        n = X.shape[0]
+        filas = np.arange(n)[:, None]
+        nodos = np.broadcast_to(self.raices, (n, len(self.raices))).copy()
+        while True:
+            siguientes = np.where(
+                X[filas, self.caracteristica[nodos]] <= self.umbral[nodos],
+                self.izquierda[nodos],
+                self.derecha[nodos]
+            )
+            if np.array_equal(siguientes, nodos):
+                break
+            nodos = siguientes
+
+        return self.valor[nodos].mean(axis=1)
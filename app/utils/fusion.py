@@ -0,0 +1,121 @@
+"""
+Puntaje híbrido: similitud combinada con popularidad y rating dentro del top-K.
+
+La popularidad (log(1 + popularity) / máximo) y el rating (vote_average / 10)
+se precalculan normalizados a [0, 1] una vez por catálogo. Para cada
+configuración de pesos se guarda además el término previo, la parte del
+puntaje que no depende de la consulta:
+
+- 'lineal': ws * sim + wp * pop + wr * rating
+- 'log':    ws * log(e + sim) + wp * log(e + pop) + wr * log(e + rating),
+            es decir, el logaritmo de una media geométrica ponderada
+
+Así, combinar los scores de una consulta cuesta una multiplicación y una
+suma (más un logaritmo en modo 'log') sobre el vector de similitudes, sin
+tocar el DataFrame. Los pesos se normalizan a suma 1.
+"""
+
+import threading
+
+import numpy as np
+
+MODOS_FUSION = ('lineal', 'log')
+SENALES_FUSION = ('similitud', 'popularidad', 'rating')
+# Desplazamiento del modo 'log' para que un valor 0 no dé -inf
+EPSILON_LOG = 1e-3
+# Configuraciones de pesos distintas cuyo término previo se conserva
+MAX_CONFIGURACIONES = 64
+
+
+class PuntajeHibrido:
+    """Una configuración de pesos con su término previo ya calculado"""
+
+    def __init__(self, modo, pesos, previo, clave):
+        self.modo = modo
+        self.peso_similitud = pesos[0]
+        self.previo = previo
+        self.clave = clave
+        # Filas por previo descendente; se ordenan la primera vez que se piden
+        self._orden = None
+        self._previo_ordenado = None
+
+    def termino_similitud(self, sim_scores):
+        """Parte del puntaje que aporta la similitud (creciente con ella)"""
+        if self.modo == 'log':
+            return self.peso_similitud * np.log(sim_scores + EPSILON_LOG)
+        return self.peso_similitud * sim_scores
+
+    def puntuar(self, sim_scores, filas=None):
+        """Puntaje híbrido de las similitudes (de todo el catálogo o de esas filas)"""
+        previo = self.previo if filas is None else self.previo[filas]
+        return self.termino_similitud(np.asarray(sim_scores, dtype=np.float64)) + previo
+
+    def filas_con_previo(self, minimo):
+        """Filas cuyo término previo es >= minimo, de mayor a menor previo"""
+        if self._orden is None:
+            orden = np.argsort(-self.previo, kind='stable')
+            self._previo_ordenado = -self.previo[orden]
+            self._orden = orden
+        return self._orden[:np.searchsorted(self._previo_ordenado, -minimo, side='right')]
+
+
+class SenalesCatalogo:
+    """Popularidad y rating normalizados del catálogo y puntajes híbridos"""
+
+    def __init__(self, catalogo):
+        df = catalogo.df
+        popularidad = np.log1p(np.clip(np.nan_to_num(df['popularity'].to_numpy(dtype=np.float64)), 0, None))
+        maximo = popularidad.max() if len(popularidad) else 0.0
+        self.popularidad = popularidad / maximo if maximo > 0 else popularidad
+        self.rating = np.clip(np.nan_to_num(df['vote_average'].to_numpy(dtype=np.float64)) / 10.0, 0.0, 1.0)
+        self._configuraciones = {}
+        self._lock = threading.Lock()
+
+    def hibrido(self, fusion):
+        """PuntajeHibrido de la configuración, o None si es solo similitud.
+
+        fusion: diccionario con los pesos 'similitud' (1 si falta),
+        'popularidad' y 'rating' (0 si faltan) y 'modo' ('lineal' o 'log').
+        Lanza ValueError si la configuración no es válida.
+        """
+        if not fusion:
+            return None
+        fusion = dict(fusion)
+        modo = fusion.pop('modo', 'lineal')
+        if modo not in MODOS_FUSION:
+            raise ValueError(f"Modo de fusión desconocido: {modo!r} (válidos: {', '.join(MODOS_FUSION)})")
+        desconocidas = sorted(set(fusion) - set(SENALES_FUSION))
+        if desconocidas:
+            raise ValueError(f"Señales de fusión desconocidas: {', '.join(desconocidas)} "
+                             f"(válidas: {', '.join(SENALES_FUSION)}, modo)")
+        try:
+            pesos = np.array([float(fusion.get('similitud', 1.0)), float(fusion.get('popularidad', 0.0)),
+                              float(fusion.get('rating', 0.0))])
+        except (TypeError, ValueError):
+            raise ValueError("Los pesos de fusión deben ser numéricos")
+        if not np.all(np.isfinite(pesos)) or (pesos < 0).any():
+            raise ValueError("Los pesos de fusión deben ser números no negativos")
+        if pesos[0] == 0:
+            raise ValueError("El peso de la similitud debe ser mayor que cero")
+        if not pesos[1:].any():
+            # Solo similitud: el ranking es el de siempre
+            return None
+        pesos = pesos / pesos.sum()
+
+        clave = (modo,) + tuple(pesos.round(6).tolist())
+        with self._lock:
+            hibrido = self._configuraciones.get(clave)
+        if hibrido is not None:
+            return hibrido
+
+        if modo == 'log':
+            previo = (pesos[1] * np.log(self.popularidad + EPSILON_LOG)
+                      + pesos[2] * np.log(self.rating + EPSILON_LOG))
+        else:
+            previo = pesos[1] * self.popularidad + pesos[2] * self.rating
+        hibrido = PuntajeHibrido(modo, pesos, previo, clave)
+        with self._lock:
+            if len(self._configuraciones) >= MAX_CONFIGURACIONES:
+                self._configuraciones.pop(next(iter(self._configuraciones)))
+            self._configuraciones[clave] = hibrido
+        return hibrido
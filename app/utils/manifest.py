@@ -0,0 +1,168 @@
+"""Manifiesto de artefactos: con qué dataset y configuración se creó cada pieza"""
+import os
+import json
+import hashlib
+import platform
+from datetime import datetime
+from importlib import metadata
+
+from .artifacts import guardar_json, cargar_json, archivos_arrays, CLAVES_CSR
+from .forest import CLAVES_BOSQUE
+
+NOMBRE_MANIFIESTO = "manifest"
+VERSION_FORMATO = 1
+
+# Archivos de cada pieza (pickles y artefactos de arrays); las piezas se
+# reconstruyen por separado
+ARCHIVOS_PIEZA = {
+    'busqueda': (("tfidf_vectorizer.pkl",), (("tfidf_matrix", CLAVES_CSR),)),
+    'vecinos': ((), (("vecinos", ('ids', 'scores')),)),
+    'campos': (("tfidf_campos.pkl",), (("tfidf_campos", CLAVES_CSR),)),
+    'prediccion': ((), (("bosque", CLAVES_BOSQUE),)),
+}
+PIEZAS = tuple(ARCHIVOS_PIEZA)
+
+# Columnas del dataset de las que depende cada pieza: si un cambio del dataset
+# no toca ninguna (p. ej. solo cambió vote_count), la pieza sigue valiendo
+CAMPOS_PIEZA = {
+    'busqueda': ('genres', 'cast', 'production_companies', 'director', 'overview'),
+    'vecinos': ('genres', 'cast', 'production_companies', 'director', 'overview'),
+    'campos': ('genres', 'cast', 'production_companies', 'director', 'overview'),
+    'prediccion': ('budget', 'popularity', 'runtime', 'release_date', 'genres', 'cast', 'vote_average'),
+}
+
+LIBRERIAS = ('numpy', 'scipy', 'pandas', 'scikit-learn')
+
+
+def archivos_pieza(directorio, pieza):
+    """Nombres de los archivos de una pieza tal como están guardados"""
+    pickles, arrays = ARCHIVOS_PIEZA[pieza]
+    archivos = list(pickles)
+    for nombre, claves in arrays:
+        archivos.extend(archivos_arrays(directorio, nombre, claves))
+    return archivos
+
+
+def sha256_archivo(ruta, bloque=1 << 20):
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for trozo in iter(lambda: f.read(bloque), b""):
+            h.update(trozo)
+    return h.hexdigest()
+
+
+def versiones_librerias():
+    """Versiones instaladas, leídas de los metadatos sin importar las librerías"""
+    versiones = {'python': platform.python_version()}
+    for libreria in LIBRERIAS:
+        try:
+            versiones[libreria] = metadata.version(libreria)
+        except metadata.PackageNotFoundError:
+            versiones[libreria] = None
+    return versiones
+
+
+def normalizar(config):
+    """Forma JSON de una configuración (tuplas como listas) para compararla"""
+    return json.loads(json.dumps(config))
+
+
+def huella_dataset(ruta, anterior=None):
+    """Tamaño, fecha de modificación y sha256 del dataset.
+
+    Si tamaño y fecha coinciden con la huella anterior se reutiliza su hash,
+    de modo que la comprobación habitual no lee el archivo.
+    """
+    st = os.stat(ruta)
+    if (anterior and anterior.get('tamano') == st.st_size
+            and anterior.get('mtime_ns') == st.st_mtime_ns):
+        return {'tamano': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': anterior['sha256']}
+    return {'tamano': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': sha256_archivo(ruta)}
+
+
+def cargar_manifiesto(directorio):
+    """Manifiesto guardado, o None si no existe o no se puede leer"""
+    try:
+        return cargar_json(directorio, NOMBRE_MANIFIESTO)
+    except (OSError, ValueError):
+        return None
+
+
+def registrar_piezas(directorio, piezas, configuraciones, dataset, filas, contenidos=None):
+    """Actualiza en el manifiesto las piezas indicadas con sus archivos y sumas.
+    
+    contenidos (pieza -> hash) es la huella de las columnas del dataset de las
+    que depende cada pieza.
+    """
+    manifiesto = cargar_manifiesto(directorio)
+    if manifiesto is None or manifiesto.get('formato') != VERSION_FORMATO:
+        manifiesto = {'formato': VERSION_FORMATO, 'piezas': {}}
+
+    manifiesto['dataset'] = dict(dataset, filas=int(filas))
+    manifiesto['librerias'] = versiones_librerias()
+    for pieza in piezas:
+        archivos = {}
+        for nombre in archivos_pieza(directorio, pieza):
+            ruta = os.path.join(directorio, nombre)
+            archivos[nombre] = {'tamano': os.path.getsize(ruta), 'sha256': sha256_archivo(ruta)}
+        manifiesto['piezas'][pieza] = {
+            'config': normalizar(configuraciones[pieza]),
+            'contenido': (contenidos or {}).get(pieza),
+            'archivos': archivos,
+            'creado': datetime.now().isoformat(timespec='seconds')
+        }
+
+    guardar_json(directorio, NOMBRE_MANIFIESTO, manifiesto)
+    return manifiesto
+
+
+def piezas_obsoletas(directorio, manifiesto, configuraciones):
+    """Piezas que no corresponden a la configuración actual, con el motivo.
+
+    Solo compara el manifiesto y el tamaño de los archivos (sin leerlos).
+    """
+    obsoletas = {}
+    registros = manifiesto.get('piezas', {}) if manifiesto else {}
+    for pieza, config in configuraciones.items():
+        registro = registros.get(pieza)
+        if registro is None:
+            obsoletas[pieza] = "no figura en el manifiesto"
+            continue
+
+        anterior = registro.get('config', {})
+        distintas = sorted(k for k in set(anterior) | set(config) if anterior.get(k) != config.get(k))
+        if distintas:
+            obsoletas[pieza] = f"cambió {', '.join(distintas)}"
+            continue
+
+        for nombre, datos in registro.get('archivos', {}).items():
+            ruta = os.path.join(directorio, nombre)
+            if not os.path.exists(ruta) or os.path.getsize(ruta) != datos['tamano']:
+                obsoletas[pieza] = f"{nombre} falta o fue modificado"
+                break
+    return obsoletas
+
+
+def piezas_afectadas(delta):
+    """Piezas que invalida un delta de refresco del dataset.
+    
+    Altas y bajas de películas cambian las filas de todas las piezas; si solo
+    hubo modificaciones, se miran las columnas que cambiaron.
+    """
+    if delta.get('agregadas') or delta.get('eliminadas'):
+        return set(PIEZAS)
+    campos = set(delta.get('campos', ()))
+    return {pieza for pieza, columnas in CAMPOS_PIEZA.items() if campos & set(columnas)}
+
+
+def verificar_sumas(directorio, manifiesto):
+    """Comprobación completa: recalcula el sha256 de cada archivo registrado"""
+    errores = []
+    for pieza, registro in (manifiesto or {}).get('piezas', {}).items():
+        for nombre, datos in registro.get('archivos', {}).items():
+            ruta = os.path.join(directorio, nombre)
+            if not os.path.exists(ruta):
+                errores.append(f"{pieza}: falta {nombre}")
+            elif sha256_archivo(ruta) != datos['sha256']:
+                errores.append(f"{pieza}: {nombre} no coincide con su suma sha256")
+    return errores
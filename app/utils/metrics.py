@@ -0,0 +1,219 @@
+"""
+Registro en proceso de métricas del motor: tramos de tiempo, contadores e
+histogramas.
+
+Los módulos usan el registro global METRICAS:
+
+    with METRICAS.tramo('recomendador.busqueda.puntuacion'):
+        ...
+    METRICAS.contar('recomendador.busqueda.consultas')
+
+    @METRICAS.medido('predictor.prediccion')
+    def predict_rating(self, ...):
+
+Deshabilitado (por defecto) cada llamada devuelve enseguida sin tomar
+tiempos ni locks. Se habilita con METRICAS.habilitar() o con la variable de
+entorno MOVIE_METRICAS=1, y se exporta con a_prometheus() (formato de texto de
+Prometheus) o a_json().
+"""
+
+import functools
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Límites superiores (en segundos) de los buckets de los histogramas de tiempo
+LIMITES_SEGUNDOS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+PREFIJO_PROMETHEUS = "movie_"
+
+
+class Histograma:
+    """Histograma acumulado con buckets fijos, como los de Prometheus"""
+
+    def __init__(self, limites=LIMITES_SEGUNDOS):
+        self.limites = limites
+        # Un bucket extra para lo que supera el último límite (+Inf)
+        self.cuentas = [0] * (len(limites) + 1)
+        self.cantidad = 0
+        self.suma = 0.0
+        self.minimo = math.inf
+        self.maximo = 0.0
+
+    def observar(self, valor):
+        self.cuentas[bisect_left(self.limites, valor)] += 1
+        self.cantidad += 1
+        self.suma += valor
+        self.minimo = min(self.minimo, valor)
+        self.maximo = max(self.maximo, valor)
+
+    def percentil(self, q):
+        """Estimación por interpolación lineal dentro del bucket (q en [0, 1])"""
+        if not self.cantidad:
+            return None
+        objetivo = q * self.cantidad
+        acumulado = 0
+        for i, cuenta in enumerate(self.cuentas):
+            if acumulado + cuenta >= objetivo and cuenta:
+                inferior = self.limites[i - 1] if i > 0 else 0.0
+                superior = self.limites[i] if i < len(self.limites) else self.maximo
+                estimado = inferior + (superior - inferior) * (objetivo - acumulado) / cuenta
+                return min(max(estimado, self.minimo), self.maximo)
+            acumulado += cuenta
+        return self.maximo
+
+    def resumen(self):
+        """Cantidad, suma y percentiles en milisegundos"""
+        if not self.cantidad:
+            return {'cantidad': 0}
+        return {
+            'cantidad': self.cantidad,
+            'total_ms': self.suma * 1000,
+            'media_ms': self.suma / self.cantidad * 1000,
+            'min_ms': self.minimo * 1000,
+            'p50_ms': self.percentil(0.50) * 1000,
+            'p90_ms': self.percentil(0.90) * 1000,
+            'p99_ms': self.percentil(0.99) * 1000,
+            'max_ms': self.maximo * 1000
+        }
+
+
+class _TramoNulo:
+    """Tramo que no mide nada (registro deshabilitado)"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        return False
+
+
+_TRAMO_NULO = _TramoNulo()
+
+
+class _Tramo:
+    __slots__ = ('registro', 'nombre', 'inicio')
+
+    def __init__(self, registro, nombre):
+        self.registro = registro
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excepcion):
+        self.registro.observar(self.nombre, time.perf_counter() - self.inicio)
+        return False
+
+
+class RegistroMetricas:
+    """Contadores e histogramas de duración identificados por nombre"""
+
+    def __init__(self, habilitado=False):
+        self.habilitado = habilitado
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def habilitar(self, activo=True):
+        self.habilitado = activo
+
+    def reiniciar(self):
+        with self._lock:
+            self.contadores = {}
+            self.histogramas = {}
+
+    def tramo(self, nombre):
+        """Context manager que registra la duración del bloque en 'nombre'"""
+        if not self.habilitado:
+            return _TRAMO_NULO
+        return _Tramo(self, nombre)
+
+    def medido(self, nombre):
+        """Decorador que registra la duración de cada llamada en 'nombre'"""
+        def decorador(funcion):
+            @functools.wraps(funcion)
+            def envoltura(*args, **kwargs):
+                if not self.habilitado:
+                    return funcion(*args, **kwargs)
+                inicio = time.perf_counter()
+                try:
+                    return funcion(*args, **kwargs)
+                finally:
+                    self.observar(nombre, time.perf_counter() - inicio)
+            return envoltura
+        return decorador
+
+    def contar(self, nombre, cantidad=1):
+        if not self.habilitado:
+            return
+        with self._lock:
+            self.contadores[nombre] = self.contadores.get(nombre, 0) + cantidad
+
+    def observar(self, nombre, segundos):
+        if not self.habilitado:
+            return
+        with self._lock:
+            histograma = self.histogramas.get(nombre)
+            if histograma is None:
+                histograma = self.histogramas[nombre] = Histograma()
+            histograma.observar(segundos)
+
+    def instantanea(self):
+        """Copia de los contadores y resumen de cada histograma"""
+        with self._lock:
+            return {
+                'habilitado': self.habilitado,
+                'contadores': dict(sorted(self.contadores.items())),
+                'tramos': {n: h.resumen() for n, h in sorted(self.histogramas.items())}
+            }
+
+    def a_json(self, indent=2):
+        return json.dumps(self.instantanea(), indent=indent, ensure_ascii=False)
+
+    def a_prometheus(self):
+        """Exposición en el formato de texto de Prometheus (versión 0.0.4)"""
+        lineas = []
+        with self._lock:
+            for nombre, valor in sorted(self.contadores.items()):
+                metrica = _nombre_prometheus(nombre) + "_total"
+                lineas.append(f"# TYPE {metrica} counter")
+                lineas.append(f"{metrica} {valor}")
+            for nombre, h in sorted(self.histogramas.items()):
+                metrica = _nombre_prometheus(nombre) + "_seconds"
+                lineas.append(f"# TYPE {metrica} histogram")
+                acumulado = 0
+                for limite, cuenta in zip(h.limites, h.cuentas):
+                    acumulado += cuenta
+                    lineas.append(f'{metrica}_bucket{{le="{limite:g}"}} {acumulado}')
+                lineas.append(f'{metrica}_bucket{{le="+Inf"}} {h.cantidad}')
+                lineas.append(f"{metrica}_sum {h.suma:.9f}")
+                lineas.append(f"{metrica}_count {h.cantidad}")
+        return "\n".join(lineas) + "\n"
+
+    def reporte(self):
+        """Tabla legible de los tramos y contadores registrados"""
+        datos = self.instantanea()
+        lineas = [f"{'tramo':<48} {'n':>7} {'p50 ms':>9} {'p99 ms':>9} {'total ms':>10}"]
+        for nombre, r in datos['tramos'].items():
+            if r['cantidad']:
+                lineas.append(f"{nombre:<48} {r['cantidad']:>7} {r['p50_ms']:>9.3f} "
+                              f"{r['p99_ms']:>9.3f} {r['total_ms']:>10.1f}")
+        for nombre, valor in datos['contadores'].items():
+            lineas.append(f"{nombre:<48} {valor:>7}")
+        return "\n".join(lineas)
+
+
+def _nombre_prometheus(nombre):
+    limpio = ''.join(c if c.isascii() and c.isalnum() else '_' for c in nombre)
+    return PREFIJO_PROMETHEUS + limpio
+
+
+METRICAS = RegistroMetricas(habilitado=os.environ.get('MOVIE_METRICAS', '') not in ('', '0'))
@@ -0,0 +1,112 @@
+"""Selección top-K y tabla de vecinos más similares"""
+import numpy as np
+
+
+def top_k_indices(scores, k, permitidos=None):
+    """Índices de los k mayores valores, de mayor a menor.
+
+    Los empates se resuelven por índice ascendente, igual que un ordenamiento
+    estable descendente de todo el vector, pero sin ordenarlo completo.
+
+    permitidos: máscara booleana opcional; la selección se hace solo entre
+    las posiciones permitidas, así que se devuelven k índices siempre que
+    haya al menos k permitidas.
+    """
+    if permitidos is not None:
+        candidatos = np.flatnonzero(permitidos)
+        return candidatos[top_k_indices(scores[candidatos], k)]
+
+    n = len(scores)
+    k = min(k, n)
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if k == n:
+        return np.argsort(-scores, kind='stable')
+
+    # Umbral: el k-ésimo mayor valor
+    umbral = np.partition(scores, n - k)[n - k]
+    mayores = np.flatnonzero(scores > umbral)
+    iguales = np.flatnonzero(scores == umbral)[:k - len(mayores)]
+    candidatos = np.concatenate([mayores, iguales])
+
+    orden = np.argsort(-scores[candidatos], kind='stable')
+    return candidatos[orden]
+
+
+def tabla_vecinos(tfidf_matrix, k, bloque=256):
+    """Tabla (ids int32, scores float32) de los k vecinos más similares por fila.
+
+    La primera columna suele ser la propia película; se guarda igual que en el
+    ordenamiento completo de la fila de similitud coseno.
+    """
+    # Importación diferida: solo se necesita al construir la tabla
+    from sklearn.metrics.pairwise import cosine_similarity
+    
+    n = tfidf_matrix.shape[0]
+    k = min(k, n)
+    ids = np.empty((n, k), dtype=np.int32)
+    scores = np.empty((n, k), dtype=np.float32)
+
+    for inicio in range(0, n, bloque):
+        fin = min(inicio + bloque, n)
+        sims = cosine_similarity(tfidf_matrix[inicio:fin], tfidf_matrix)
+        for j, fila in enumerate(sims):
+            mejores = top_k_indices(fila, k)
+            ids[inicio + j] = mejores
+            scores[inicio + j] = fila[mejores]
+
+    return ids, scores
+
+
+# Precisiones admitidas para guardar los scores de la tabla de vecinos
+PRECISIONES_SCORES = ('float32', 'float16', 'uint8')
+
+
+def codificar_vecinos(ids, scores, precision='float16'):
+    """Versión compacta de la tabla de vecinos para guardar en disco.
+    
+    Los ids usan el entero más chico que alcance para el número de filas y los
+    scores se reducen a float16 (error < 2.5e-4) o se cuantizan a uint8 en
+    pasos de 1/255 (los scores coseno de TF-IDF están en [0, 1]). El orden de
+    cada fila se conserva, así que el ranking no cambia.
+    """
+    if precision not in PRECISIONES_SCORES:
+        raise ValueError(f"Precisión de scores desconocida: {precision}")
+    
+    n = ids.shape[0]
+    tipo_ids = np.uint16 if n <= np.iinfo(np.uint16).max + 1 else np.int32
+    if precision == 'uint8':
+        scores = np.round(np.clip(scores, 0.0, 1.0) * 255).astype(np.uint8)
+    else:
+        scores = np.asarray(scores, dtype=precision)
+    return {'ids': np.asarray(ids, dtype=tipo_ids), 'scores': scores}
+
+
+class ScoresCuantizados:
+    """Scores guardados como uint8 que se decodifican a float32 al indexar.
+    
+    Permite mantener la tabla mapeada en memoria: solo se decodifican las
+    filas que se consultan.
+    """
+    
+    __slots__ = ('codigos',)
+    
+    def __init__(self, codigos):
+        self.codigos = codigos
+    
+    @property
+    def shape(self):
+        return self.codigos.shape
+    
+    def __len__(self):
+        return len(self.codigos)
+    
+    def __getitem__(self, clave):
+        return self.codigos[clave] * np.float32(1 / 255)
+
+
+def decodificar_scores(scores):
+    """Scores listos para indexar a partir de los guardados"""
+    if scores.dtype == np.uint8:
+        return ScoresCuantizados(scores)
+    return scores
@@ -0,0 +1,93 @@
+import bisect
+import numpy as np
+from rapidfuzz import process, fuzz
+
+from .validators import normalize_text
+
+
+class TitleSuggester:
+    """Sugerencias de títulos mientras se escribe.
+
+    Usa un array ordenado con los sufijos de cada título normalizado que
+    empiezan en una palabra ("the matrix" -> "the matrix", "matrix"), de modo
+    que un prefijo se resuelve con dos búsquedas binarias. El fuzzy matching
+    queda como respaldo, para llamarlo solo tras una pausa al escribir.
+    """
+
+    def __init__(self, text_corrector, limite=10):
+        self.text_corrector = text_corrector
+        self.limite = limite
+        self.claves = text_corrector.titulos_norm
+        self.norm_to_titles = text_corrector.norm_to_titles
+
+        # Popularidad de cada clave: la mayor entre sus títulos originales
+        df = text_corrector.df
+        popularidad_titulo = {}
+        for titulo, pop in zip(df['title'].tolist(), df['popularity'].tolist()):
+            if pop == pop and pop > popularidad_titulo.get(titulo, -1.0):
+                popularidad_titulo[titulo] = pop
+        self.popularidad = np.array([
+            max(popularidad_titulo.get(t, 0.0) for t in self.norm_to_titles[clave])
+            for clave in self.claves
+        ], dtype=np.float64)
+
+        # Sufijos que empiezan en palabra, ordenados, con su clave de título
+        pares = []
+        for i, clave in enumerate(self.claves):
+            inicio = 0
+            while True:
+                pares.append((clave[inicio:], i))
+                inicio = clave.find(' ', inicio) + 1
+                if inicio == 0:
+                    break
+        pares.sort()
+        self._sufijos = [sufijo for sufijo, _ in pares]
+        self._ids = np.array([i for _, i in pares], dtype=np.int32)
+
+    def _rango(self, prefijo):
+        inicio = bisect.bisect_left(self._sufijos, prefijo)
+        fin = bisect.bisect_left(self._sufijos, prefijo + '\uffff', inicio)
+        return inicio, fin
+
+    def _titulos(self, ids):
+        """Títulos originales de las claves dadas, sin repetir"""
+        titulos = []
+        for i in ids:
+            for titulo in self.norm_to_titles[self.claves[i]]:
+                if titulo not in titulos:
+                    titulos.append(titulo)
+        return titulos[:self.limite]
+
+    def sugerir(self, texto):
+        """Títulos cuyo nombre (o alguna de sus palabras) empieza por el texto.
+
+        Los resultados salen ordenados por popularidad.
+        """
+        prefijo = normalize_text(texto or '')
+        if not prefijo:
+            return []
+
+        inicio, fin = self._rango(prefijo)
+        if inicio == fin:
+            return []
+
+        ids = np.unique(self._ids[inicio:fin])
+        if len(ids) > self.limite:
+            # Solo los más populares, sin ordenar todo el rango
+            ids = ids[np.argpartition(-self.popularidad[ids], self.limite)[:self.limite]]
+        ids = ids[np.argsort(-self.popularidad[ids], kind='stable')]
+        return self._titulos(ids)
+
+    def sugerir_fuzzy(self, texto):
+        """Sugerencias aproximadas (más lentas) para cuando no hay prefijos"""
+        consulta = normalize_text(texto or '')
+        if not consulta:
+            return []
+
+        resultados = process.extract(
+            consulta,
+            self.claves,
+            scorer=fuzz.WRatio,
+            limit=self.limite
+        )
+        return self._titulos([indice for _, _, indice in resultados])
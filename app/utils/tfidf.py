@@ -0,0 +1,292 @@
+"""
+Ajuste del TF-IDF repartiendo el conteo de términos entre procesos.
+
+El costo de TfidfVectorizer.fit_transform está casi todo en tokenizar y
+contar (unigramas y bigramas de cada perfil), que es independiente por
+documento. ajustar_tfidf divide los documentos en fragmentos contiguos, cada
+proceso cuenta el suyo con el mismo analizador de scikit-learn y el padre
+une los vocabularios parciales en orden de aparición. La matriz de conteos
+resultante es la misma que arma TfidfVectorizer en serie; el recorte por
+min_df, max_df y max_features se aplica en el mismo orden y con los mismos
+empates, y el idf y la normalización los calcula un TfidfTransformer, así
+que el vocabulario, el idf y la matriz son idénticos byte a byte.
+
+CodificadorConsultas vectoriza consultas con el vocabulario y el idf ya
+ajustados, sin pasar por TfidfVectorizer.transform.
+"""
+
+import math
+import multiprocessing
+import os
+import re
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from numbers import Integral
+
+import numpy as np
+
+# Por debajo de esta cantidad de documentos el costo de arrancar el pool y
+# unir los vocabularios supera lo que se gana
+MIN_DOCUMENTOS_PARALELO = 20000
+
+# Documentos a repartir; los procesos creados por fork los heredan sin copiarlos
+_documentos = None
+
+
+def ajustar_tfidf(documentos, parametros, procesos=None):
+    """Crea y ajusta un TfidfVectorizer; devuelve (vectorizador, matriz).
+
+    procesos: cantidad de procesos para el conteo (None usa todos los CPU).
+    Con 1 proceso o pocos documentos equivale a fit_transform en serie.
+    """
+    from sklearn.feature_extraction.text import TfidfTransformer, TfidfVectorizer
+
+    vectorizador = TfidfVectorizer(**parametros)
+    procesos = procesos or os.cpu_count() or 1
+    if procesos > 1:
+        documentos = list(documentos)
+    # Con vocabulario fijo o sin idf no hay nada que ajustar aparte del conteo
+    en_serie = vectorizador.vocabulary is not None or not vectorizador.use_idf
+    if en_serie or procesos <= 1 or len(documentos) < MIN_DOCUMENTOS_PARALELO:
+        return vectorizador, vectorizador.fit_transform(documentos)
+
+    vocabulario, conteos = contar_en_paralelo(documentos, parametros, procesos)
+    conteos = conteos.astype(vectorizador.dtype, copy=False)
+    if vectorizador.binary:
+        conteos.data.fill(1)
+    conteos = recortar_terminos(conteos, vocabulario, vectorizador.min_df, vectorizador.max_df,
+                                vectorizador.max_features)
+
+    transformador = TfidfTransformer(norm=vectorizador.norm, use_idf=vectorizador.use_idf,
+                                     smooth_idf=vectorizador.smooth_idf,
+                                     sublinear_tf=vectorizador.sublinear_tf)
+    matriz = transformador.fit_transform(conteos)
+    vectorizador.vocabulary_ = vocabulario
+    vectorizador.idf_ = transformador.idf_
+    return vectorizador, matriz
+
+
+def recortar_terminos(conteos, vocabulario, min_df, max_df, max_features):
+    """Aplica min_df, max_df y max_features como TfidfVectorizer.fit.
+
+    Modifica vocabulario (término -> columna) y devuelve la matriz con las
+    columnas que quedan. Con max_features los términos se ordenan antes de
+    recortar, para que los empates de frecuencia se resuelvan igual que en
+    scikit-learn; sin él, después.
+    """
+    n_documentos = conteos.shape[0]
+    max_documentos = max_df if isinstance(max_df, Integral) else max_df * n_documentos
+    min_documentos = min_df if isinstance(min_df, Integral) else min_df * n_documentos
+    if max_documentos < min_documentos:
+        raise ValueError("max_df corresponds to < documents than min_df")
+
+    if max_features is not None:
+        _ordenar_terminos(conteos, vocabulario)
+
+    frecuencias = np.bincount(conteos.indices, minlength=conteos.shape[1])
+    mascara = (frecuencias <= max_documentos) & (frecuencias >= min_documentos)
+    if max_features is not None and mascara.sum() > max_features:
+        totales = np.asarray(conteos.sum(axis=0)).ravel()
+        # Mismo argsort que scikit-learn: los empates quedan como allí
+        mejores = (-totales[mascara]).argsort()[:max_features]
+        recortada = np.zeros(len(frecuencias), dtype=bool)
+        recortada[np.where(mascara)[0][mejores]] = True
+        mascara = recortada
+
+    nuevas = np.cumsum(mascara) - 1
+    for termino, columna in list(vocabulario.items()):
+        if mascara[columna]:
+            vocabulario[termino] = nuevas[columna]
+        else:
+            del vocabulario[termino]
+    conservadas = np.where(mascara)[0]
+    if len(conservadas) == 0:
+        raise ValueError("After pruning, no terms remain. Try a lower min_df or a higher max_df.")
+    conteos = conteos[:, conservadas]
+
+    if max_features is None:
+        _ordenar_terminos(conteos, vocabulario)
+    return conteos
+
+
+def _ordenar_terminos(conteos, vocabulario):
+    """Renumera las columnas en orden alfabético de los términos (en el lugar)"""
+    nuevo_orden = np.empty(len(vocabulario), dtype=conteos.indices.dtype)
+    for columna, (termino, anterior) in enumerate(sorted(vocabulario.items())):
+        vocabulario[termino] = columna
+        nuevo_orden[anterior] = columna
+    conteos.indices = nuevo_orden.take(conteos.indices, mode='clip')
+
+
+def contar_en_paralelo(documentos, parametros, procesos):
+    """Vocabulario {término: columna} y matriz de conteos, como _count_vocab.
+
+    Las columnas siguen el orden en que cada término aparece por primera vez
+    en todo el corpus, y cada fila queda con sus índices ordenados.
+    """
+    import scipy.sparse as sp
+
+    global _documentos
+    limites = np.linspace(0, len(documentos), procesos + 1).astype(int)
+    fragmentos = list(zip(limites[:-1], limites[1:]))
+
+    if 'fork' in multiprocessing.get_all_start_methods():
+        _documentos = documentos
+        try:
+            with ProcessPoolExecutor(procesos, mp_context=multiprocessing.get_context('fork')) as pool:
+                parciales = list(pool.map(_contar_fragmento, [parametros] * procesos,
+                                          *zip(*fragmentos)))
+        finally:
+            _documentos = None
+    else:
+        with ProcessPoolExecutor(procesos) as pool:
+            parciales = list(pool.map(_contar_fragmento, [parametros] * procesos,
+                                      *zip(*fragmentos),
+                                      [documentos[i:j] for i, j in fragmentos]))
+
+    # Unir en orden: los términos nuevos de cada fragmento van después de
+    # todos los de los fragmentos anteriores, igual que en una pasada serie
+    vocabulario = {}
+    indices, valores, indptr = [], [], [np.zeros(1, dtype=np.int64)]
+    for terminos, punteros, locales, cuentas in parciales:
+        columnas = np.fromiter((vocabulario.setdefault(t, len(vocabulario)) for t in terminos),
+                               dtype=np.int64, count=len(terminos))
+        indices.append(columnas[locales])
+        valores.append(cuentas)
+        indptr.append(punteros[1:] + indptr[-1][-1])
+
+    if not vocabulario:
+        raise ValueError("empty vocabulary; perhaps the documents only contain stop words")
+    indptr = np.concatenate(indptr)
+    tipo_indices = np.int64 if indptr[-1] > np.iinfo(np.int32).max else np.int32
+    conteos = sp.csr_matrix(
+        (np.concatenate(valores), np.concatenate(indices).astype(tipo_indices),
+         indptr.astype(tipo_indices)),
+        shape=(len(indptr) - 1, len(vocabulario)), dtype=np.float64
+    )
+    conteos.sort_indices()
+    return vocabulario, conteos
+
+
+def _contar_fragmento(parametros, inicio, fin, documentos=None):
+    """Cuenta los términos de documentos[inicio:fin] con índices locales.
+
+    Devuelve (términos en orden de aparición, indptr, índices, cuentas).
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    if documentos is None:
+        documentos = _documentos[inicio:fin]
+    analizar = TfidfVectorizer(**parametros).build_analyzer()
+    vocabulario = {}
+    indices, cuentas = array('q'), array('i')
+    indptr = array('q', [0])
+    for documento in documentos:
+        contador = {}
+        for termino in analizar(documento):
+            columna = vocabulario.setdefault(termino, len(vocabulario))
+            contador[columna] = contador.get(columna, 0) + 1
+        indices.extend(contador.keys())
+        cuentas.extend(contador.values())
+        indptr.append(len(indices))
+    return (list(vocabulario), np.frombuffer(indptr, dtype=np.int64),
+            np.frombuffer(indices, dtype=np.int64), np.frombuffer(cuentas, dtype=np.intc))
+
+
+class CodificadorConsultas:
+    """Vectoriza consultas cortas igual que TfidfVectorizer.transform, sin su maquinaria.
+
+    transform valida la entrada, arma el analizador y dos matrices dispersas
+    intermedias para cada llamada; con consultas de pocas palabras eso es casi
+    todo el costo. Aquí el patrón de tokens, las stop words y el idf se
+    preparan una sola vez y cada consulta se cuenta, pondera y normaliza en
+    Python, en el mismo orden de operaciones que scikit-learn, así que los
+    vectores son idénticos bit a bit.
+    """
+
+    def __init__(self, vocabulario, idf, patron, stop_words, ngram_range, minusculas, norma):
+        self.vocabulario = vocabulario
+        # Lista de floats: indexarla es más barato que indexar el array
+        self.idf = idf.tolist() if idf is not None else None
+        self.n_terminos = len(vocabulario)
+        self._tokenizar = re.compile(patron).findall
+        self.stop_words = stop_words
+        self.ngram_range = ngram_range
+        self.minusculas = minusculas
+        self.norma = norma
+
+    @classmethod
+    def desde_vectorizador(cls, vectorizador):
+        """Codificador del TfidfVectorizer ajustado, o None si su configuración
+        no se puede reproducir exactamente (analizador propio, acentos, etc.)"""
+        if vectorizador is None or not hasattr(vectorizador, 'vocabulary_'):
+            return None
+        reproducible = (
+            vectorizador.analyzer == 'word' and vectorizador.input == 'content'
+            and vectorizador.preprocessor is None and vectorizador.tokenizer is None
+            and vectorizador.strip_accents is None and not vectorizador.binary
+            and not vectorizador.sublinear_tf and vectorizador.norm in ('l2', None)
+            and vectorizador.dtype == np.float64
+        )
+        if not reproducible:
+            return None
+        return cls(
+            vectorizador.vocabulary_,
+            vectorizador.idf_ if vectorizador.use_idf else None,
+            vectorizador.token_pattern,
+            vectorizador.get_stop_words(),
+            vectorizador.ngram_range,
+            vectorizador.lowercase,
+            vectorizador.norm
+        )
+
+    def terminos(self, texto):
+        """Unigramas y n-gramas del texto, como el analizador 'word' de scikit-learn"""
+        if self.minusculas:
+            texto = texto.lower()
+        tokens = self._tokenizar(texto)
+        if self.stop_words is not None:
+            tokens = [t for t in tokens if t not in self.stop_words]
+
+        min_n, max_n = self.ngram_range
+        if max_n == 1:
+            return tokens
+        terminos = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), min(max_n + 1, len(tokens) + 1)):
+            terminos += [" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+        return terminos
+
+    def codificar(self, textos):
+        """Matriz CSR (len(textos) x vocabulario) idéntica a transform(textos)"""
+        import scipy.sparse as sp
+
+        vocabulario, idf = self.vocabulario, self.idf
+        indices, valores, indptr = [], [], [0]
+        for texto in textos:
+            contador = {}
+            for termino in self.terminos(texto):
+                columna = vocabulario.get(termino)
+                if columna is not None:
+                    contador[columna] = contador.get(columna, 0) + 1
+
+            columnas = sorted(contador)
+            fila = [float(contador[j]) for j in columnas]
+            if idf is not None:
+                fila = [v * idf[j] for v, j in zip(fila, columnas)]
+            if self.norma == 'l2':
+                # Suma secuencial, como inplace_csr_row_normalize_l2
+                suma = 0.0
+                for v in fila:
+                    suma += v * v
+                if suma != 0.0:
+                    suma = math.sqrt(suma)
+                    fila = [v / suma for v in fila]
+            indices += columnas
+            valores += fila
+            indptr.append(len(indices))
+
+        return sp.csr_matrix(
+            (np.array(valores, dtype=np.float64), np.array(indices, dtype=np.int32),
+             np.array(indptr, dtype=np.int32)),
+            shape=(len(indptr) - 1, self.n_terminos)
+        )
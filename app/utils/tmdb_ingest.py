@@ -0,0 +1,482 @@
+"""
+Descarga del dataset desde la API de TMDb.
+
+Reemplaza la celda del notebook que recorría 500 páginas de discover/movie y
+pedía el detalle de cada película en serie con time.sleep(0.2). Aquí las
+peticiones se hacen con asyncio sobre un requests.Session con pool de
+conexiones (las llamadas bloqueantes van a un pool de hilos), con:
+
+- concurrencia acotada (semáforo) y límite de peticiones por segundo
+  (token bucket) para respetar el límite de la API;
+- reintentos con backoff exponencial y jitter ante errores de red, 429
+  (respetando Retry-After) y 5xx;
+- un checkpoint JSONL al que se agrega cada página y cada película apenas
+  llegan, de modo que una ejecución interrumpida continúa donde quedó;
+- una caché en disco con la fila y los validadores (ETag, Last-Modified) de
+  cada película, que usa utils.tmdb_refresh para refrescar solo lo que cambió.
+
+El resultado se escribe con las mismas columnas y el mismo formato que el
+CSV del notebook (listas como texto), que es lo que lee DataLoader.load_data.
+
+Uso (desde app/):
+    python -m utils.tmdb_ingest --api-key CLAVE --paginas 500
+    python -m utils.tmdb_mock --port 8765 &
+    python -m utils.tmdb_ingest --base-url http://127.0.0.1:8765/3 --api-key prueba --paginas 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+URL_BASE = "https://api.themoviedb.org/3"
+COLUMNAS = [
+    'id', 'title', 'release_date', 'genres', 'overview', 'popularity', 'runtime',
+    'production_companies', 'cast', 'director', 'vote_average', 'vote_count', 'budget'
+]
+ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+
+class ErrorTMDb(Exception):
+    """Respuesta de la API que no se resuelve reintentando"""
+
+    def __init__(self, mensaje, estado=None):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+class TokenBucket:
+    """Límite de tasa: 'tasa' fichas por segundo con ráfagas de hasta 'capacidad'"""
+
+    def __init__(self, tasa, capacidad=None):
+        self.tasa = float(tasa)
+        self.capacidad = float(capacidad or max(1.0, tasa))
+        self._fichas = self.capacidad
+        self._ultimo = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def tomar(self):
+        async with self._lock:
+            while True:
+                ahora = time.monotonic()
+                self._fichas = min(self.capacidad, self._fichas + (ahora - self._ultimo) * self.tasa)
+                self._ultimo = ahora
+                if self._fichas >= 1.0:
+                    self._fichas -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._fichas) / self.tasa)
+
+    def pausar(self, segundos):
+        """Vacía el balde para que nadie pida durante 'segundos' (tras un 429)"""
+        self._fichas = min(self._fichas, -segundos * self.tasa)
+
+
+class ClienteTMDb:
+    """Cliente asíncrono de la API: pool de conexiones, límite de tasa y reintentos"""
+
+    def __init__(self, api_key, base_url=URL_BASE, concurrencia=16, tasa=40.0,
+                 reintentos=5, espera_base=0.5, timeout=10.0):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.reintentos = reintentos
+        self.espera_base = espera_base
+        self.timeout = timeout
+        self.session = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=concurrencia)
+        self.session.mount('http://', adaptador)
+        self.session.mount('https://', adaptador)
+        self._executor = ThreadPoolExecutor(max_workers=concurrencia, thread_name_prefix="tmdb")
+        self._semaforo = asyncio.Semaphore(concurrencia)
+        self._bucket = TokenBucket(tasa)
+        # Peticiones hechas, reintentos y bytes recibidos (para el resumen)
+        self.estadisticas = {'peticiones': 0, 'reintentos': 0, 'bytes': 0}
+        self._lock = threading.Lock()
+
+    def cerrar(self):
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+    def _get(self, ruta, params, cabeceras=None):
+        respuesta = self.session.get(
+            f"{self.base_url}/{ruta}", params=dict(params, api_key=self.api_key),
+            headers=cabeceras, timeout=self.timeout
+        )
+        with self._lock:
+            self.estadisticas['peticiones'] += 1
+            self.estadisticas['bytes'] += len(respuesta.content)
+        return respuesta
+
+    async def get_json(self, ruta, **params):
+        """JSON de la respuesta, o None si la API responde 404.
+
+        Reintenta errores de red, 429 y 5xx con backoff exponencial; otros
+        errores (clave inválida, parámetros) lanzan ErrorTMDb enseguida.
+        """
+        respuesta = await self._pedir(ruta, None, params)
+        return respuesta.json() if respuesta.status_code == 200 else None
+
+    async def get_condicional(self, ruta, validadores=None, **params):
+        """(estado, datos, validadores) de una petición condicional.
+
+        Con los validadores guardados (etag, last_modified) se envían
+        If-None-Match e If-Modified-Since: si el recurso no cambió, la API
+        responde 304 sin cuerpo y datos es None (igual que con 404).
+        """
+        cabeceras = {}
+        if validadores and validadores.get('etag'):
+            cabeceras['If-None-Match'] = validadores['etag']
+        if validadores and validadores.get('last_modified'):
+            cabeceras['If-Modified-Since'] = validadores['last_modified']
+        respuesta = await self._pedir(ruta, cabeceras or None, params)
+        nuevos = {
+            'etag': respuesta.headers.get('ETag'),
+            'last_modified': respuesta.headers.get('Last-Modified')
+        }
+        datos = respuesta.json() if respuesta.status_code == 200 else None
+        return respuesta.status_code, datos, nuevos
+
+    async def _pedir(self, ruta, cabeceras, params):
+        """Respuesta 200, 304 o 404, reintentando lo reintentable"""
+        loop = asyncio.get_running_loop()
+        for intento in range(self.reintentos + 1):
+            await self._bucket.tomar()
+            async with self._semaforo:
+                try:
+                    respuesta = await loop.run_in_executor(
+                        self._executor, self._get, ruta, params, cabeceras
+                    )
+                except requests.RequestException as e:
+                    respuesta, error = None, f"error de red: {e}"
+
+            if respuesta is not None:
+                if respuesta.status_code in (200, 304, 404):
+                    return respuesta
+                if respuesta.status_code not in ESTADOS_REINTENTABLES:
+                    raise ErrorTMDb(f"{ruta}: HTTP {respuesta.status_code} {respuesta.text[:200]}",
+                                    respuesta.status_code)
+                error = f"HTTP {respuesta.status_code}"
+
+            if intento == self.reintentos:
+                break
+            espera = self.espera_base * 2 ** intento * (0.5 + random.random())
+            if respuesta is not None and respuesta.status_code == 429:
+                try:
+                    espera = max(espera, float(respuesta.headers.get('Retry-After', 0)))
+                except ValueError:
+                    pass
+                self._bucket.pausar(espera)
+            with self._lock:
+                self.estadisticas['reintentos'] += 1
+            await asyncio.sleep(espera)
+
+        raise ErrorTMDb(f"{ruta}: sin respuesta tras {self.reintentos + 1} intentos ({error})")
+
+
+def fila_pelicula(detalles, generos):
+    """Fila del dataset a partir del detalle con créditos (mismo criterio que el notebook)"""
+    creditos = detalles.get('credits') or {}
+    return {
+        'id': detalles['id'],
+        'title': detalles.get('title', ''),
+        'release_date': detalles.get('release_date', ''),
+        'genres': [generos.get(g['id'], '') for g in detalles.get('genres', [])],
+        'overview': detalles.get('overview', ''),
+        'popularity': detalles.get('popularity', 0),
+        'runtime': detalles.get('runtime', 0),
+        'production_companies': [c['name'] for c in detalles.get('production_companies', [])],
+        'cast': [m['name'] for m in creditos.get('cast', [])[:5]],
+        'director': next(
+            (m['name'] for m in creditos.get('crew', []) if m.get('job') == 'Director'), 'Unknown'
+        ),
+        'vote_average': detalles.get('vote_average', 0),
+        'vote_count': detalles.get('vote_count', 0),
+        'budget': detalles.get('budget', 0),
+    }
+
+
+class Checkpoint:
+    """Registro JSONL de lo ya descargado.
+
+    Cada línea es una página ({"pagina": n, "ids": [...]}), una película
+    ({"pelicula": fila}) o una película inexistente ({"omitida": id}). Se
+    agrega una línea por resultado, así que una interrupción pierde como mucho
+    lo que estaba en vuelo; una última línea cortada se ignora al leer.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.paginas = {}
+        self.filas = {}
+        self.omitidas = set()
+        self._archivo = None
+
+    def cargar(self):
+        if not os.path.exists(self.ruta):
+            return self
+        with open(self.ruta, "r", encoding="utf-8") as f:
+            for linea in f:
+                try:
+                    registro = json.loads(linea)
+                except ValueError:
+                    continue
+                if 'pagina' in registro:
+                    self.paginas[registro['pagina']] = registro['ids']
+                elif 'pelicula' in registro:
+                    self.filas[registro['pelicula']['id']] = registro['pelicula']
+                elif 'omitida' in registro:
+                    self.omitidas.add(registro['omitida'])
+        return self
+
+    def _agregar(self, registro):
+        if self._archivo is None:
+            self._archivo = open(self.ruta, "a", encoding="utf-8")
+        self._archivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        self._archivo.flush()
+
+    def pagina(self, numero, ids):
+        self.paginas[numero] = ids
+        self._agregar({'pagina': numero, 'ids': ids})
+
+    def pelicula(self, fila):
+        self.filas[fila['id']] = fila
+        self._agregar({'pelicula': fila})
+
+    def omitida(self, movie_id):
+        self.omitidas.add(movie_id)
+        self._agregar({'omitida': movie_id})
+
+    def cerrar(self):
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+
+
+class CacheRespuestas:
+    """Caché en disco de los detalles descargados: un JSON por película.
+
+    Guarda la fila del dataset y los validadores de la respuesta (ETag y
+    Last-Modified) para poder pedir el detalle de nuevo de forma condicional.
+    Las películas que respondieron 404 quedan con fila None.
+    """
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        os.makedirs(directorio, exist_ok=True)
+
+    def _ruta(self, movie_id):
+        return os.path.join(self.directorio, f"{movie_id}.json")
+
+    def leer(self, movie_id):
+        """{'fila', 'etag', 'last_modified', 'descargado'} o None"""
+        try:
+            with open(self._ruta(movie_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def guardar(self, movie_id, fila, validadores):
+        entrada = dict(validadores, fila=fila, descargado=time.time())
+        temporal = f"{self._ruta(movie_id)}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(entrada, f, ensure_ascii=False)
+        os.replace(temporal, self._ruta(movie_id))
+
+
+def directorio_cache(salida):
+    """Caché por defecto: tmdb_cache/ junto al CSV"""
+    return os.path.join(os.path.dirname(os.path.abspath(salida)), "tmdb_cache")
+
+
+class IngestaTMDb:
+    """Descarga páginas de discover/movie y el detalle de cada película"""
+
+    def __init__(self, cliente, checkpoint, paginas=500, progreso_cada=500, cache=None):
+        self.cliente = cliente
+        self.checkpoint = checkpoint
+        self.cache = cache
+        self.paginas = paginas
+        self.progreso_cada = progreso_cada
+        self.generos = {}
+        self.descargadas = 0
+        # Pedidos que agotaron los reintentos; quedan para la próxima ejecución
+        self.fallidas = 0
+        self._inicio = None
+
+    async def ejecutar(self):
+        self._inicio = time.perf_counter()
+        datos = await self.cliente.get_json('genre/movie/list', language='en-US')
+        self.generos = {g['id']: g['name'] for g in datos['genres']}
+
+        # Cada página pide sus detalles en cuanto llega, sin esperar a las demás
+        await asyncio.gather(*(self._pagina(p) for p in range(1, self.paginas + 1)))
+
+    async def _pagina(self, numero):
+        ids = self.checkpoint.paginas.get(numero)
+        if ids is None:
+            datos = await self._intentar(
+                'discover/movie', language='en-US', sort_by='popularity.desc', page=numero
+            )
+            if datos is False:
+                return
+            ids = [m['id'] for m in (datos or {}).get('results', [])]
+            self.checkpoint.pagina(numero, ids)
+
+        pendientes = [
+            i for i in ids if i not in self.checkpoint.filas and i not in self.checkpoint.omitidas
+        ]
+        await asyncio.gather(*(self._pelicula(i) for i in pendientes))
+
+    async def _pelicula(self, movie_id):
+        respuesta = await self._intentar(f'movie/{movie_id}', append_to_response='credits')
+        # Otra página pudo traer el mismo id mientras se esperaba
+        if respuesta is False or movie_id in self.checkpoint.filas:
+            return
+        _, detalles, validadores = respuesta
+        if detalles is None:
+            self.checkpoint.omitida(movie_id)
+            if self.cache is not None:
+                self.cache.guardar(movie_id, None, validadores)
+            return
+        fila = fila_pelicula(detalles, self.generos)
+        self.checkpoint.pelicula(fila)
+        if self.cache is not None:
+            self.cache.guardar(movie_id, fila, validadores)
+
+        self.descargadas += 1
+        if self.descargadas % self.progreso_cada == 0:
+            transcurrido = time.perf_counter() - self._inicio
+            print(f"  {self.descargadas} películas descargadas "
+                  f"({self.descargadas / transcurrido:.1f}/s)")
+
+    async def _intentar(self, ruta, validadores=None, **params):
+        """Como get_condicional (get_json para discover), pero un pedido que
+        agota los reintentos devuelve False en lugar de detener la descarga (los
+        errores no reintentables sí la detienen)"""
+        try:
+            if ruta == 'discover/movie':
+                return await self.cliente.get_json(ruta, **params)
+            return await self.cliente.get_condicional(ruta, validadores, **params)
+        except ErrorTMDb as e:
+            if e.estado is not None and e.estado not in ESTADOS_REINTENTABLES:
+                raise
+            self.fallidas += 1
+            print(f"  Falló {ruta}: {str(e)}")
+            return False
+
+    def dataframe(self):
+        """Películas en el orden de discover (popularidad), sin repetir ids"""
+        filas, vistos = [], set()
+        for numero in sorted(self.checkpoint.paginas):
+            for movie_id in self.checkpoint.paginas[numero]:
+                if movie_id in self.checkpoint.filas and movie_id not in vistos:
+                    vistos.add(movie_id)
+                    filas.append(self.checkpoint.filas[movie_id])
+        return pd.DataFrame(filas, columns=COLUMNAS)
+
+
+def escribir_csv(df, salida):
+    """Escribe el CSV de forma atómica (archivo temporal y reemplazo)"""
+    temporal = f"{salida}.tmp"
+    df.to_csv(temporal, index=False)
+    os.replace(temporal, salida)
+
+
+async def _ingerir(api_key, paginas, salida, checkpoint_path, cache_dir, base_url, concurrencia, tasa,
+                   reintentos):
+    checkpoint = Checkpoint(checkpoint_path).cargar()
+    if checkpoint.paginas:
+        print(f"Reanudando: {len(checkpoint.paginas)} páginas y "
+              f"{len(checkpoint.filas)} películas ya descargadas")
+
+    cliente = ClienteTMDb(api_key, base_url, concurrencia, tasa, reintentos)
+    ingesta = IngestaTMDb(cliente, checkpoint, paginas, cache=CacheRespuestas(cache_dir))
+    inicio = time.perf_counter()
+    try:
+        await ingesta.ejecutar()
+    finally:
+        checkpoint.cerrar()
+        cliente.cerrar()
+
+    df = ingesta.dataframe()
+    escribir_csv(df, salida)
+    return {
+        'peliculas': len(df),
+        'nuevas': ingesta.descargadas,
+        'omitidas': len(checkpoint.omitidas),
+        'fallidas': ingesta.fallidas,
+        'segundos': time.perf_counter() - inicio,
+        **cliente.estadisticas
+    }
+
+
+def descargar_dataset(api_key, paginas=500, salida="dataset_movies_api.csv", checkpoint=None,
+                      base_url=URL_BASE, concurrencia=16, tasa=40.0, reintentos=5, cache=None):
+    """Descarga el dataset y lo guarda en 'salida'.
+
+    El checkpoint (por defecto salida + '.checkpoint.jsonl') se conserva tras
+    terminar: volver a ejecutar solo pide lo que falte. Cada detalle se guarda
+    también en la caché (por defecto tmdb_cache/ junto al CSV). Devuelve
+    (resumen, error).
+    """
+    checkpoint = checkpoint or f"{salida}.checkpoint.jsonl"
+    try:
+        resumen = asyncio.run(_ingerir(
+            api_key, paginas, salida, checkpoint, cache or directorio_cache(salida),
+            base_url, concurrencia, tasa, reintentos
+        ))
+        return resumen, None
+    except ErrorTMDb as e:
+        return None, f"Error de la API de TMDb: {str(e)}"
+    except KeyboardInterrupt:
+        return None, f"Descarga interrumpida; se reanudará desde {checkpoint}"
+    except Exception as e:
+        return None, f"Error durante la descarga: {str(e)}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Descarga el dataset de películas desde TMDb")
+    parser.add_argument('--api-key', default=os.environ.get('TMDB_API_KEY'),
+                        help="Clave de la API (por defecto la variable TMDB_API_KEY)")
+    parser.add_argument('--paginas', type=int, default=500)
+    parser.add_argument('--salida', default='dataset_movies_api.csv')
+    parser.add_argument('--checkpoint', default=None)
+    parser.add_argument('--cache', default=None, help="Directorio de la caché de respuestas")
+    parser.add_argument('--base-url', default=URL_BASE)
+    parser.add_argument('--concurrencia', type=int, default=16)
+    parser.add_argument('--tasa', type=float, default=40.0, help="Peticiones por segundo")
+    parser.add_argument('--reintentos', type=int, default=5)
+    args = parser.parse_args()
+
+    if not args.api_key:
+        print("Falta la clave de la API (--api-key o TMDB_API_KEY)")
+        return 1
+
+    resumen, error = descargar_dataset(
+        args.api_key, args.paginas, args.salida, args.checkpoint,
+        args.base_url, args.concurrencia, args.tasa, args.reintentos, args.cache
+    )
+    if error:
+        print(error)
+        return 1
+    print(f"Películas: {resumen['peliculas']} ({resumen['nuevas']} nuevas, "
+          f"{resumen['omitidas']} inexistentes, {resumen['fallidas']} fallidas) "
+          f"en {resumen['segundos']:.1f} s | "
+          f"{resumen['peticiones']} peticiones, {resumen['reintentos']} reintentos, "
+          f"{resumen['bytes'] / 1e6:.1f} MB")
+    if resumen['fallidas']:
+        print("Hubo pedidos fallidos: vuelve a ejecutar para completar el dataset")
+    print(f"Dataset guardado en {args.salida}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""
+Servidor local que imita los endpoints de TMDb que usa la ingesta.
+
+Sirve /3/genre/movie/list, /3/discover/movie y /3/movie/{id} con datos
+sintéticos deterministas (la misma semilla da siempre las mismas películas),
+para probar utils.tmdb_ingest sin clave real ni red. Puede simular latencia,
+errores 500 aleatorios, un límite de peticiones por segundo (responde 429 con
+Retry-After) y películas que devuelven 404. Los detalles llevan ETag y
+Last-Modified y responden 304 a las peticiones condicionales; actualizar()
+cambia la popularidad y los votos de algunas películas para probar refrescos.
+
+Uso (desde app/):
+    python -m utils.tmdb_mock --port 8765 --paginas 50 --latencia-ms 20
+    python -m utils.tmdb_ingest --base-url http://127.0.0.1:8765/3 --api-key prueba --paginas 50
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl
+
+GENEROS = {
+    28: 'Action', 12: 'Adventure', 16: 'Animation', 35: 'Comedy', 80: 'Crime',
+    18: 'Drama', 14: 'Fantasy', 27: 'Horror', 9648: 'Mystery', 10749: 'Romance',
+    878: 'Science Fiction', 53: 'Thriller'
+}
+PALABRAS = [
+    'love', 'war', 'space', 'dragon', 'city', 'night', 'secret', 'island', 'king',
+    'robot', 'storm', 'heist', 'ocean', 'school', 'family', 'magic', 'journey',
+    'police', 'alien', 'ghost', 'dark', 'fire', 'hero', 'friend', 'world', 'life'
+]
+POR_PAGINA = 20
+# Fecha de la versión inicial de cada película (Last-Modified)
+FECHA_BASE = 1700000000
+RUTA_DETALLE = re.compile(r'^/3/movie/(\d+)$')
+
+
+class DatosSimulados:
+    """Catálogo sintético: página p de discover contiene los ids (p-1)*20+1 .. p*20"""
+
+    def __init__(self, paginas=500, semilla=0, tasa_404=0.01):
+        self.paginas = paginas
+        self.semilla = semilla
+        self.tasa_404 = tasa_404
+        # Versión de cada película; actualizar() la incrementa
+        self.versiones = {}
+        # Cambio relativo máximo de popularidad y votos en cada versión
+        self.cambio = 0.5
+        self._lock = threading.Lock()
+
+    def ids_pagina(self, pagina):
+        inicio = (pagina - 1) * POR_PAGINA + 1
+        return list(range(inicio, inicio + POR_PAGINA))
+
+    def existe(self, movie_id):
+        total = self.paginas * POR_PAGINA
+        if not 1 <= movie_id <= total:
+            return False
+        return random.Random(f"{self.semilla}-404-{movie_id}").random() >= self.tasa_404
+
+    def version(self, movie_id):
+        with self._lock:
+            return self.versiones.get(movie_id, 0)
+
+    def actualizar(self, ids, cambio=0.5):
+        """Cambia popularidad y votos de las películas indicadas en hasta ±cambio"""
+        with self._lock:
+            self.cambio = cambio
+            for movie_id in ids:
+                self.versiones[movie_id] = self.versiones.get(movie_id, 0) + 1
+
+    def resumen(self, movie_id):
+        """Entrada de discover/movie (sin créditos)"""
+        rng = random.Random(f"{self.semilla}-{movie_id}")
+        detalle = self._detalle(movie_id, rng)
+        return {k: detalle[k] for k in ('id', 'title', 'release_date', 'overview',
+                                        'popularity', 'vote_average', 'vote_count')}
+
+    def detalle(self, movie_id):
+        return self._detalle(movie_id, random.Random(f"{self.semilla}-{movie_id}"))
+
+    def _detalle(self, movie_id, rng):
+        titulo = ' '.join(rng.choice(PALABRAS).capitalize() for _ in range(rng.randint(1, 3)))
+        generos = rng.sample(sorted(GENEROS), rng.randint(1, 3))
+        popularidad = round(1000.0 / (1 + movie_id) ** 0.5 + rng.random(), 3)
+        votos = rng.randint(10, 20000)
+        version = self.version(movie_id)
+        if version:
+            cambio = random.Random(f"{self.semilla}-{movie_id}-v{version}")
+            popularidad = round(popularidad * (1 + cambio.uniform(-self.cambio, self.cambio)), 3)
+            votos += int(votos * cambio.uniform(0, self.cambio))
+        return {
+            'id': movie_id,
+            'title': titulo if rng.random() > 0.05 else f"{titulo} {movie_id}",
+            'release_date': f"{rng.randint(1950, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'genres': [{'id': g, 'name': GENEROS[g]} for g in generos],
+            'overview': ' '.join(rng.choice(PALABRAS) for _ in range(rng.randint(10, 40))),
+            'popularity': popularidad,
+            'runtime': rng.randint(70, 180),
+            'production_companies': [
+                {'id': c, 'name': f"Studio {c}"} for c in rng.sample(range(1, 60), rng.randint(0, 3))
+            ],
+            'vote_average': round(rng.uniform(3.0, 9.0), 1),
+            'vote_count': votos,
+            'budget': rng.randint(0, 200) * 1_000_000,
+            # Créditos del tamaño habitual de la API (decenas de entradas con
+            # sus campos), que es lo que pesa cada detalle
+            'credits': {
+                'cast': [
+                    {'id': a, 'name': f"Actor{a} Surname{a % 97}", 'character': f"Character {orden}",
+                     'order': orden, 'profile_path': f"/perfil{a}.jpg", 'popularity': round(rng.random(), 3),
+                     'known_for_department': 'Acting', 'credit_id': f"{movie_id:08x}{a:08x}"}
+                    for orden, a in enumerate(rng.sample(range(1, 3000), rng.randint(0, 40)))
+                ],
+                'crew': [
+                    {'id': c, 'name': f"Crew {c}", 'job': rng.choice(['Screenplay', 'Producer', 'Editor']),
+                     'department': 'Production', 'profile_path': None,
+                     'credit_id': f"{movie_id:08x}{c:08x}"}
+                    for c in rng.sample(range(1, 5000), rng.randint(5, 40))
+                ] + ([{'name': f"Director {rng.randint(1, 800)}", 'job': 'Director'}]
+                     if rng.random() > 0.02 else [])
+            }
+        }
+
+
+class ServidorTMDbSimulado:
+    """Servidor HTTP en un hilo de fondo; base_url apunta a su /3"""
+
+    def __init__(self, host='127.0.0.1', port=0, paginas=500, semilla=0, api_key=None,
+                 latencia_ms=0.0, tasa_error=0.0, limite_por_segundo=None, tasa_404=0.01):
+        self.datos = DatosSimulados(paginas, semilla, tasa_404)
+        self.api_key = api_key
+        self.latencia = latencia_ms / 1000.0
+        self.tasa_error = tasa_error
+        self.limite_por_segundo = limite_por_segundo
+        # Peticiones atendidas por tipo y por código de estado
+        self.contadores = Counter()
+        self._lock = threading.Lock()
+        self._ventana = (0, 0)  # (segundo, peticiones en ese segundo)
+        self._rng = random.Random(semilla)
+        self._servidor = ThreadingHTTPServer((host, port), self._manejador())
+        self._servidor.daemon_threads = True
+        self._hilo = None
+
+    @property
+    def base_url(self):
+        host, port = self._servidor.server_address[:2]
+        return f"http://{host}:{port}/3"
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, name="tmdb_mock", daemon=True)
+        self._hilo.start()
+        return self.base_url
+
+    def detener(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def _contar(self, *claves):
+        with self._lock:
+            for clave in claves:
+                self.contadores[clave] += 1
+
+    def _limitado(self):
+        """True si la petición supera el límite por segundo"""
+        if self.limite_por_segundo is None:
+            return False
+        with self._lock:
+            segundo = int(time.monotonic())
+            actual, usadas = self._ventana
+            usadas = usadas + 1 if actual == segundo else 1
+            self._ventana = (segundo, usadas)
+            return usadas > self.limite_por_segundo
+
+    def _falla(self):
+        with self._lock:
+            return self._rng.random() < self.tasa_error
+
+    def responder(self, ruta, params, condiciones=None):
+        """(estado, cabeceras, cuerpo) para una petición GET.
+
+        condiciones puede traer 'If-None-Match' y 'If-Modified-Since'.
+        """
+        if self.api_key is not None and params.get('api_key') != self.api_key:
+            return 401, {}, {'status_code': 7, 'status_message': 'Invalid API key'}
+        if self._limitado():
+            return 429, {'Retry-After': '1'}, {'status_code': 25, 'status_message': 'Rate limit'}
+        if self._falla():
+            return 500, {}, {'status_message': 'Internal error'}
+
+        if ruta == '/3/genre/movie/list':
+            return 200, {}, {'genres': [{'id': g, 'name': n} for g, n in GENEROS.items()]}
+
+        if ruta == '/3/discover/movie':
+            pagina = int(params.get('page', 1))
+            if not 1 <= pagina <= self.datos.paginas:
+                return 422, {}, {'errors': ['page must be less than or equal to 500']}
+            resultados = [self.datos.resumen(i) for i in self.datos.ids_pagina(pagina)]
+            return 200, {}, {
+                'page': pagina, 'results': resultados,
+                'total_pages': self.datos.paginas,
+                'total_results': self.datos.paginas * POR_PAGINA
+            }
+
+        coincidencia = RUTA_DETALLE.match(ruta)
+        if coincidencia:
+            movie_id = int(coincidencia.group(1))
+            if not self.datos.existe(movie_id):
+                return 404, {}, {'status_code': 34, 'status_message': 'Not found'}
+            detalle = self.datos.detalle(movie_id)
+            etag = '"' + hashlib.sha1(json.dumps(detalle, sort_keys=True).encode()).hexdigest()[:16] + '"'
+            cabeceras = {
+                'ETag': etag,
+                'Last-Modified': formatdate(FECHA_BASE + 86400 * self.datos.version(movie_id), usegmt=True)
+            }
+            condiciones = condiciones or {}
+            if condiciones.get('If-None-Match') == etag or (
+                    'If-None-Match' not in condiciones
+                    and condiciones.get('If-Modified-Since') == cabeceras['Last-Modified']):
+                return 304, cabeceras, None
+            return 200, cabeceras, detalle
+
+        return 404, {}, {'status_message': 'Unknown route'}
+
+    def _manejador(self):
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                partes = urlsplit(self.path)
+                params = dict(parse_qsl(partes.query))
+                if servidor.latencia:
+                    time.sleep(servidor.latencia)
+                condiciones = {
+                    nombre: self.headers[nombre] for nombre in ('If-None-Match', 'If-Modified-Since')
+                    if self.headers.get(nombre)
+                }
+                estado, cabeceras, cuerpo = servidor.responder(partes.path, params, condiciones)
+                tipo = 'detalle' if RUTA_DETALLE.match(partes.path) else partes.path
+                servidor._contar(tipo, estado)
+
+                datos = b'' if cuerpo is None else json.dumps(cuerpo).encode('utf-8')
+                self.send_response(estado)
+                self.send_header('Content-Type', 'application/json;charset=utf-8')
+                self.send_header('Content-Length', str(len(datos)))
+                for nombre, valor in cabeceras.items():
+                    self.send_header(nombre, valor)
+                self.end_headers()
+                self.wfile.write(datos)
+
+            def log_message(self, *args):
+                pass
+
+        return Manejador
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que imita la API de TMDb")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--paginas', type=int, default=500)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--api-key', default=None, help="Si se indica, exige esta clave")
+    parser.add_argument('--latencia-ms', type=float, default=0.0)
+    parser.add_argument('--tasa-error', type=float, default=0.0, help="Fracción de respuestas 500")
+    parser.add_argument('--limite-por-segundo', type=int, default=None)
+    args = parser.parse_args()
+
+    servidor = ServidorTMDbSimulado(
+        args.host, args.port, args.paginas, args.semilla, args.api_key,
+        args.latencia_ms, args.tasa_error, args.limite_por_segundo
+    )
+    print(f"TMDb simulado en {servidor.iniciar()} ({args.paginas} páginas)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        servidor.detener()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,288 @@
+"""
+Refresco incremental del dataset descargado con utils.tmdb_ingest.
+
+En lugar de volver a pedir los ~10000 detalles, el refresco:
+
+1. recorre las páginas de discover/movie, que ya traen popularidad y votos
+   de cada película (20 por petición);
+2. pide el detalle solo de las películas nuevas y de aquellas cuya
+   popularidad o cantidad de votos se movió más que un umbral, y lo pide de
+   forma condicional con el ETag y Last-Modified guardados en la caché (si
+   no cambió, la API responde 304 sin cuerpo);
+3. conserva el orden de las filas del CSV anterior (las nuevas van al final)
+   para que un cambio de popularidad no reordene el índice TF-IDF;
+4. escribe un delta JSON (altas, bajas y columnas modificadas por película)
+   que DataLoader.reconstruir_incremental usa para reconstruir solo las
+   piezas de artefactos afectadas.
+
+Uso (desde app/):
+    python -m utils.tmdb_refresh --api-key CLAVE --reconstruir
+"""
+
+import argparse
+import ast
+import asyncio
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+from .tmdb_ingest import (
+    URL_BASE, COLUMNAS, ClienteTMDb, CacheRespuestas, ErrorTMDb, ESTADOS_REINTENTABLES,
+    directorio_cache, escribir_csv, fila_pelicula
+)
+
+COLUMNAS_LISTA = ('genres', 'cast', 'production_companies')
+
+
+def leer_filas(ruta):
+    """Filas del CSV anterior en su orden, con las listas ya convertidas"""
+    df = pd.read_csv(ruta, keep_default_na=False)
+    filas = df.to_dict('records')
+    for fila in filas:
+        for columna in COLUMNAS_LISTA:
+            fila[columna] = ast.literal_eval(fila[columna])
+    return filas
+
+
+def cambio_relativo(anterior, actual):
+    try:
+        anterior, actual = float(anterior), float(actual)
+    except (TypeError, ValueError):
+        return float('inf')
+    return abs(actual - anterior) / max(abs(anterior), 1.0)
+
+
+def campos_modificados(anterior, nueva):
+    """Columnas cuyo valor cambió entre dos versiones de una fila"""
+    cambiados = []
+    for columna in COLUMNAS:
+        a, b = anterior.get(columna), nueva.get(columna)
+        if a == b:
+            continue
+        # El CSV devuelve números como texto o float; se comparan como números
+        try:
+            if float(a) == float(b):
+                continue
+        except (TypeError, ValueError):
+            if str(a) == str(b):
+                continue
+        cambiados.append(columna)
+    return cambiados
+
+
+class RefrescoTMDb:
+    """Compara discover/movie con el dataset anterior y pide solo lo que cambió"""
+
+    def __init__(self, cliente, cache, filas, paginas=500,
+                 umbral_popularidad=0.10, umbral_votos=0.01):
+        self.cliente = cliente
+        self.cache = cache
+        self.paginas = paginas
+        self.umbral_popularidad = umbral_popularidad
+        self.umbral_votos = umbral_votos
+        self.orden = [fila['id'] for fila in filas]
+        self.anteriores = {fila['id']: fila for fila in filas}
+        self.filas = dict(self.anteriores)
+        self.generos = {}
+        # Resumen de discover de cada película, en orden de aparición
+        self.resumenes = {}
+        self.contadores = {'candidatas': 0, 'no_modificadas': 0, 'descargadas': 0, 'fallidas': 0}
+        self.inexistentes = set()
+
+    def _movio(self, movie_id):
+        anterior = self.anteriores.get(movie_id)
+        if anterior is None:
+            # Nueva, salvo que la caché ya la registre como inexistente (404)
+            entrada = self.cache.leer(movie_id)
+            if entrada is not None and entrada.get('fila') is None:
+                self.inexistentes.add(movie_id)
+                return False
+            return True
+        resumen = self.resumenes[movie_id]
+        return (
+            cambio_relativo(anterior['popularity'], resumen.get('popularity')) > self.umbral_popularidad
+            or cambio_relativo(anterior['vote_count'], resumen.get('vote_count')) > self.umbral_votos
+        )
+
+    async def ejecutar(self):
+        datos = await self.cliente.get_json('genre/movie/list', language='en-US')
+        self.generos = {g['id']: g['name'] for g in datos['genres']}
+
+        paginas = await asyncio.gather(*(self._pagina(p) for p in range(1, self.paginas + 1)))
+        if any(resultados is None for resultados in paginas):
+            # Sin todas las páginas no se pueden detectar bajas
+            raise ErrorTMDb("No se pudieron descargar todas las páginas de discover")
+        for resultados in paginas:
+            for resumen in resultados:
+                self.resumenes.setdefault(resumen['id'], resumen)
+
+        candidatas = [i for i in self.resumenes if self._movio(i)]
+        self.contadores['candidatas'] = len(candidatas)
+        await asyncio.gather(*(self._pelicula(i) for i in candidatas))
+
+    async def _pagina(self, numero):
+        try:
+            datos = await self.cliente.get_json(
+                'discover/movie', language='en-US', sort_by='popularity.desc', page=numero
+            )
+        except ErrorTMDb as e:
+            if e.estado is not None and e.estado not in ESTADOS_REINTENTABLES:
+                raise
+            print(f"  Falló la página {numero}: {str(e)}")
+            return None
+        return (datos or {}).get('results', [])
+
+    async def _pelicula(self, movie_id):
+        entrada = self.cache.leer(movie_id)
+        # Sin la fila en caché no sirve un 304: se pide el detalle completo
+        validadores = entrada if entrada is not None and movie_id in self.anteriores else None
+        try:
+            estado, detalles, nuevos = await self.cliente.get_condicional(
+                f'movie/{movie_id}', validadores, append_to_response='credits'
+            )
+        except ErrorTMDb as e:
+            if e.estado is not None and e.estado not in ESTADOS_REINTENTABLES:
+                raise
+            self.contadores['fallidas'] += 1
+            return
+
+        if estado == 304:
+            self.contadores['no_modificadas'] += 1
+        elif detalles is None:
+            self.inexistentes.add(movie_id)
+            self.cache.guardar(movie_id, None, nuevos)
+        else:
+            fila = fila_pelicula(detalles, self.generos)
+            self.filas[movie_id] = fila
+            self.cache.guardar(movie_id, fila, nuevos)
+            self.contadores['descargadas'] += 1
+
+    def resultado(self):
+        """(filas en orden, delta)"""
+        vigentes = set(self.resumenes) - self.inexistentes
+        eliminadas = [i for i in self.orden if i not in vigentes]
+        agregadas = [i for i in self.resumenes if i in vigentes and i not in self.anteriores
+                     and i in self.filas]
+        orden = [i for i in self.orden if i in vigentes] + agregadas
+
+        modificadas = {}
+        for movie_id in self.orden:
+            if movie_id in vigentes and self.filas[movie_id] is not self.anteriores[movie_id]:
+                campos = campos_modificados(self.anteriores[movie_id], self.filas[movie_id])
+                if campos:
+                    modificadas[movie_id] = campos
+
+        delta = {
+            'agregadas': agregadas,
+            'eliminadas': eliminadas,
+            'modificadas': {str(i): campos for i, campos in modificadas.items()},
+            'campos': sorted({c for campos in modificadas.values() for c in campos})
+        }
+        return [self.filas[i] for i in orden], delta
+
+
+async def _refrescar(api_key, ruta, paginas, cache_dir, base_url, concurrencia, tasa, reintentos,
+                     umbral_popularidad, umbral_votos):
+    inicio = time.perf_counter()
+    cliente = ClienteTMDb(api_key, base_url, concurrencia, tasa, reintentos)
+    refresco = RefrescoTMDb(cliente, CacheRespuestas(cache_dir), leer_filas(ruta), paginas,
+                            umbral_popularidad, umbral_votos)
+    try:
+        await refresco.ejecutar()
+    finally:
+        cliente.cerrar()
+
+    filas, delta = refresco.resultado()
+    hubo_cambios = bool(delta['agregadas'] or delta['eliminadas'] or delta['modificadas'])
+    if hubo_cambios:
+        escribir_csv(pd.DataFrame(filas, columns=COLUMNAS), ruta)
+    with open(f"{ruta}.delta.json", "w", encoding="utf-8") as f:
+        json.dump(delta, f, indent=2)
+
+    return dict(
+        refresco.contadores,
+        peliculas=len(filas),
+        agregadas=len(delta['agregadas']),
+        eliminadas=len(delta['eliminadas']),
+        modificadas=len(delta['modificadas']),
+        campos=delta['campos'],
+        segundos=time.perf_counter() - inicio,
+        **cliente.estadisticas
+    ), delta
+
+
+def refrescar_dataset(api_key, ruta="dataset_movies_api.csv", paginas=500, cache=None,
+                      base_url=URL_BASE, concurrencia=16, tasa=40.0, reintentos=5,
+                      umbral_popularidad=0.10, umbral_votos=0.01):
+    """Refresca el CSV en su lugar y escribe el delta en ruta + '.delta.json'.
+
+    Devuelve (resumen, delta, error).
+    """
+    try:
+        resumen, delta = asyncio.run(_refrescar(
+            api_key, ruta, paginas, cache or directorio_cache(ruta), base_url,
+            concurrencia, tasa, reintentos, umbral_popularidad, umbral_votos
+        ))
+        return resumen, delta, None
+    except ErrorTMDb as e:
+        return None, None, f"Error de la API de TMDb: {str(e)}"
+    except FileNotFoundError:
+        return None, None, f"No existe {ruta}: descárgalo primero con utils.tmdb_ingest"
+    except Exception as e:
+        return None, None, f"Error durante el refresco: {str(e)}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresca el dataset pidiendo solo lo que cambió")
+    parser.add_argument('--api-key', default=os.environ.get('TMDB_API_KEY'),
+                        help="Clave de la API (por defecto la variable TMDB_API_KEY)")
+    parser.add_argument('--dataset', default='dataset_movies_api.csv')
+    parser.add_argument('--paginas', type=int, default=500)
+    parser.add_argument('--cache', default=None, help="Directorio de la caché de respuestas")
+    parser.add_argument('--base-url', default=URL_BASE)
+    parser.add_argument('--concurrencia', type=int, default=16)
+    parser.add_argument('--tasa', type=float, default=40.0, help="Peticiones por segundo")
+    parser.add_argument('--reintentos', type=int, default=5)
+    parser.add_argument('--umbral-popularidad', type=float, default=0.10,
+                        help="Cambio relativo de popularidad que justifica pedir el detalle")
+    parser.add_argument('--umbral-votos', type=float, default=0.01,
+                        help="Cambio relativo de vote_count que justifica pedir el detalle")
+    parser.add_argument('--reconstruir', action='store_true',
+                        help="Reconstruir después las piezas de artefactos afectadas")
+    parser.add_argument('--models-dir', default='models/saved')
+    args = parser.parse_args()
+
+    if not args.api_key:
+        print("Falta la clave de la API (--api-key o TMDB_API_KEY)")
+        return 1
+
+    resumen, delta, error = refrescar_dataset(
+        args.api_key, args.dataset, args.paginas, args.cache, args.base_url,
+        args.concurrencia, args.tasa, args.reintentos,
+        args.umbral_popularidad, args.umbral_votos
+    )
+    if error:
+        print(error)
+        return 1
+    print(f"Películas: {resumen['peliculas']} | {resumen['agregadas']} nuevas, "
+          f"{resumen['eliminadas']} eliminadas, {resumen['modificadas']} modificadas "
+          f"({', '.join(resumen['campos']) or 'sin cambios'})")
+    print(f"Detalles pedidos: {resumen['candidatas']} ({resumen['no_modificadas']} sin cambios/304, "
+          f"{resumen['fallidas']} fallidos) | {resumen['peticiones']} peticiones, "
+          f"{resumen['bytes'] / 1e6:.2f} MB en {resumen['segundos']:.1f} s")
+
+    if args.reconstruir:
+        from .data_loader import DataLoader
+
+        reconstruidas = DataLoader(args.dataset).reconstruir_incremental(delta, args.models_dir)
+        if reconstruidas is None:
+            return 1
+        print(f"Piezas reconstruidas: {', '.join(sorted(reconstruidas)) or 'ninguna'}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,11 @@
 import re
 import unicodedata
+import numpy as np
+import pandas as pd
 from rapidfuzz import process, fuzz
-from collections import defaultdict
+
+from .catalog import MovieCatalog, EntityPostings
+from .metrics import METRICAS
 
 
 def normalize_text(s):
@@ -58,43 +62,64 @@ def validate_text(text, max_length=None):
 class TextCorrector:
     """Clase para corrección de títulos y nombres usando fuzzy matching"""
     
-    def __init__(self, df):
-        self.df = df
+    def __init__(self, catalogo, entidades=True):
+        # Se acepta también un DataFrame con columnas de listas
+        if not isinstance(catalogo, MovieCatalog):
+            catalogo = MovieCatalog.desde_dataframe(catalogo)
+        self.catalogo = catalogo
+        self.df = catalogo.df
         self._build_indexes()
+        # Con entidades=False los índices de actores, directores y productoras
+        # se construyen después con construir_indices_entidades()
+        if entidades:
+            self.construir_indices_entidades()
     
-    def _build_indexes(self):
-        """Construye índices para búsqueda rápida"""
-        # Índices para actores, directores y productoras
-        self.actor_index = defaultdict(set)
-        self.director_index = defaultdict(set)
-        self.company_index = defaultdict(set)
-        
-        for idx, row in self.df.iterrows():
-            # Cast
-            for actor in row['cast']:
-                na = normalize_text(actor)
-                self.actor_index[na].add(idx)
-            
-            # Director
-            nd = normalize_text(row['director'])
-            self.director_index[nd].add(idx)
-            
-            # Productoras
-            for comp in row['production_companies']:
-                nc = normalize_text(comp)
-                self.company_index[nc].add(idx)
+    @staticmethod
+    def _indice_entidades(vocabulario, filas, ids):
+        """Índice nombre normalizado -> filas a partir de los pares (fila, id)"""
+        # Normalizar cada nombre distinto una sola vez
+        nombres = []
+        slot = {}
+        id_a_slot = np.empty(len(vocabulario), dtype=np.int64)
+        for i, nombre in enumerate(vocabulario):
+            norm = normalize_text(nombre)
+            if norm not in slot:
+                slot[norm] = len(nombres)
+                nombres.append(norm)
+            id_a_slot[i] = slot[norm]
         
-        # Índice de títulos
+        claves = id_a_slot[ids] if len(ids) else np.zeros(0, dtype=np.int64)
+        return EntityPostings.desde_pares(nombres, claves, filas)
+    
+    @METRICAS.medido('corrector.indice_titulos')
+    def _build_indexes(self):
+        """Construye el índice de títulos"""
         self.norm_to_titles = {}
         for title in self.df['title'].tolist():
             nt = normalize_text(title)
             self.norm_to_titles.setdefault(nt, []).append(title)
         
         self.titulos_norm = list(self.norm_to_titles.keys())
+    
+    @METRICAS.medido('corrector.indices_entidades')
+    def construir_indices_entidades(self):
+        """Construye los índices de actores, directores y productoras"""
+        filas, ids = self.catalogo.pares_reparto()
+        self.actor_index = self._indice_entidades(self.catalogo.actores, filas, ids)
+        
+        # factorize ordena los directores por primera aparición
+        ids, directores = pd.factorize(self.df['director'].astype(object))
+        filas = np.arange(len(self.df), dtype=np.int32)
+        self.director_index = self._indice_entidades(list(directores), filas, ids)
+        
+        filas, ids = self.catalogo.pares_companias()
+        self.company_index = self._indice_entidades(self.catalogo.companias, filas, ids)
+        
         self.actor_names = list(self.actor_index.keys())
         self.director_names = list(self.director_index.keys())
         self.company_names = list(self.company_index.keys())
     
+    @METRICAS.medido('corrector.titulo')
     def corregir_titulo(self, titulo_input, threshold=70):
         """Corrige título usando fuzzy matching"""
         if not titulo_input or not titulo_input.strip():
@@ -123,8 +148,10 @@ class TextCorrector:
             )
             return best[0] if best else titulo_input
         
+        METRICAS.contar('corrector.titulo.sin_coincidencia')
         return titulo_input
     
+    @METRICAS.medido('corrector.entidad')
     def corregir_nombre_entidad(self, nombre, entidad, threshold=75):
         """Corrige nombre de actor, director o productora"""
         if not nombre or not nombre.strip():
@@ -150,4 +177,5 @@ class TextCorrector:
         if resultado and resultado[1] >= threshold:
             return resultado[0]
         
+        METRICAS.contar('corrector.entidad.sin_coincidencia')
         return nombre_norm